@@ -5,7 +5,20 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime
 import time
+import io
 import numpy as np
+import ingest
+import analytics
+import charts
+import database
+import drawdown
+import journal_store
+import montecarlo
+import profiler
+import rolling
+
+# Inicio del rerun, para medir el tiempo hasta el primer gráfico
+script_start = time.perf_counter()
 
 # Configuración de la página
 st.set_page_config(
@@ -53,14 +66,660 @@ st.markdown("""
 
 st.markdown('<h1 class="main-header">📊 Trading Analytics Dashboard</h1>', unsafe_allow_html=True)
 
-# Initialize session state
+@st.cache_resource(show_spinner=False)
+def init_journal():
+    """Prepara la base del journal una sola vez por proceso"""
+    journal_store.init_journal()
+    return True
+
+
+@st.cache_resource(show_spinner="Cargando journal...", max_entries=1)
+def load_journal(data_version):
+    """Lectura del journal compartida entre sesiones; `data_version` la invalida al cambiar la base"""
+    return journal_store.load_trades()
+
+
+# Initialize session state: las sesiones nuevas arrancan en caliente desde el journal
+init_journal()
 if 'trades_df' not in st.session_state:
-    st.session_state.trades_df = pd.DataFrame()
+    # `data_key` identifica el contenido de `trades_df`: versión del journal o hash del CSV
+    data_version = database.get_data_version()
+    st.session_state.trades_df = load_journal(data_version)
+    st.session_state.data_key = ('journal', data_version)
+    st.session_state.start_mode = "caliente" if not st.session_state.trades_df.empty else "frío"
+elif 'data_key' not in st.session_state:
+    # DataFrame puesto en la sesión desde fuera (p. ej. `benchmarks.py`): se identifica por su contenido
+    st.session_state.data_key = ('frame', drawdown.dataset_hash(st.session_state.trades_df))
+
+
+def get_journal():
+    """Acumulador de métricas de la sesión; se reconstruye sólo si se reemplazan los datos"""
+    journal = st.session_state.get('journal')
+    if journal is None or journal.source is not st.session_state.trades_df:
+        journal = st.session_state.journal = analytics.IncrementalMetrics(st.session_state.trades_df)
+    return journal
+
+
+def lazy_section(name, title, expanded=False):
+    """Expander de una sección de análisis; con `on_change="rerun"` su contenido
+    sólo se calcula mientras está abierto (`.open`)"""
+    return st.expander(title, expanded=expanded, key=f"section_{name}", on_change="rerun")
+
+
+def section_cache(name, token, build):
+    """Resultado de `build()` reutilizado mientras `token` no cambie.
+
+    `token` reúne la versión de los datos y los parámetros de la sección; se
+    guarda un único resultado por nombre, así que un rerun ajeno a la sección
+    (p. ej. en la barra lateral) no vuelve a armar sus figuras ni sus tablas.
+    """
+    cache = st.session_state.setdefault('section_cache', {})
+    entry = cache.get(name)
+    if entry is None or entry[0] != token:
+        entry = cache[name] = (token, build())
+    return entry[1]
+
+
+def dataset_key(journal, data_token):
+    """Hash del dataset (`drawdown.dataset_hash`), calculado una vez por versión de los datos"""
+    if st.session_state.get('drawdown_token') != data_token:
+        st.session_state.drawdown_key = drawdown.dataset_hash(journal.frame())
+        st.session_state.drawdown_token = data_token
+    return st.session_state.drawdown_key
+
+
+# Cada sección es un fragmento: sus widgets sólo vuelven a ejecutar la sección.
+# En un rerun de fragmento los argumentos son los del último rerun completo.
+@st.fragment
+def capital_section(journal, metrics, data_token):
+    prof.section("capital", rows=len(metrics.equity))
+    with lazy_section("capital", "📈 Evolución del Capital", expanded=True) as box:
+        if not box.open:
+            return
+
+        # Con muchos trades se reduce la curva (LTTB) y se dibuja con WebGL; el
+        # selector de ventana vuelve a muestrear el tramo elegido con más detalle
+        window = None
+        # Los trades sin fecha de cierre (NaT) quedan fuera del selector y del gráfico
+        close_times = metrics.equity['Close Time'].dropna()
+        if len(close_times) > max_points:
+            first, last = close_times.iloc[[0, -1]].dt.to_pydatetime()
+            window = st.slider("🔍 Ventana", min_value=first, max_value=last, value=(first, last),
+                               format="YYYY-MM-DD", key="equity_window")
+
+        def build():
+            equity, reduced = charts.downsample_equity(metrics.equity, max_points, window)
+            scatter = go.Scattergl if reduced else go.Scatter
+
+            fig_capital = go.Figure()
+
+            # Línea principal del capital
+            fig_capital.add_trace(scatter(
+                x=equity['Close Time'],
+                y=equity['Cumulative_Profit'],
+                mode='lines',
+                name='Capital Acumulado',
+                line=dict(color='#3b82f6', width=3),
+                fill='tonexty',
+                fillcolor='rgba(59, 130, 246, 0.1)'
+            ))
+
+            # Línea de drawdown
+            fig_capital.add_trace(scatter(
+                x=equity['Close Time'],
+                y=equity['Running_Max'],
+                mode='lines',
+                name='Máximo Histórico',
+                line=dict(color='#10b981', width=2, dash='dash'),
+                opacity=0.7
+            ))
+
+            fig_capital.update_layout(
+                title="Evolución del Capital y Drawdown",
+                xaxis_title="Fecha",
+                yaxis_title="Profit Acumulado ($)",
+                height=500,
+                showlegend=True,
+                hovermode='x unified',
+                template='plotly_white'
+            )
+            return fig_capital
+
+        st.plotly_chart(section_cache("capital", (data_token, max_points, window), build), use_container_width=True)
+
+        # Tiempo hasta el primer gráfico de la sesión (arranque en frío o en caliente)
+        if 'first_chart_ms' not in st.session_state:
+            st.session_state.first_chart_ms = (time.perf_counter() - script_start) * 1000
+            st.session_state.first_chart_mode = st.session_state.get('start_mode', "frío")
+
+
+ROLLING_LABELS = {
+    'Win_Rate': "Win Rate (%)",
+    'Profit_Factor': "Profit Factor",
+    'Expectancy': "Expectancy ($)",
+    'Sharpe': "Sharpe por Trade",
+    'Drawdown': "Drawdown ($)",
+    'Avg_Win': "Ganancia Promedio ($)",
+    'Avg_Loss': "Pérdida Promedio ($)"
+}
+
+
+@st.fragment
+def rolling_section(journal, metrics, data_token):
+    # Métricas móviles: la vista local de las métricas principales
+    prof.section("rolling", rows=metrics.total_trades)
+    with lazy_section("rolling", "🔄 Métricas Móviles") as box:
+        if not box.open:
+            return
+
+        col1, col2, col3 = st.columns([1, 1, 2])
+        with col1:
+            window_kind = st.radio("Ventana", rolling.WINDOW_KINDS, horizontal=True, key="rolling_kind",
+                                   format_func=lambda kind: "Últimos N trades" if kind == 'trades' else "Últimos T días")
+        with col2:
+            window_size = st.number_input("Tamaño", min_value=1, max_value=100_000,
+                                          value=50 if window_kind == 'trades' else 30, step=1, key=f"rolling_{window_kind}")
+        with col3:
+            rolling_shown = st.multiselect("Métricas", list(ROLLING_LABELS), default=['Win_Rate', 'Profit_Factor', 'Drawdown'],
+                                           format_func=ROLLING_LABELS.get, key="rolling_metrics")
+        if not rolling_shown:
+            return
+
+        def build():
+            window_metrics = rolling.rolling_metrics(metrics.equity['Close Time'], journal.profits(),
+                                                     int(window_size), by=window_kind)[int(window_size)]
+            x = window_metrics['Close Time'].to_numpy()
+            fig_rolling = make_subplots(rows=len(rolling_shown), cols=1, shared_xaxes=True, vertical_spacing=0.04,
+                                        subplot_titles=[ROLLING_LABELS[name] for name in rolling_shown])
+            for row, name in enumerate(rolling_shown, start=1):
+                y = window_metrics[name].to_numpy()
+                keep = slice(None)
+                # Las series largas se reducen con LTTB sobre los valores definidos
+                if len(y) > max_points:
+                    defined = np.flatnonzero(np.isfinite(y))
+                    keep = defined[charts.lttb(x[defined].astype('datetime64[us]').astype('int64'), y[defined], max_points)]
+                scatter = go.Scattergl if len(y) > max_points else go.Scatter
+                fig_rolling.add_trace(scatter(x=x[keep], y=y[keep], mode='lines', name=ROLLING_LABELS[name],
+                                              line=dict(width=2)), row=row, col=1)
+            fig_rolling.update_layout(
+                height=220 * len(rolling_shown) + 60,
+                showlegend=False,
+                hovermode='x unified',
+                template='plotly_white'
+            )
+            return fig_rolling
+
+        token = (data_token, window_kind, int(window_size), tuple(rolling_shown), max_points)
+        st.plotly_chart(section_cache("rolling", token, build), use_container_width=True)
+
+
+@st.fragment
+def distribution_section(journal, metrics, data_token):
+    # Gráfico de distribución de ganancias/pérdidas
+    prof.section("distribution", rows=metrics.total_trades)
+    with lazy_section("distribution", "📊 Distribución de Resultados", expanded=True) as box:
+        if not box.open:
+            return
+
+        def build():
+            # Histograma de profits agrupado en el servidor
+            fig_dist = charts.histogram_figure({'Profit': journal.profits()}, nbins=30, colors=['#3b82f6'])
+            fig_dist.update_layout(title="Distribución de Ganancias/Pérdidas")
+
+            fig_dist.add_vline(x=0, line_dash="dash", line_color="red", annotation_text="Breakeven")
+            fig_dist.update_layout(
+                xaxis_title="Profit ($)",
+                yaxis_title="Frecuencia",
+                height=400,
+                template='plotly_white'
+            )
+
+            # Pie chart de win/loss
+            win_loss_counts = metrics.result_counts
+            colors = ['#10b981' if x == 'Win' else '#ef4444' for x in win_loss_counts.index]
+
+            fig_pie = px.pie(
+                values=win_loss_counts.values,
+                names=win_loss_counts.index,
+                title="Proporción de Trades Ganadores vs Perdedores",
+                color_discrete_sequence=colors
+            )
+            fig_pie.update_layout(height=400)
+            return fig_dist, fig_pie
+
+        fig_dist, fig_pie = section_cache("distribution", data_token, build)
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.plotly_chart(fig_dist, use_container_width=True)
+
+        with col2:
+            st.markdown("**🎯 Win/Loss Ratio**")
+            st.plotly_chart(fig_pie, use_container_width=True)
+
+
+@st.fragment
+def symbol_section(metrics, data_token):
+    # Análisis por símbolo
+    prof.section("symbol", rows=len(metrics.by_symbol))
+    with lazy_section("symbol", "📈 Análisis por Símbolo") as box:
+        if not box.open:
+            return
+
+        def build():
+            fig_symbol = px.bar(
+                metrics.by_symbol.head(10),
+                x='Symbol',
+                y='Total_Profit',
+                title="Top 10 Símbolos por Profit Total",
+                color='Total_Profit',
+                color_continuous_scale='RdYlGn'
+            )
+
+            fig_symbol.update_layout(
+                xaxis_title="Símbolo",
+                yaxis_title="Profit Total ($)",
+                height=400,
+                template='plotly_white'
+            )
+            return fig_symbol
+
+        st.plotly_chart(section_cache("symbol", data_token, build), use_container_width=True)
+
+
+@st.fragment
+def weekday_section(metrics, data_token):
+    # Análisis por día de la semana
+    prof.section("weekday", rows=len(metrics.by_weekday))
+    with lazy_section("weekday", "📅 Rendimiento por Día de la Semana") as box:
+        if not box.open:
+            return
+
+        def build():
+            day_analysis = metrics.by_weekday
+            fig_day_profit = px.bar(
+                day_analysis,
+                x='Día',
+                y='Profit_Total',
+                title="Profit Total por Día de la Semana",
+                color='Profit_Total',
+                color_continuous_scale='RdYlGn'
+            )
+            fig_day_profit.update_layout(height=400, template='plotly_white')
+
+            fig_day_winrate = px.bar(
+                day_analysis,
+                x='Día',
+                y='Win_Rate',
+                title="Win Rate por Día de la Semana",
+                color='Win_Rate',
+                color_continuous_scale='Blues'
+            )
+            fig_day_winrate.update_layout(height=400, template='plotly_white')
+            return fig_day_profit, fig_day_winrate
+
+        fig_day_profit, fig_day_winrate = section_cache("weekday", data_token, build)
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.plotly_chart(fig_day_profit, use_container_width=True)
+
+        with col2:
+            st.plotly_chart(fig_day_winrate, use_container_width=True)
+
+
+@st.fragment
+def monthly_section(metrics, data_token):
+    # Análisis mensual
+    prof.section("monthly", rows=len(metrics.by_month))
+    with lazy_section("monthly", "📅 Análisis Mensual") as box:
+        if not box.open:
+            return
+
+        def build():
+            # Con los datos del journal el resumen sale de sus agregados mensuales; un CSV
+            # subido se agrega en `analytics`, porque el journal puede tener más trades
+            data_key, _ = data_token
+            monthly_results = database.get_monthly_summary() if data_key[0] == 'journal' else metrics.by_month
+
+            fig_monthly = go.Figure()
+
+            # Agregar barras con colores condicionales
+            colors = ['#10b981' if x > 0 else '#ef4444' for x in monthly_results['Total_Profit']]
+
+            fig_monthly.add_trace(go.Bar(
+                x=monthly_results['Mes'],
+                y=monthly_results['Total_Profit'],
+                name='Profit Mensual',
+                marker_color=colors,
+                text=monthly_results['Total_Profit'].round(2),
+                textposition='auto'
+            ))
+
+            fig_monthly.update_layout(
+                title="Profit Mensual",
+                xaxis_title="Mes",
+                yaxis_title="Profit ($)",
+                height=400,
+                template='plotly_white'
+            )
+
+            # Formatear los datos para mejor visualización
+            monthly_display = monthly_results.copy()
+            monthly_display['Total_Profit'] = monthly_display['Total_Profit'].apply(lambda x: f"${x:,.2f}")
+            monthly_display['Avg_Profit'] = monthly_display['Avg_Profit'].apply(lambda x: f"${x:,.2f}")
+            monthly_display['Win_Rate'] = monthly_display['Win_Rate'].apply(lambda x: f"{x:.1%}")
+            return fig_monthly, monthly_display
+
+        fig_monthly, monthly_display = section_cache("monthly", data_token, build)
+        st.plotly_chart(fig_monthly, use_container_width=True)
+
+        # Tabla de resumen mensual
+        st.markdown("**📋 Resumen Mensual Detallado**")
+        st.dataframe(
+            monthly_display,
+            column_config={
+                "Mes": "Mes",
+                "Total_Profit": "Profit Total",
+                "Avg_Profit": "Profit Promedio",
+                "Total_Trades": "Total Trades",
+                "Winning_Trades": "Trades Ganadores",
+                "Win_Rate": "Win Rate"
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+
+@st.fragment
+def stats_section(metrics):
+    # Estadísticas adicionales
+    prof.section("stats", rows=metrics.total_trades)
+    with lazy_section("stats", "📊 Estadísticas Adicionales", expanded=True) as box:
+        if not box.open:
+            return
+
+        col1, col2, col3 = st.columns(3)
+
+        with col1:
+            # Sin Open Time ni Duration (hours) no hay duraciones
+            st.metric("📏 Duración Promedio", "N/D" if metrics.avg_duration is None else f"{metrics.avg_duration:.2f} horas")
+            st.metric("⏱️ Duración Máxima", "N/D" if metrics.max_duration is None else f"{metrics.max_duration:.2f} horas")
+
+        with col2:
+            best_trade = metrics.best_trade
+            st.metric("🏆 Mejor Trade", f"${best_trade['Profit (USD)']:,.2f}")
+            st.caption(f"Símbolo: {best_trade['Symbol']}")
+
+        with col3:
+            worst_trade = metrics.worst_trade
+            st.metric("📉 Peor Trade", f"${worst_trade['Profit (USD)']:,.2f}")
+            st.caption(f"Símbolo: {worst_trade['Symbol']}")
+
+
+@st.fragment
+def drawdown_section(journal, data_token):
+    # Análisis de drawdown: el informe se memoriza por el hash del dataset
+    prof.section("drawdown", rows=journal.total_trades)
+    with lazy_section("drawdown", "📉 Análisis de Drawdown") as box:
+        if not box.open:
+            return
+
+        report = drawdown.analyze(journal.frame(), key=dataset_key(journal, data_token))
+        episodes = report.episodes
+        recovered = episodes['Recuperación'].notna()
+
+        col1, col2, col3, col4 = st.columns(4)
+
+        with col1:
+            st.metric("🔁 Episodios", f"{len(episodes):,}")
+
+        with col2:
+            longest = episodes['Duración'].max() if recovered.any() else None
+            st.metric("⏳ Duración Máxima", f"{longest.total_seconds() / 86400:,.1f} días" if longest is not None else "-")
+
+        with col3:
+            recovery = episodes.loc[recovered, 'Tiempo_Recuperación'].mean() if recovered.any() else None
+            st.metric("🩹 Recuperación Promedio", f"{recovery.total_seconds() / 86400:,.1f} días" if recovery is not None else "-")
+
+        with col4:
+            open_depth = episodes['Profundidad'].iloc[-1] if len(episodes) and not recovered.iloc[-1] else 0.0
+            st.metric("🌊 Drawdown Actual", f"${open_depth:,.2f}")
+
+        # Los 10 episodios más profundos
+        deepest = episodes.nsmallest(10, 'Profundidad')
+        st.dataframe(
+            pd.DataFrame({
+                'Inicio': deepest['Inicio'],
+                'Valle': deepest['Valle'],
+                'Recuperación': deepest['Recuperación'],
+                'Profundidad': deepest['Profundidad'].apply(lambda x: f"${x:,.2f}"),
+                'Días': (deepest['Duración'].dt.total_seconds() / 86400).round(1),
+                'Días hasta el valle': (deepest['Hasta_Valle'].dt.total_seconds() / 86400).round(1),
+                'Trades': deepest['Trades']
+            }),
+            hide_index=True,
+            use_container_width=True
+        )
+
+        # Curvas underwater por símbolo y por estrategia
+        for tab, (name, summary, curves) in zip(
+            st.tabs(["Por Símbolo", "Por Estrategia"]),
+            [('Symbol', report.by_symbol, report.symbol_underwater),
+             ('Portfolio', report.by_strategy, report.strategy_underwater)]
+        ):
+            with tab:
+                if summary.empty:
+                    st.info("No hay datos para esta agrupación.")
+                    continue
+
+                group = st.selectbox("Grupo", summary[name], key=f"underwater_{name}")
+
+                def build():
+                    curve = curves[curves[name] == group]
+                    x = curve['Close Time'].to_numpy()
+                    y = curve['Drawdown'].to_numpy()
+                    # Se conserva siempre el valle aunque LTTB no lo elija
+                    keep = np.union1d(charts.lttb(x.astype('datetime64[us]').astype('int64'), y, max_points), [int(np.argmin(y))])
+                    scatter = go.Scattergl if len(keep) < len(y) else go.Scatter
+
+                    fig_underwater = go.Figure(scatter(
+                        x=x[keep], y=y[keep], mode='lines', name=str(group),
+                        line=dict(color='#ef4444', width=2), fill='tozeroy', fillcolor='rgba(239, 68, 68, 0.15)'
+                    ))
+                    fig_underwater.update_layout(
+                        title=f"Curva Underwater: {group}",
+                        xaxis_title="Fecha",
+                        yaxis_title="Drawdown ($)",
+                        height=350,
+                        template='plotly_white'
+                    )
+                    return fig_underwater
+
+                token = (st.session_state.drawdown_key, group, max_points)
+                st.plotly_chart(section_cache(f"underwater_{name}", token, build), use_container_width=True)
+
+                st.dataframe(
+                    summary.head(10),
+                    column_config={
+                        "Max_Drawdown": st.column_config.NumberColumn("Max Drawdown", format="$%.2f"),
+                        "Drawdown_Actual": st.column_config.NumberColumn("Drawdown Actual", format="$%.2f"),
+                        "Trades": "Trades"
+                    },
+                    hide_index=True,
+                    use_container_width=True
+                )
+
+
+@st.fragment
+def simulation_section(journal, data_token):
+    # Simulación Monte Carlo: sólo se calcula al enviar el formulario y se
+    # memoriza por dataset, semilla y parámetros
+    prof.section("simulation", rows=journal.total_trades)
+    with lazy_section("simulation", "🎲 Simulación Monte Carlo") as box:
+        if not box.open:
+            return
+
+        with st.form("simulation_form"):
+            col1, col2, col3, col4 = st.columns(4)
+            with col1:
+                simulations = st.number_input("Simulaciones", min_value=100, max_value=100_000,
+                                              value=montecarlo.DEFAULT_SIMULATIONS, step=1000)
+            with col2:
+                method = st.selectbox("Método", montecarlo.METHODS,
+                                      format_func=lambda m: "Bootstrap (con reemplazo)" if m == 'bootstrap' else "Orden aleatorio")
+            with col3:
+                capital = st.number_input("Capital inicial ($)", min_value=1.0, value=10_000.0, step=1000.0)
+            with col4:
+                ruin_pct = st.slider("Ruina (% de pérdida)", min_value=5, max_value=100, value=50, step=5)
+            seed = st.number_input("Semilla", min_value=0, value=42, step=1)
+            run_simulation = st.form_submit_button("🎲 Simular")
+
+        key = dataset_key(journal, data_token)
+        simulation_params = (key, int(simulations), method, int(seed), float(capital), ruin_pct)
+        if run_simulation:
+            with st.spinner("Simulando curvas de capital..."):
+                st.session_state.simulation = (simulation_params, montecarlo.simulate(
+                    journal.profits(), int(simulations), method, seed=int(seed), capital=float(capital),
+                    ruin_fraction=ruin_pct / 100, key=key
+                ))
+
+        simulation = st.session_state.get('simulation')
+        if not simulation or simulation[0] != simulation_params:
+            return
+        result = simulation[1]
+        final = np.percentile(result.final_profit, [5, 50])
+        worst_drawdown = np.percentile(result.max_drawdown, 5)
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("☠️ Riesgo de Ruina", f"{result.risk_of_ruin:.2%}")
+        with col2:
+            st.metric("🎯 Profit Final (mediana)", f"${final[1]:,.2f}")
+        with col3:
+            st.metric("⚠️ Profit Final (P5)", f"${final[0]:,.2f}")
+        with col4:
+            st.metric("📉 Max Drawdown (P5)", f"${worst_drawdown:,.2f}")
+
+        def build():
+            # Bandas de percentiles sobre los puntos guardados, con la curva real encima
+            bands = result.bands
+            realized = np.cumsum(journal.profits())[bands['Trade_Number'].to_numpy() - 1]
+            fig_bands = go.Figure()
+            for low, high, color in [('P5', 'P95', 'rgba(59, 130, 246, 0.15)'), ('P25', 'P75', 'rgba(59, 130, 246, 0.3)')]:
+                fig_bands.add_trace(go.Scatter(x=bands['Trade_Number'], y=bands[high], mode='lines',
+                                               line=dict(width=0), showlegend=False, hoverinfo='skip'))
+                fig_bands.add_trace(go.Scatter(x=bands['Trade_Number'], y=bands[low], mode='lines', line=dict(width=0),
+                                               fill='tonexty', fillcolor=color, name=f"{low}-{high}"))
+            fig_bands.add_trace(go.Scatter(x=bands['Trade_Number'], y=bands['P50'], mode='lines', name='Mediana',
+                                           line=dict(color='#3b82f6', width=2, dash='dash')))
+            fig_bands.add_trace(go.Scatter(x=bands['Trade_Number'], y=realized, mode='lines', name='Real',
+                                           line=dict(color='#10b981', width=3)))
+            fig_bands.add_hline(y=result.ruin_level - result.capital, line_dash="dot", line_color="red",
+                                annotation_text="Ruina")
+            fig_bands.update_layout(
+                title=f"Bandas de Percentiles ({result.simulations:,} simulaciones)",
+                xaxis_title="Trade #",
+                yaxis_title="Profit Acumulado ($)",
+                height=450,
+                hovermode='x unified',
+                template='plotly_white'
+            )
+
+            fig_final = charts.histogram_figure({'Profit Final': result.final_profit}, nbins=50, colors=['#3b82f6'])
+            fig_final.update_layout(title="Distribución del Profit Final", xaxis_title="Profit ($)",
+                                    yaxis_title="Simulaciones", template='plotly_white')
+            fig_mdd = charts.histogram_figure({'Max Drawdown': result.max_drawdown}, nbins=50, colors=['#ef4444'])
+            fig_mdd.update_layout(title="Distribución del Max Drawdown", xaxis_title="Drawdown ($)",
+                                  yaxis_title="Simulaciones", template='plotly_white')
+            return fig_bands, fig_final, fig_mdd
+
+        fig_bands, fig_final, fig_mdd = section_cache("simulation", simulation_params, build)
+        st.plotly_chart(fig_bands, use_container_width=True)
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(fig_final, use_container_width=True)
+        with col2:
+            st.plotly_chart(fig_mdd, use_container_width=True)
+
+        st.dataframe(
+            result.summary(),
+            column_config={
+                "Profit_Final": st.column_config.NumberColumn("Profit Final", format="$%.2f"),
+                "Max_Drawdown": st.column_config.NumberColumn("Max Drawdown", format="$%.2f")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+
+
+EXPORT_FORMATS = {
+    "CSV": ('.csv', 'text/csv'),
+    "CSV comprimido (.gz)": ('.csv.gz', 'application/gzip'),
+    "Parquet": ('.parquet', 'application/octet-stream')
+}
+
+
+@st.fragment
+def export_panel(journal):
+    """Descarga de los trades; se llama dentro de `st.sidebar`, así que elegir el
+    formato o preparar el archivo sólo vuelve a ejecutar este panel"""
+    st.markdown("---")
+    st.subheader("📥 Descargar Datos")
+
+    export_format = st.selectbox("Formato", list(EXPORT_FORMATS), key="export_format")
+    extension, mime = EXPORT_FORMATS[export_format]
+
+    # El archivo sólo se genera al pedirlo, no en cada rerun
+    export_token = (export_format, st.session_state.data_key, journal.total_trades)
+    if st.button("📦 Preparar descarga"):
+        df = journal.frame()
+        buffer = io.BytesIO()
+        if extension == '.parquet':
+            df.to_parquet(buffer, index=False)
+        else:
+            df.to_csv(buffer, index=False, compression='gzip' if extension == '.csv.gz' else None)
+        st.session_state.export_payload = (export_token, buffer.getvalue())
+
+    export_payload = st.session_state.get('export_payload')
+    if export_payload and export_payload[0] == export_token:
+        st.download_button(
+            label=f"📄 Descargar {export_format}",
+            data=export_payload[1],
+            file_name=f'trading_analysis_{datetime.now().strftime("%Y%m%d_%H%M%S")}{extension}',
+            mime=mime,
+            on_click="ignore"
+        )
+
 
 # Sidebar para configuraciones
 st.sidebar.header("⚙️ Configuraciones")
 
+# Por encima de este número de puntos las series se reducen con LTTB y se dibujan con WebGL
+max_points = st.sidebar.number_input(
+    "Puntos máximos por gráfico", min_value=500, max_value=50000,
+    value=charts.DEFAULT_MAX_POINTS, step=500, key="max_points"
+)
+
+# Perfilado opcional por sección: tiempo, memoria pico y filas de cada rerun
+if 'profiler' not in st.session_state:
+    st.session_state.profiler = profiler.Profiler()
+prof = st.session_state.profiler
+prof.set_enabled(st.sidebar.checkbox("🔬 Perfilado por sección", key="profiling"))
+prof.start_run()
+
+# Estado de la caché de CSV procesados
+with st.sidebar.expander("🗄️ Caché de CSV"):
+    stats = ingest.cache_stats()
+    st.caption(f"Aciertos: {stats['hits']} · Fallos: {stats['misses']} · "
+               f"En caché: {stats['size']}/{stats['capacity']}")
+    if st.button("🧹 Vaciar caché", key="clear_ingest_cache"):
+        ingest.clear_cache()
+        st.rerun()
+
 # Tab layout para diferentes métodos de entrada
+prof.section("ingest")
 tab1, tab2 = st.tabs(["📤 Subir CSV", "✏️ Ingresar Manualmente"])
 
 with tab1:
@@ -69,17 +728,46 @@ with tab1:
     
     if archivo:
         try:
-            df = pd.read_csv(archivo)
-            df = df[df['Profit (USD)'] != 0]
-            df['Duration (hours)'] = (pd.to_datetime(df['Close Time']) - pd.to_datetime(df['Open Time'])).dt.total_seconds() / 3600
-            df['Result'] = df['Profit (USD)'].apply(lambda x: 'Win' if x > 0 else 'Loss')
+            # Se reutiliza el DataFrame ya preparado mientras el contenido no cambie;
+            # los archivos grandes se leen por bloques mostrando el avance
+            if archivo.size >= ingest.STREAMING_MIN_BYTES:
+                barra = st.progress(0.0, text="Leyendo CSV por bloques...")
+                csv_key, st.session_state.trades_df = ingest.ingest_csv(
+                    archivo, chunksize=ingest.DEFAULT_CHUNKSIZE,
+                    progress=lambda fraction: barra.progress(fraction, text=f"Leyendo CSV... {fraction:.0%}")
+                )
+                barra.empty()
+            else:
+                csv_key, st.session_state.trades_df = ingest.ingest_csv(archivo)
+            st.session_state.data_key = ('csv', csv_key)
+            prof.rows(len(st.session_state.trades_df))
             
-            if 'Order ID' in df.columns:
-                df = df.drop(columns=['Order ID'])
+            # Formato de fecha detectado y filas que no se pudieron leer
+            parsed_dates = st.session_state.trades_df.attrs.get('parsed_datetimes', {})
+            for col, info in parsed_dates.items():
+                if info['errors']:
+                    st.warning(f"⚠️ {col}: {info['errors']:,} fechas no reconocidas "
+                               f"({info['error_rate']:.2%}) con el formato {info['format'] or 'inferido'}")
+            if parsed_dates:
+                st.caption("🕒 Formato de fechas: " + " · ".join(
+                    f"{col} `{info['format'] or 'inferido'}`" for col, info in parsed_dates.items()))
             
-            st.session_state.trades_df = df
+            # El journal se sincroniza una vez por archivo: se añaden los trades nuevos y se
+            # actualizan los modificados, sin borrar los que no vienen en el CSV
+            if st.session_state.get('saved_csv_key') != csv_key:
+                st.session_state.saved_csv_result = journal_store.save_trades(st.session_state.trades_df)
+                st.session_state.saved_csv_key = csv_key
+            skipped = st.session_state.saved_csv_result['skipped']
+            if skipped:
+                st.warning(f"⚠️ {skipped:,} trades sin Close Time no se guardaron en el journal")
             st.success("✅ Datos cargados correctamente desde CSV!")
             
+            # Reemplazar el journal es una acción explícita: borra los trades que no están en el CSV
+            if st.button("♻️ Reemplazar el journal con este CSV", key="replace_journal",
+                         help="Borra del journal los trades manuales y de otras cuentas que no estén en este archivo"):
+                st.session_state.saved_csv_result = journal_store.replace_trades(st.session_state.trades_df)
+                st.success(f"✅ Journal reemplazado con {st.session_state.saved_csv_result['inserted']:,} trades")
+            
         except Exception as e:
             st.error(f"❌ Error al procesar el archivo CSV: {str(e)}")
 
@@ -125,12 +813,9 @@ with tab2:
                     'Stop Loss': None
                 }
                 
-                new_trade_df = pd.DataFrame([new_trade])
-                
-                if st.session_state.trades_df.empty:
-                    st.session_state.trades_df = new_trade_df
-                else:
-                    st.session_state.trades_df = pd.concat([st.session_state.trades_df, new_trade_df], ignore_index=True)
+                # Actualización O(1) de las métricas, sin concatenar todo el DataFrame
+                get_journal().append(new_trade)
+                journal_store.add_trade(new_trade)
                 
                 st.success("✅ Trade agregado exitosamente!")
                 time.sleep(1)
@@ -138,37 +823,33 @@ with tab2:
             else:
                 st.warning("⚠️ Por favor complete los campos requeridos (Symbol, Size, Price)")
 
+# Memoria de los trades de la sesión, medida una vez por DataFrame
+trades_df = st.session_state.trades_df
+if st.session_state.get('memory_token') != st.session_state.data_key:
+    st.session_state.memory_usage = ingest.memory_usage(trades_df)
+    st.session_state.memory_token = st.session_state.data_key
+if not trades_df.empty:
+    current_bytes, original_bytes = st.session_state.memory_usage
+    st.sidebar.caption(f"🧮 Memoria de los trades: {current_bytes / 2**20:,.1f} MB "
+                       f"(sin compactar: {original_bytes / 2**20:,.1f} MB)")
+
 # Análisis principal
-if not st.session_state.trades_df.empty:
-    df = st.session_state.trades_df.copy()
-    
-    # Preparar datos
-    if 'Duration (hours)' not in df.columns:
-        df['Duration (hours)'] = (pd.to_datetime(df['Close Time']) - pd.to_datetime(df['Open Time'])).dt.total_seconds() / 3600
-    
-    if 'Result' not in df.columns:
-        df['Result'] = df['Profit (USD)'].apply(lambda x: 'Win' if x > 0 else 'Loss')
-    
-    df['Close Time'] = pd.to_datetime(df['Close Time'])
-    df_sorted = df.sort_values('Close Time')
-    df_sorted['Cumulative_Profit'] = df_sorted['Profit (USD)'].cumsum()
-    df_sorted['Trade_Number'] = range(1, len(df_sorted) + 1)
-    
-    # Calcular métricas clave
-    total_trades = len(df)
-    winning_trades = len(df[df['Result'] == 'Win'])
-    losing_trades = len(df[df['Result'] == 'Loss'])
-    win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
-    
-    total_profit = df['Profit (USD)'].sum()
-    avg_win = df[df['Result'] == 'Win']['Profit (USD)'].mean() if winning_trades > 0 else 0
-    avg_loss = df[df['Result'] == 'Loss']['Profit (USD)'].mean() if losing_trades > 0 else 0
-    profit_factor = abs(avg_win * winning_trades / (avg_loss * losing_trades)) if losing_trades > 0 and avg_loss != 0 else 0
-    
-    # Calcular drawdown
-    running_max = df_sorted['Cumulative_Profit'].expanding().max()
-    drawdown = df_sorted['Cumulative_Profit'] - running_max
-    max_drawdown = drawdown.min()
+prof.section("metrics")
+journal = get_journal()
+prof.rows(journal.total_trades)
+if journal.total_trades:
+    
+    # Las métricas se mantienen de forma incremental entre reruns
+    metrics = journal.metrics()
+    total_trades = metrics.total_trades
+    winning_trades = metrics.winning_trades
+    losing_trades = metrics.losing_trades
+    win_rate = metrics.win_rate
+    total_profit = metrics.total_profit
+    avg_win = metrics.avg_win
+    avg_loss = metrics.avg_loss
+    profit_factor = metrics.profit_factor
+    max_drawdown = metrics.max_drawdown
     
     # Dashboard de métricas principales
     st.markdown("---")
@@ -228,244 +909,27 @@ if not st.session_state.trades_df.empty:
     
     st.markdown("---")
     
-    # Gráfico de evolución del capital (mejorado)
-    st.subheader("📈 Evolución del Capital")
-    
-    fig_capital = go.Figure()
-    
-    # Línea principal del capital
-    fig_capital.add_trace(go.Scatter(
-        x=df_sorted['Close Time'],
-        y=df_sorted['Cumulative_Profit'],
-        mode='lines',
-        name='Capital Acumulado',
-        line=dict(color='#3b82f6', width=3),
-        fill='tonexty',
-        fillcolor='rgba(59, 130, 246, 0.1)'
-    ))
-    
-    # Línea de drawdown
-    fig_capital.add_trace(go.Scatter(
-        x=df_sorted['Close Time'],
-        y=running_max,
-        mode='lines',
-        name='Máximo Histórico',
-        line=dict(color='#10b981', width=2, dash='dash'),
-        opacity=0.7
-    ))
-    
-    fig_capital.update_layout(
-        title="Evolución del Capital y Drawdown",
-        xaxis_title="Fecha",
-        yaxis_title="Profit Acumulado ($)",
-        height=500,
-        showlegend=True,
-        hovermode='x unified',
-        template='plotly_white'
-    )
-    
-    st.plotly_chart(fig_capital, use_container_width=True)
-    
-    # Gráfico de distribución de ganancias/pérdidas
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.subheader("📊 Distribución de Resultados")
-        
-        # Histograma de profits
-        fig_dist = px.histogram(
-            df, 
-            x='Profit (USD)', 
-            nbins=30,
-            title="Distribución de Ganancias/Pérdidas",
-            color_discrete_sequence=['#3b82f6']
-        )
-        
-        fig_dist.add_vline(x=0, line_dash="dash", line_color="red", annotation_text="Breakeven")
-        fig_dist.update_layout(
-            xaxis_title="Profit ($)",
-            yaxis_title="Frecuencia",
-            height=400,
-            template='plotly_white'
-        )
-        
-        st.plotly_chart(fig_dist, use_container_width=True)
-    
-    with col2:
-        st.subheader("🎯 Win/Loss Ratio")
-        
-        # Pie chart de win/loss
-        win_loss_counts = df['Result'].value_counts()
-        colors = ['#10b981' if x == 'Win' else '#ef4444' for x in win_loss_counts.index]
-        
-        fig_pie = px.pie(
-            values=win_loss_counts.values,
-            names=win_loss_counts.index,
-            title="Proporción de Trades Ganadores vs Perdedores",
-            color_discrete_sequence=colors
-        )
-        
-        fig_pie.update_layout(height=400)
-        st.plotly_chart(fig_pie, use_container_width=True)
-    
-    # Análisis por símbolo
-    st.subheader("📈 Análisis por Símbolo")
-    
-    symbol_analysis = df.groupby('Symbol').agg({
-        'Profit (USD)': ['sum', 'mean', 'count'],
-        'Result': lambda x: (x == 'Win').mean()
-    }).reset_index()
-    
-    symbol_analysis.columns = ['Symbol', 'Total_Profit', 'Avg_Profit', 'Total_Trades', 'Win_Rate']
-    symbol_analysis = symbol_analysis.sort_values('Total_Profit', ascending=False)
-    
-    fig_symbol = px.bar(
-        symbol_analysis.head(10),
-        x='Symbol',
-        y='Total_Profit',
-        title="Top 10 Símbolos por Profit Total",
-        color='Total_Profit',
-        color_continuous_scale='RdYlGn'
-    )
-    
-    fig_symbol.update_layout(
-        xaxis_title="Símbolo",
-        yaxis_title="Profit Total ($)",
-        height=400,
-        template='plotly_white'
-    )
-    
-    st.plotly_chart(fig_symbol, use_container_width=True)
-    
-    # Análisis por día de la semana (mejorado)
-    st.subheader("📅 Rendimiento por Día de la Semana")
-    
-    df['Day_of_Week'] = df['Close Time'].dt.dayofweek
-    days = {0:'Lunes', 1:'Martes', 2:'Miércoles', 3:'Jueves', 4:'Viernes', 5:'Sábado', 6:'Domingo'}
-    df['Day_Name'] = df['Day_of_Week'].map(days)
-    
-    day_analysis = df.groupby('Day_Name').agg({
-        'Profit (USD)': ['sum', 'mean', 'count'],
-        'Result': lambda x: (x == 'Win').mean()
-    }).reset_index()
-    
-    day_analysis.columns = ['Día', 'Profit_Total', 'Profit_Promedio', 'Cantidad_Trades', 'Win_Rate']
-    day_analysis['Día'] = pd.Categorical(day_analysis['Día'], categories=days.values(), ordered=True)
-    day_analysis = day_analysis.sort_values('Día')
-    
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        fig_day_profit = px.bar(
-            day_analysis,
-            x='Día',
-            y='Profit_Total',
-            title="Profit Total por Día de la Semana",
-            color='Profit_Total',
-            color_continuous_scale='RdYlGn'
-        )
-        fig_day_profit.update_layout(height=400, template='plotly_white')
-        st.plotly_chart(fig_day_profit, use_container_width=True)
-    
-    with col2:
-        fig_day_winrate = px.bar(
-            day_analysis,
-            x='Día',
-            y='Win_Rate',
-            title="Win Rate por Día de la Semana",
-            color='Win_Rate',
-            color_continuous_scale='Blues'
-        )
-        fig_day_winrate.update_layout(height=400, template='plotly_white')
-        st.plotly_chart(fig_day_winrate, use_container_width=True)
-    
-    # Análisis mensual (mejorado)
-    st.subheader("📅 Análisis Mensual")
-    
-    df['Month-Year'] = df['Close Time'].dt.to_period('M').astype(str)
-    monthly_results = df.groupby('Month-Year').agg({
-        'Profit (USD)': ['sum', 'mean', 'count'],
-        'Result': lambda x: (x == 'Win').mean()
-    }).reset_index()
-    
-    monthly_results.columns = ['Mes', 'Total_Profit', 'Avg_Profit', 'Total_Trades', 'Win_Rate']
-    
-    fig_monthly = go.Figure()
-    
-    # Agregar barras con colores condicionales
-    colors = ['#10b981' if x > 0 else '#ef4444' for x in monthly_results['Total_Profit']]
-    
-    fig_monthly.add_trace(go.Bar(
-        x=monthly_results['Mes'],
-        y=monthly_results['Total_Profit'],
-        name='Profit Mensual',
-        marker_color=colors,
-        text=monthly_results['Total_Profit'].round(2),
-        textposition='auto'
-    ))
-    
-    fig_monthly.update_layout(
-        title="Profit Mensual",
-        xaxis_title="Mes",
-        yaxis_title="Profit ($)",
-        height=400,
-        template='plotly_white'
-    )
-    
-    st.plotly_chart(fig_monthly, use_container_width=True)
-    
-    # Tabla de resumen mensual
-    st.subheader("📋 Resumen Mensual Detallado")
-    
-    # Formatear los datos para mejor visualización
-    monthly_display = monthly_results.copy()
-    monthly_display['Total_Profit'] = monthly_display['Total_Profit'].apply(lambda x: f"${x:,.2f}")
-    monthly_display['Avg_Profit'] = monthly_display['Avg_Profit'].apply(lambda x: f"${x:,.2f}")
-    monthly_display['Win_Rate'] = monthly_display['Win_Rate'].apply(lambda x: f"{x:.1%}")
-    
-    st.dataframe(
-        monthly_display,
-        column_config={
-            "Mes": "Mes",
-            "Total_Profit": "Profit Total",
-            "Avg_Profit": "Profit Promedio",
-            "Total_Trades": "Total Trades",
-            "Win_Rate": "Win Rate"
-        },
-        hide_index=True,
-        use_container_width=True
-    )
-    
-    # Estadísticas adicionales
-    st.subheader("📊 Estadísticas Adicionales")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric("📏 Duración Promedio", f"{df['Duration (hours)'].mean():.2f} horas")
-        st.metric("⏱️ Duración Máxima", f"{df['Duration (hours)'].max():.2f} horas")
-    
-    with col2:
-        best_trade = df.loc[df['Profit (USD)'].idxmax()]
-        st.metric("🏆 Mejor Trade", f"${best_trade['Profit (USD)']:,.2f}")
-        st.caption(f"Símbolo: {best_trade['Symbol']}")
-    
-    with col3:
-        worst_trade = df.loc[df['Profit (USD)'].idxmin()]
-        st.metric("📉 Peor Trade", f"${worst_trade['Profit (USD)']:,.2f}")
-        st.caption(f"Símbolo: {worst_trade['Symbol']}")
+    # Secciones de análisis: cada una es un fragmento con su expander; las
+    # plegadas no se calculan y las abiertas reutilizan sus figuras mientras
+    # no cambien los datos (`data_token`: contenido de origen más trades añadidos) ni sus parámetros
+    data_token = (st.session_state.data_key, journal.total_trades)
+    capital_section(journal, metrics, data_token)
+    if 'first_chart_ms' in st.session_state:
+        st.sidebar.caption(f"⏱️ Primer gráfico: {st.session_state.first_chart_ms:,.0f} ms "
+                           f"(arranque en {st.session_state.first_chart_mode})")
+    rolling_section(journal, metrics, data_token)
+    distribution_section(journal, metrics, data_token)
+    symbol_section(metrics, data_token)
+    weekday_section(metrics, data_token)
+    monthly_section(metrics, data_token)
+    stats_section(metrics)
+    drawdown_section(journal, data_token)
+    simulation_section(journal, data_token)
     
     # Botón de descarga
-    st.sidebar.markdown("---")
-    st.sidebar.subheader("📥 Descargar Datos")
-    
-    csv_data = df.to_csv(index=False).encode('utf-8')
-    st.sidebar.download_button(
-        label="📄 Descargar CSV",
-        data=csv_data,
-        file_name=f'trading_analysis_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv',
-        mime='text/csv'
-    )
+    prof.section("export", rows=total_trades)
+    with st.sidebar:
+        export_panel(journal)
 
 else:
     st.info("🚀 Por favor suba un archivo CSV o ingrese trades manualmente para comenzar el análisis.")
@@ -475,11 +939,13 @@ else:
     
     features = [
         "📈 Evolución del capital en tiempo real",
+        "🔄 Métricas móviles por últimos N trades o T días",
         "📊 Distribución de ganancias y pérdidas",
         "🎯 Win Rate y métricas de rendimiento",
         "📅 Análisis por día de la semana",
         "📆 Resultados mensuales detallados",
-        "📉 Cálculo de drawdown máximo",
+        "📉 Episodios de drawdown, recuperación y curvas underwater",
+        "🎲 Simulación Monte Carlo: bandas de percentiles y riesgo de ruina",
         "🏆 Identificación de mejores y peores trades",
         "📋 Análisis por símbolo/instrumento",
         "⚡ Profit Factor y ratios de riesgo"
@@ -487,3 +953,29 @@ else:
     
     for feature in features:
         st.markdown(f"• {feature}")
+
+# Panel de perfilado con el rerun que acaba de terminar
+prof.finish()
+if prof.enabled:
+    with st.sidebar.expander("🔬 Perfilado del último rerun", expanded=True):
+        run = prof.last_run()
+        if run:
+            sections = pd.DataFrame(run['sections'])
+            st.caption(f"Total: {run['total_ms']:,.0f} ms · tracemalloc activo (agrega overhead)")
+            st.dataframe(
+                sections,
+                column_config={
+                    "section": "Sección",
+                    "ms": st.column_config.NumberColumn("ms", format="%.1f"),
+                    "peak_mb": st.column_config.NumberColumn("Pico MB", format="%.2f"),
+                    "rows": st.column_config.NumberColumn("Filas", format="%d")
+                },
+                hide_index=True,
+                use_container_width=True
+            )
+        st.download_button(
+            label="💾 Exportar traza JSON",
+            data=prof.to_json(),
+            file_name=f'profiling_{datetime.now().strftime("%Y%m%d_%H%M%S")}.json',
+            mime='application/json'
+        )
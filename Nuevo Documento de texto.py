@@ -1,5 +1,6 @@
 import pandas as pd
 from datetime import datetime
+import timeparse
 from openpyxl.styles import PatternFill
 from openpyxl.utils import get_column_letter
 from openpyxl import Workbook
@@ -7,9 +8,9 @@ from openpyxl import Workbook
 # Load the original CSV data
 df = pd.read_csv('trades.csv')
 
-# Convert date columns to datetime
-df['Open Time'] = pd.to_datetime(df['Open Time'], dayfirst=True, errors='coerce')
-df['Close Time'] = pd.to_datetime(df['Close Time'], dayfirst=True, errors='coerce')
+# Convert date columns to datetime (same detected format as the dashboards; day-first when ambiguous)
+df['Open Time'] = timeparse.to_datetime(df['Open Time'])
+df['Close Time'] = timeparse.to_datetime(df['Close Time'])
 
 # Filter out Break Even trades (Profit = 0)
 df = df[df['Profit (USD)'] != 0]
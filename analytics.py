@@ -0,0 +1,375 @@
+"""Motor de métricas de trading compartido por `App.py` y `claude.py`.
+
+Calcula todo el conjunto de métricas de un DataFrame de trades (formato del
+CSV del broker) con unas pocas pasadas vectorizadas de NumPy: una ordenación
+por fecha para la curva de capital y `np.bincount` sobre códigos enteros para
+los agregados por símbolo, día de la semana y mes (en `parallel`, que reparte
+los datasets grandes entre procesos). No depende de Streamlit.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import ingest
+import parallel
+import timeparse
+
+WEEKDAYS = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+
+
+@dataclass(frozen=True)
+class TradeMetrics:
+    """Resultado de `compute_metrics`; los importes están en USD"""
+    total_trades: int
+    winning_trades: int
+    losing_trades: int
+    win_rate: float            # en %
+    total_profit: float
+    avg_win: float
+    avg_loss: float
+    profit_factor: float
+    max_drawdown: float
+    avg_duration: float        # en horas; None si ningún trade tiene duración
+    max_duration: float
+    best_trade: pd.Series
+    worst_trade: pd.Series
+    # Close Time, Cumulative_Profit, Running_Max, Drawdown, Trade_Number (orden cronológico)
+    equity: pd.DataFrame
+    # Cantidad de trades por resultado, de mayor a menor como `value_counts`
+    result_counts: pd.Series
+    # Symbol, Total_Profit, Avg_Profit, Total_Trades, Winning_Trades, Win_Rate (de mayor a menor profit)
+    by_symbol: pd.DataFrame
+    # Día, Profit_Total, Profit_Promedio, Cantidad_Trades, Trades_Ganadores, Win_Rate (de lunes a domingo)
+    by_weekday: pd.DataFrame
+    # Mes, Total_Profit, Avg_Profit, Total_Trades, Winning_Trades, Win_Rate (cronológico)
+    by_month: pd.DataFrame
+
+
+def _groups(df, close_time, profit):
+    """Agregados por símbolo, día de la semana y mes con `parallel.group_aggregates`.
+
+    Devuelve {grupo: (claves, total, cantidad, ganadores)} sólo con los grupos
+    que tienen trades; las claves de día son 0-6 (lunes = 0) y las de mes 'AAAA-MM'.
+    """
+    if 'Symbol' in df.columns:
+        codes, symbols = pd.factorize(df['Symbol'])
+    else:
+        codes, symbols = np.full(len(profit), -1), []
+    close_us = close_time.to_numpy(dtype='datetime64[us]').view('int64')
+    groups, first_month = parallel.group_aggregates(close_us, profit, codes, len(symbols))
+    months = first_month + np.arange(len(groups['month'][0]))
+    labels = {
+        'symbol': np.asarray(symbols, dtype=object),
+        'weekday': np.arange(7),
+        'month': np.array([f"{m // 12 + 1970:04d}-{m % 12 + 1:02d}" for m in months], dtype=object)
+    }
+    result = {}
+    for group, (total, count, won) in groups.items():
+        present = count > 0
+        result[group] = labels[group][present], total[present], count[present], won[present]
+    return result
+
+
+def _durations(df, close_time):
+    if 'Duration (hours)' in df.columns:
+        return pd.to_numeric(df['Duration (hours)']).to_numpy(dtype='float64')
+    open_time = timeparse.to_datetime(df['Open Time'])
+    return (close_time - open_time).dt.total_seconds().to_numpy(dtype='float64') / 3600
+
+
+def compute_metrics(df):
+    """Calcula el conjunto completo de métricas de `df`.
+
+    Requiere `Profit (USD)` y `Close Time`; usa `Duration (hours)` si existe
+    (si no, la deriva de `Open Time`) y `Symbol` para los agregados por
+    símbolo. Un trade es ganador cuando su profit es positivo.
+    """
+    profit = df['Profit (USD)'].to_numpy(dtype='float64')
+    close_time = timeparse.to_datetime(df['Close Time'])
+    wins = profit > 0
+    n = len(profit)
+
+    winning = int(wins.sum())
+    losing = n - winning
+    gross_win = profit[wins].sum()
+    gross_loss = profit[~wins].sum()
+    avg_win = gross_win / winning if winning else 0
+    avg_loss = gross_loss / losing if losing else 0
+    profit_factor = abs(gross_win / gross_loss) if losing and gross_loss != 0 else 0
+
+    # Curva de capital en orden cronológico
+    order = np.argsort(close_time.to_numpy(), kind='stable')
+    cumulative = np.cumsum(profit[order])
+    running_max = np.maximum.accumulate(cumulative) if n else cumulative
+    drawdown = cumulative - running_max
+    equity = pd.DataFrame({
+        'Close Time': close_time.to_numpy()[order],
+        'Cumulative_Profit': cumulative,
+        'Running_Max': running_max,
+        'Drawdown': drawdown,
+        'Trade_Number': np.arange(1, n + 1)
+    })
+
+    result_counts = pd.Series({'Win': winning, 'Loss': losing}, name='count')
+    result_counts = result_counts[result_counts > 0].sort_values(ascending=False, kind='stable')
+
+    groups = _groups(df, close_time, profit)
+
+    # Por símbolo
+    if 'Symbol' in df.columns:
+        symbols, total, count, won = groups['symbol']
+        by_symbol = pd.DataFrame({
+            'Symbol': symbols, 'Total_Profit': total, 'Avg_Profit': total / count,
+            'Total_Trades': count, 'Winning_Trades': won, 'Win_Rate': won / count
+        }).sort_values('Total_Profit', ascending=False, kind='stable', ignore_index=True)
+    else:
+        by_symbol = pd.DataFrame(columns=['Symbol', 'Total_Profit', 'Avg_Profit', 'Total_Trades', 'Winning_Trades',
+                                          'Win_Rate'])
+
+    # Por día de la semana (los NaT quedan fuera)
+    days, total, count, won = groups['weekday']
+    by_weekday = pd.DataFrame({
+        'Día': pd.Categorical(np.array(WEEKDAYS)[days], categories=WEEKDAYS, ordered=True),
+        'Profit_Total': total, 'Profit_Promedio': total / count, 'Cantidad_Trades': count, 'Trades_Ganadores': won,
+        'Win_Rate': won / count
+    })
+
+    # Por mes, en orden cronológico
+    months, total, count, won = groups['month']
+    by_month = pd.DataFrame({
+        'Mes': months, 'Total_Profit': total, 'Avg_Profit': total / count, 'Total_Trades': count,
+        'Winning_Trades': won, 'Win_Rate': won / count
+    })
+
+    durations = _durations(df, close_time)
+    durations = durations[~np.isnan(durations)]
+    return TradeMetrics(
+        total_trades=n,
+        winning_trades=winning,
+        losing_trades=losing,
+        win_rate=winning / n * 100 if n else 0,
+        total_profit=profit.sum(),
+        avg_win=avg_win,
+        avg_loss=avg_loss,
+        profit_factor=profit_factor,
+        max_drawdown=drawdown.min() if n else 0,
+        avg_duration=durations.mean() if len(durations) else None,
+        max_duration=durations.max() if len(durations) else None,
+        best_trade=df.iloc[int(np.argmax(profit))] if n else None,
+        worst_trade=df.iloc[int(np.argmin(profit))] if n else None,
+        equity=equity,
+        result_counts=result_counts,
+        by_symbol=by_symbol,
+        by_weekday=by_weekday,
+        by_month=by_month
+    )
+
+
+class IncrementalMetrics:
+    """Métricas que se actualizan en O(1) al añadir un trade.
+
+    Se construye con el DataFrame completo (una reconstrucción vectorizada) y
+    `append` actualiza contadores, sumas, máximo acumulado, drawdown y los
+    grupos por símbolo, día y mes sin recorrer los trades anteriores. Los
+    trades añadidos se guardan en una lista y sólo se concatenan al pedir
+    `frame()`. Un trade con fecha anterior al último obliga a reconstruir.
+    """
+
+    def __init__(self, df):
+        # DataFrame de origen: si cambia, el llamador debe crear otro acumulador
+        self.source = df
+        self._rebuild(df)
+
+    def _rebuild(self, df):
+        self._base = df
+        self._pending = []
+        self._frame = df
+        n = len(df)
+        self.total_trades = n
+
+        if n == 0:
+            profit = np.empty(0)
+            close_time = pd.Series([], dtype='datetime64[us]')
+        else:
+            profit = df['Profit (USD)'].to_numpy(dtype='float64')
+            close_time = timeparse.to_datetime(df['Close Time'])
+        wins = profit > 0
+
+        self.winning_trades = int(wins.sum())
+        self.gross_win = float(profit[wins].sum())
+        self.gross_loss = float(profit[~wins].sum())
+
+        # Buffers con capacidad doble para que `append` sea O(1) amortizado
+        order = np.argsort(close_time.to_numpy(), kind='stable')
+        capacity = max(16, 2 * n)
+        self._close_time = np.empty(capacity, dtype='datetime64[us]')
+        self._profit = np.empty(capacity)
+        self._cumulative = np.empty(capacity)
+        self._running_max = np.empty(capacity)
+        self._close_time[:n] = close_time.to_numpy().astype('datetime64[us]')[order]
+        self._profit[:n] = profit[order]
+        np.cumsum(self._profit[:n], out=self._cumulative[:n])
+        if n:
+            np.maximum.accumulate(self._cumulative[:n], out=self._running_max[:n])
+        drawdown = self._cumulative[:n] - self._running_max[:n]
+        self.max_drawdown = float(drawdown.min()) if n else 0.0
+        valid_times = self._close_time[:n][~np.isnat(self._close_time[:n])]
+        self._last_close = valid_times.max() if len(valid_times) else None
+
+        durations = _durations(df, close_time) if n else np.empty(0)
+        finite = durations[~np.isnan(durations)]
+        self._duration_sum = float(finite.sum())
+        self._duration_count = len(finite)
+        self._duration_max = float(finite.max()) if len(finite) else np.nan
+
+        self.best_trade = df.iloc[int(np.argmax(profit))] if n else None
+        self.worst_trade = df.iloc[int(np.argmin(profit))] if n else None
+
+        # Grupos: {clave: [profit total, cantidad, ganadores]}
+        groups = _groups(df, close_time, profit)
+        self._by_symbol, self._by_weekday, self._by_month = (
+            {key: [total, count, won] for key, total, count, won in zip(*(values.tolist() for values in groups[group]))}
+            for group in ('symbol', 'weekday', 'month')
+        )
+
+    @staticmethod
+    def _add(buckets, key, profit, win):
+        bucket = buckets.get(key)
+        if bucket is None:
+            buckets[key] = [profit, 1, int(win)]
+        else:
+            bucket[0] += profit
+            bucket[1] += 1
+            bucket[2] += int(win)
+
+    def _grow(self):
+        capacity = 2 * len(self._profit)
+        for name in ('_close_time', '_profit', '_cumulative', '_running_max'):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def append(self, trade):
+        """Añade un trade (dict con las columnas del CSV).
+
+        Devuelve True si se actualizó de forma incremental y False si el trade
+        tenía fecha anterior al último y hubo que reconstruir todo.
+        """
+        close_time = pd.Timestamp(trade['Close Time'])
+        profit = float(trade['Profit (USD)'])
+        win = profit > 0
+        # Fechas ya parseadas para que `frame()` no mezcle texto con datetime64
+        trade = dict(trade, **{'Close Time': close_time})
+        if 'Open Time' in trade:
+            trade['Open Time'] = pd.Timestamp(trade['Open Time'])
+        if 'Duration (hours)' not in trade:
+            trade['Duration (hours)'] = (close_time - pd.Timestamp(trade['Open Time'])).total_seconds() / 3600
+        trade['Result'] = 'Win' if win else 'Loss'
+        self._pending.append(trade)
+        self._frame = None
+
+        if self._last_close is not None and close_time.to_datetime64() < self._last_close:
+            self._rebuild(self.frame())
+            return False
+
+        n = self.total_trades
+        if n == len(self._profit):
+            self._grow()
+        self._close_time[n] = close_time.to_datetime64()
+        self._profit[n] = profit
+        self._cumulative[n] = (self._cumulative[n - 1] if n else 0.0) + profit
+        self._running_max[n] = max(self._running_max[n - 1], self._cumulative[n]) if n else self._cumulative[n]
+        self.max_drawdown = min(self.max_drawdown, self._cumulative[n] - self._running_max[n])
+        self._last_close = self._close_time[n]
+        self.total_trades = n + 1
+
+        if win:
+            self.winning_trades += 1
+            self.gross_win += profit
+        else:
+            self.gross_loss += profit
+
+        duration = trade['Duration (hours)']
+        if not np.isnan(duration):
+            self._duration_sum += duration
+            self._duration_count += 1
+            self._duration_max = duration if np.isnan(self._duration_max) else max(self._duration_max, duration)
+
+        if self.best_trade is None or profit > self.best_trade['Profit (USD)']:
+            self.best_trade = pd.Series(trade)
+        if self.worst_trade is None or profit < self.worst_trade['Profit (USD)']:
+            self.worst_trade = pd.Series(trade)
+
+        if trade.get('Symbol') is not None:
+            self._add(self._by_symbol, trade['Symbol'], profit, win)
+        self._add(self._by_weekday, close_time.dayofweek, profit, win)
+        self._add(self._by_month, close_time.strftime('%Y-%m'), profit, win)
+        return True
+
+    def frame(self):
+        """DataFrame con todos los trades; los añadidos se concatenan (y compactan) una sola vez"""
+        if self._frame is None:
+            self._base = ingest.compact_trades(
+                pd.concat([self._base, pd.DataFrame(self._pending)], ignore_index=True)
+                if len(self._base) else pd.DataFrame(self._pending))
+            self._pending = []
+            self._frame = self._base
+        return self._frame
+
+    def profits(self):
+        """Profit de cada trade en orden cronológico (vista, sin copia)"""
+        return self._profit[:self.total_trades]
+
+    @staticmethod
+    def _table(buckets, columns, keys=None):
+        keys = list(buckets) if keys is None else [k for k in keys if k in buckets]
+        values = np.array([buckets[k] for k in keys], dtype='float64').reshape(-1, 3)
+        total, count, won = values[:, 0], values[:, 1].astype('int64'), values[:, 2].astype('int64')
+        return pd.DataFrame({columns[0]: keys, columns[1]: total, columns[2]: total / np.maximum(count, 1),
+                             columns[3]: count, columns[4]: won, columns[5]: won / np.maximum(count, 1)})
+
+    def metrics(self):
+        """Devuelve el estado actual como `TradeMetrics`, igual que `compute_metrics`"""
+        n = self.total_trades
+        losing = n - self.winning_trades
+        result_counts = pd.Series({'Win': self.winning_trades, 'Loss': losing}, name='count')
+        result_counts = result_counts[result_counts > 0].sort_values(ascending=False, kind='stable')
+
+        by_weekday = self._table(self._by_weekday, ['Día', 'Profit_Total', 'Profit_Promedio', 'Cantidad_Trades',
+                                                    'Trades_Ganadores', 'Win_Rate'],
+                                 keys=range(7))
+        by_weekday['Día'] = pd.Categorical(np.array(WEEKDAYS)[by_weekday['Día'].to_numpy(dtype='int64')],
+                                          categories=WEEKDAYS, ordered=True)
+
+        return TradeMetrics(
+            total_trades=n,
+            winning_trades=self.winning_trades,
+            losing_trades=losing,
+            win_rate=self.winning_trades / n * 100 if n else 0,
+            total_profit=float(self._cumulative[n - 1]) if n else 0.0,
+            avg_win=self.gross_win / self.winning_trades if self.winning_trades else 0,
+            avg_loss=self.gross_loss / losing if losing else 0,
+            profit_factor=abs(self.gross_win / self.gross_loss) if losing and self.gross_loss != 0 else 0,
+            max_drawdown=self.max_drawdown,
+            avg_duration=self._duration_sum / self._duration_count if self._duration_count else None,
+            max_duration=self._duration_max if self._duration_count else None,
+            best_trade=self.best_trade,
+            worst_trade=self.worst_trade,
+            equity=pd.DataFrame({
+                'Close Time': self._close_time[:n],
+                'Cumulative_Profit': self._cumulative[:n],
+                'Running_Max': self._running_max[:n],
+                'Drawdown': self._cumulative[:n] - self._running_max[:n],
+                'Trade_Number': np.arange(1, n + 1)
+            }),
+            result_counts=result_counts,
+            by_symbol=self._table(self._by_symbol, ['Symbol', 'Total_Profit', 'Avg_Profit', 'Total_Trades',
+                                                    'Winning_Trades', 'Win_Rate'])
+                .sort_values('Total_Profit', ascending=False, kind='stable', ignore_index=True),
+            by_weekday=by_weekday,
+            by_month=self._table(self._by_month, ['Mes', 'Total_Profit', 'Avg_Profit', 'Total_Trades', 'Winning_Trades',
+                                                  'Win_Rate'],
+                                 keys=sorted(self._by_month))
+        )
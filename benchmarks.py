@@ -0,0 +1,565 @@
+"""Benchmarks del Trading Journal.
+
+Uso:
+    python benchmarks.py bulk-insert --rows 5000
+    python benchmarks.py storage --rows 1000000 10000000
+    python benchmarks.py ingest --rows 2000000
+    python benchmarks.py startup --rows 100000
+    python benchmarks.py rerun --rows 200000
+    python benchmarks.py parallel --rows 500000 2000000 5000000
+    python benchmarks.py pipeline --rows 10000 100000 1000000 --output resultados.json
+    python benchmarks.py pipeline --rows 10000 100000 --baseline resultados.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import runpy
+import subprocess
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+import analytics
+import charts
+import database
+import drawdown
+import ingest
+import journal_store
+import parallel
+
+# Script de exportación a Excel que mide la etapa `excel_export`
+EXCEL_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Nuevo Documento de texto.py")
+# Filas de datos que caben en una hoja de Excel (1.048.576 con la cabecera)
+EXCEL_MAX_ROWS = 1_048_575
+# Claves de los expanders de las secciones de App.py que se abren en `bench_rerun`
+RERUN_SECTIONS = ['section_capital', 'section_rolling', 'section_distribution', 'section_symbol', 'section_weekday',
+                  'section_monthly', 'section_stats', 'section_drawdown', 'section_simulation']
+# Etapas de `bench_pipeline`, en orden
+PIPELINE_STAGES = ['parse', 'derive', 'metrics', 'groupbys', 'drawdown', 'figures',
+                   'db_save', 'db_load', 'excel_export']
+
+
+def generate_db_trades(n, seed=42):
+    """Genera `n` trades sintéticos con el esquema de la tabla `trades`"""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2020-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 5 * 365 * 86400, n)), unit="s")
+    return pd.DataFrame({
+        'date': dates.strftime('%Y-%m-%d %H:%M:%S'),
+        'symbol': rng.choice(['AAPL', 'MSFT', 'EURUSD', 'BTCUSD', 'ES'], n),
+        'side': rng.choice(['BUY', 'SELL'], n),
+        'quantity': rng.integers(1, 100, n).astype(float),
+        'price': rng.uniform(10, 500, n).round(4),
+        'commission': rng.uniform(0, 2, n).round(2),
+        'pnl': rng.normal(5, 100, n).round(2),
+        'strategy': rng.choice(['breakout', 'mean-reversion', 'trend'], n),
+        'notes': ""
+    })
+
+
+def generate_broker_csv(path, rows, seed=42, chunk_rows=500_000):
+    """Escribe en `path` un CSV sintético con el formato del export del broker"""
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp("2020-01-01")
+    for offset in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - offset)
+        open_time = start + pd.to_timedelta(np.sort(rng.integers(0, 5 * 365 * 86400, n)), unit="s")
+        close_time = open_time + pd.to_timedelta(rng.integers(60, 3 * 86400, n), unit="s")
+        side = rng.choice(['BUY', 'SELL'], n)
+        price = rng.uniform(10, 500, n).round(4)
+        # Take Profit / Stop Loss del lado correcto del precio; ~20% de trades sin ellos
+        direction = np.where(side == 'BUY', 1, -1)
+        take_profit = (price * (1 + direction * rng.uniform(0.005, 0.05, n))).round(4)
+        stop_loss = (price * (1 - direction * rng.uniform(0.005, 0.03, n))).round(4)
+        without = rng.random(n) < 0.2
+        take_profit[without] = np.nan
+        stop_loss[without] = np.nan
+        pd.DataFrame({
+            'Order ID': np.arange(offset, offset + n),
+            'Market': rng.choice(['STOCK', 'FOREX', 'CRYPTO', 'FUTURES'], n),
+            'Portfolio': rng.choice(['Main', 'Swing', 'Scalping'], n),
+            'Symbol': rng.choice(['AAPL', 'MSFT', 'EURUSD', 'BTCUSD', 'ES'], n),
+            'Side': side,
+            'Open Time': open_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'Size': rng.integers(1, 100, n),
+            'Open Price': price,
+            'Commission': rng.uniform(0, 2, n).round(2),
+            'Fees': 0.0,
+            'Profit (USD)': np.where(rng.random(n) < 0.05, 0.0, rng.normal(5, 100, n).round(2)),
+            'Close Time': close_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'Take Profit': take_profit,
+            'Stop Loss': stop_loss
+        }).to_csv(path, mode='w' if offset == 0 else 'a', header=offset == 0, index=False)
+
+
+def _fresh_database(directory, name):
+    """Apunta `database` a un fichero nuevo dentro de `directory`"""
+    database.close_connections()
+    database.DB_NAME = os.path.join(directory, name)
+    database.init_database()
+
+
+def bench_bulk_insert(rows, chunk_size=5000):
+    """Compara `add_trades_bulk` con llamadas repetidas a `add_single_trade`"""
+    trades = generate_db_trades(rows)
+    results = {}
+    original_db = database.DB_NAME
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            _fresh_database(directory, "single.db")
+            start = time.perf_counter()
+            for trade in trades.itertuples(index=False):
+                database.add_single_trade(trade.date, trade.symbol, trade.side, trade.quantity, trade.price,
+                                          trade.commission, trade.pnl, trade.strategy, trade.notes)
+            results['add_single_trade'] = time.perf_counter() - start
+
+            _fresh_database(directory, "bulk.db")
+            start = time.perf_counter()
+            database.add_trades_bulk(trades, chunk_size=chunk_size)
+            results['add_trades_bulk'] = time.perf_counter() - start
+        finally:
+            database.close_connections()
+            database.DB_NAME = original_db
+
+    for name, seconds in results.items():
+        print(f"{name:>18}: {seconds:8.3f} s  ({rows / seconds:,.0f} trades/s)")
+    print(f"{'speedup':>18}: {results['add_single_trade'] / results['add_trades_bulk']:8.1f}x")
+    return results
+
+
+def bench_storage(rows, chunk_rows=1_000_000):
+    """Compara el backend SQLite con el Parquet particionado: escritura y lecturas analíticas"""
+    results = {}
+    original = (database.DB_NAME, database.STORAGE_BACKEND, database.PARQUET_ROOT)
+
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            _fresh_database(directory, "storage.db")
+            database.set_storage_backend("parquet", os.path.join(directory, "parquet"))
+
+            for backend in ("sqlite", "parquet"):
+                database.set_storage_backend(backend)
+                timings = results[backend] = {}
+
+                start = time.perf_counter()
+                for offset in range(0, rows, chunk_rows):
+                    chunk = generate_db_trades(min(chunk_rows, rows - offset), seed=offset)
+                    database.add_trades_bulk(chunk, chunk_size=50_000)
+                timings['write'] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                df = database.load_trades_from_db(columns=['date', 'pnl'])
+                df['pnl'].sum()
+                df.sort_values('date')['pnl'].cumsum()
+                timings['analytics_read'] = time.perf_counter() - start
+                del df
+
+                start = time.perf_counter()
+                database.load_trades_from_db()
+                timings['full_read'] = time.perf_counter() - start
+        finally:
+            database.close_connections()
+            database.DB_NAME, database.STORAGE_BACKEND, database.PARQUET_ROOT = original
+
+    print(f"{rows:,} trades")
+    for stage in ('write', 'analytics_read', 'full_read'):
+        sqlite_s, parquet_s = results['sqlite'][stage], results['parquet'][stage]
+        print(f"{stage:>16}: sqlite {sqlite_s:8.2f} s | parquet {parquet_s:8.2f} s | {sqlite_s / parquet_s:6.1f}x")
+    return results
+
+
+def _current_rss_kb():
+    """RSS actual en KB (Linux); en otros sistemas se aproxima con el pico"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _measure_ingest(path, chunksize):
+    """Ingesta `path` en un proceso limpio y devuelve (segundos, pico de RSS añadido en MB, filas, MB en memoria)"""
+    baseline = _current_rss_kb()
+    start = time.perf_counter()
+    if chunksize:
+        df = ingest.read_csv_chunked(path, chunksize)
+    else:
+        df = ingest.prepare_trades(pd.read_csv(path))
+    seconds = time.perf_counter() - start
+    # ru_maxrss está en KB en Linux
+    peak = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline) / 1024
+    return seconds, peak, len(df), df.memory_usage(deep=True).sum() / 2**20
+
+
+def bench_ingest(rows, chunksize=ingest.DEFAULT_CHUNKSIZE):
+    """Compara el pico de memoria de la lectura completa con la lectura por bloques"""
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "broker.csv")
+        generate_broker_csv(path, rows)
+        print(f"{rows:,} filas, {os.path.getsize(path) / 2**20:,.0f} MB de CSV")
+
+        # Cada modo en un proceso nuevo para que el pico de RSS no se contamine
+        context = multiprocessing.get_context("spawn")
+        for name, size in (("read_csv", None), ("chunked", chunksize)):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                results[name] = pool.submit(_measure_ingest, path, size).result()
+
+    for name, (seconds, peak, count, resident) in results.items():
+        print(f"{name:>10}: {seconds:7.2f} s | pico +{peak:8.1f} MB | DataFrame {resident:8.1f} MB | {count:,} trades")
+    print(f"{'ahorro':>10}: {results['read_csv'][1] / results['chunked'][1]:7.1f}x menos pico de memoria")
+    return results
+
+
+def bench_startup(rows):
+    """Tiempo hasta el primer gráfico de App.py: arranque en frío (CSV) frente a en caliente (journal)"""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "App.py")
+    cwd = os.getcwd()
+    results = {}
+
+    def first_chart_ms(trades=None, key=None):
+        at = AppTest.from_file(app, default_timeout=600)
+        if trades is not None:
+            # Como el uploader: el DataFrame y el hash del CSV del que sale
+            at.session_state['trades_df'] = trades
+            at.session_state['data_key'] = ('csv', key)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return at.session_state['first_chart_ms']
+
+    with tempfile.TemporaryDirectory() as directory:
+        # App.py usa el journal del directorio de trabajo
+        os.chdir(directory)
+        try:
+            database.close_connections()
+            path = os.path.join(directory, "broker.csv")
+            generate_broker_csv(path, rows)
+            with open(path, 'rb') as f:
+                data = f.read()
+
+            # Frío: parsear y preparar el CSV subido + primer render
+            st.cache_resource.clear()
+            ingest.clear_cache()
+            start = time.perf_counter()
+            key, trades = ingest.ingest_csv(data)
+            parse_ms = (time.perf_counter() - start) * 1000
+            results['frío'] = parse_ms + first_chart_ms(trades, key)
+
+            journal_store.init_journal()
+            journal_store.save_trades(trades)
+
+            # Caliente: sesión nueva que lee el journal (la primera sin caché, la segunda compartida)
+            st.cache_resource.clear()
+            results['caliente'] = first_chart_ms()
+            results['caliente (caché)'] = first_chart_ms()
+        finally:
+            database.close_connections()
+            os.chdir(cwd)
+
+    print(f"{rows:,} filas en el CSV")
+    for name, ms in results.items():
+        print(f"{name:>18}: {ms:9.1f} ms hasta el primer gráfico")
+    return results
+
+
+def bench_rerun(rows, repeat=5):
+    """Latencia del rerun de App.py tras cambiar un widget de la barra lateral.
+
+    Se mide con las secciones en su estado inicial y con todas las secciones
+    plegables abiertas (`RERUN_SECTIONS`, las claves de sus expanders).
+    """
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    app = os.path.join(os.path.dirname(os.path.abspath(__file__)), "App.py")
+    cwd = os.getcwd()
+    results = {}
+
+    def sidebar_reruns(trades, key, opened):
+        at = AppTest.from_file(app, default_timeout=600)
+        at.session_state['trades_df'] = trades
+        at.session_state['data_key'] = ('csv', key)
+        at.run()
+        timings = []
+        for i in range(repeat):
+            # Alterna el formato de descarga: AppTest siempre vuelve a ejecutar el
+            # script completo, así que se mide un rerun completo sin cambiar los datos.
+            # AppTest no conserva el estado de los expanders entre runs: se vuelve a fijar
+            at.sidebar.selectbox(key="export_format").select_index(i % 2 + 1)
+            for key in opened:
+                at.session_state[key] = True
+            start = time.perf_counter()
+            at.run()
+            timings.append((time.perf_counter() - start) * 1000)
+            if at.exception:
+                raise RuntimeError(at.exception[0].message)
+        return float(np.median(timings))
+
+    with tempfile.TemporaryDirectory() as directory:
+        # App.py usa el journal del directorio de trabajo
+        os.chdir(directory)
+        try:
+            database.close_connections()
+            path = os.path.join(directory, "broker.csv")
+            generate_broker_csv(path, rows)
+            with open(path, 'rb') as f:
+                key, trades = ingest.ingest_csv(f.read())
+            st.cache_resource.clear()
+            results['inicial'] = sidebar_reruns(trades, key, [])
+            results['todas abiertas'] = sidebar_reruns(trades, key, RERUN_SECTIONS)
+        finally:
+            database.close_connections()
+            os.chdir(cwd)
+
+    print(f"{rows:,} trades, mediana de {repeat} reruns tras un cambio en la barra lateral")
+    for name, ms in results.items():
+        print(f"{name:>18}: {ms:9.1f} ms")
+    return results
+
+
+def bench_parallel(rows_list, repeat=3):
+    """Agregados por grupo en serie vs en el pool de `parallel`; informa el punto de cruce"""
+    results = {}
+    rng = np.random.default_rng(42)
+    # El arranque de los procesos se paga una sola vez por sesión: no entra en la medición
+    parallel.group_aggregates(np.zeros(2, dtype='int64'), np.ones(2), np.zeros(2, dtype='int64'), 1, parallel=True)
+
+    for rows in rows_list:
+        start_us = pd.Timestamp("2020-01-01").value // 1000
+        close_us = start_us + np.sort(rng.integers(0, 5 * 365 * 86400, rows)) * 1_000_000
+        profit = rng.normal(5, 100, rows)
+        codes = rng.integers(0, 50, rows)
+
+        timings = results[rows] = {}
+        for name, mode in (("serie", False), ("paralelo", True)):
+            best = float("inf")
+            for _ in range(repeat):
+                start = time.perf_counter()
+                parallel.group_aggregates(close_us, profit, codes, 50, parallel=mode)
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best
+
+    workers = parallel.MAX_WORKERS or os.cpu_count() or 1
+    print(f"{workers} procesos, {os.cpu_count()} núcleos")
+    for rows, timings in results.items():
+        print(f"{rows:>12,} filas: serie {timings['serie'] * 1000:8.1f} ms | "
+              f"paralelo {timings['paralelo'] * 1000:8.1f} ms | {timings['serie'] / timings['paralelo']:5.2f}x")
+    crossover = next((rows for rows, timings in results.items() if timings['paralelo'] < timings['serie']), None)
+    if crossover is None:
+        print("El pool no compensa en ninguno de los tamaños medidos")
+    else:
+        print(f"Cruce: a partir de ~{crossover:,} filas (PARALLEL_MIN_ROWS = {parallel.PARALLEL_MIN_ROWS:,})")
+    parallel.shutdown()
+    return results
+
+
+def _build_figures(metrics, profits, max_points=charts.DEFAULT_MAX_POINTS):
+    """Construye y serializa los gráficos principales de App.py como lo hace `st.plotly_chart`"""
+    equity, reduced = charts.downsample_equity(metrics.equity, max_points)
+    scatter = go.Scattergl if reduced else go.Scatter
+    fig_capital = go.Figure([
+        scatter(x=equity['Close Time'], y=equity['Cumulative_Profit'], mode='lines', name='Capital Acumulado'),
+        scatter(x=equity['Close Time'], y=equity['Running_Max'], mode='lines', name='Máximo Histórico')
+    ])
+    figures = [
+        fig_capital,
+        charts.histogram_figure({'Profit': profits}, nbins=30),
+        px.pie(values=metrics.result_counts.values, names=metrics.result_counts.index),
+        px.bar(metrics.by_symbol.head(10), x='Symbol', y='Total_Profit'),
+        px.bar(metrics.by_weekday, x='Día', y='Profit_Total'),
+        go.Figure(go.Bar(x=metrics.by_month['Mes'], y=metrics.by_month['Total_Profit']))
+    ]
+    return sum(len(fig.to_json()) for fig in figures)
+
+
+def _run_excel_script(directory):
+    """Ejecuta el script de exportación a Excel en `directory` (lee `trades.csv` de ahí)"""
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            runpy.run_path(EXCEL_SCRIPT, run_name="__main__")
+    finally:
+        os.chdir(cwd)
+
+
+def _environment():
+    """Versión del código y del entorno, para comparar resultados entre ejecuciones"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def _pipeline_run(rows, directory, seed, excel):
+    """Mide cada etapa del pipeline del dashboard sobre un CSV sintético de `rows` filas"""
+    timings = {}
+
+    def timed(stage, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        timings[stage] = time.perf_counter() - start
+        return result
+
+    # El script de Excel lee `trades.csv` del directorio de trabajo
+    path = os.path.join(directory, "trades.csv")
+    generate_broker_csv(path, rows, seed=seed)
+
+    raw = timed('parse', pd.read_csv, path)
+    df = timed('derive', ingest.prepare_trades, raw)
+    del raw
+    metrics = timed('metrics', analytics.compute_metrics, df)
+
+    close_us = df['Close Time'].to_numpy(dtype='datetime64[us]').view('int64')
+    codes, symbols = pd.factorize(df['Symbol'])
+    profit = df['Profit (USD)'].to_numpy(dtype='float64')
+    timed('groupbys', parallel.group_aggregates, close_us, profit, codes, len(symbols))
+
+    drawdown.clear_cache()
+    timed('drawdown', drawdown.analyze, df, f"bench:{rows}")
+    timed('figures', _build_figures, metrics, profit)
+
+    _fresh_database(directory, f"pipeline_{rows}.db")
+    journal_store.init_journal()
+    timed('db_save', journal_store.save_trades, df)
+    timed('db_load', journal_store.load_trades)
+    database.close_connections()
+
+    # El script de Excel no puede escribir más filas que las de una hoja
+    if excel and rows <= EXCEL_MAX_ROWS:
+        timed('excel_export', _run_excel_script, directory)
+    else:
+        timings['excel_export'] = None
+
+    timings['trades'] = len(df)
+    return timings
+
+
+def _print_pipeline(results, baseline=None):
+    sizes = list(results)
+    print(f"{'etapa':>14}" + "".join(f"{rows:>22,}" for rows in sizes))
+    for stage in PIPELINE_STAGES:
+        cells = []
+        for rows in sizes:
+            seconds = results[rows].get(stage)
+            cell = "-" if seconds is None else f"{seconds:.3f} s"
+            previous = (baseline or {}).get(str(rows), {}).get(stage)
+            if seconds is not None and previous:
+                cell += f" ({seconds / previous:.2f}x)"
+            cells.append(f"{cell:>22}")
+        print(f"{stage:>14}" + "".join(cells))
+    if baseline is not None:
+        print("(entre paréntesis: tiempo relativo a la línea base; > 1 es más lento)")
+
+
+def bench_pipeline(rows_list, output=None, baseline=None, seed=42, excel=True):
+    """Tiempo de cada etapa del pipeline del dashboard para cada tamaño de `rows_list`.
+
+    Etapas: lectura del CSV, derivación (`ingest.prepare_trades`), métricas,
+    agregados por grupo, drawdown, construcción de gráficos, guardado y
+    lectura del journal y el script de exportación a Excel. Los resultados
+    se escriben como JSON en `output`; con `baseline` (un JSON anterior) se
+    muestra la relación con esa ejecución.
+    """
+    original = database.DB_NAME
+    results = {}
+    try:
+        for rows in rows_list:
+            with tempfile.TemporaryDirectory() as directory:
+                results[rows] = _pipeline_run(rows, directory, seed, excel)
+    finally:
+        database.close_connections()
+        database.DB_NAME = original
+
+    previous = None
+    if baseline:
+        with open(baseline) as f:
+            previous = json.load(f)['results']
+    _print_pipeline(results, previous)
+
+    report = {'environment': _environment(), 'seed': seed, 'stages': PIPELINE_STAGES,
+              'results': {str(rows): timings for rows, timings in results.items()}}
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Resultados en {output}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks del Trading Journal")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    bulk = subparsers.add_parser("bulk-insert", help="add_trades_bulk vs add_single_trade")
+    bulk.add_argument("--rows", type=int, default=5000)
+    bulk.add_argument("--chunk-size", type=int, default=5000)
+
+    storage = subparsers.add_parser("storage", help="backend SQLite vs Parquet particionado")
+    storage.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+
+    ingest_parser = subparsers.add_parser("ingest", help="pico de memoria: lectura completa vs por bloques")
+    ingest_parser.add_argument("--rows", type=int, default=2_000_000)
+    ingest_parser.add_argument("--chunksize", type=int, default=ingest.DEFAULT_CHUNKSIZE)
+
+    startup = subparsers.add_parser("startup", help="tiempo hasta el primer gráfico: CSV vs journal")
+    startup.add_argument("--rows", type=int, default=100_000)
+
+    rerun = subparsers.add_parser("rerun", help="latencia del rerun tras un cambio en la barra lateral")
+    rerun.add_argument("--rows", type=int, default=200_000)
+    rerun.add_argument("--repeat", type=int, default=5)
+
+    parallel_parser = subparsers.add_parser("parallel", help="agregados por grupo: serie vs pool de procesos")
+    parallel_parser.add_argument("--rows", type=int, nargs="+", default=[500_000, 2_000_000, 5_000_000])
+    parallel_parser.add_argument("--repeat", type=int, default=3)
+
+    pipeline = subparsers.add_parser("pipeline", help="tiempo por etapa del pipeline completo, en JSON")
+    pipeline.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    pipeline.add_argument("--seed", type=int, default=42)
+    pipeline.add_argument("--output", help="archivo JSON donde guardar los resultados")
+    pipeline.add_argument("--baseline", help="JSON de una ejecución anterior para comparar")
+    pipeline.add_argument("--no-excel", action="store_true", help="omite el script de exportación a Excel")
+
+    args = parser.parse_args()
+    if args.command == "bulk-insert":
+        bench_bulk_insert(args.rows, args.chunk_size)
+    elif args.command == "storage":
+        for rows in args.rows:
+            bench_storage(rows)
+    elif args.command == "ingest":
+        bench_ingest(args.rows, args.chunksize)
+    elif args.command == "startup":
+        bench_startup(args.rows)
+    elif args.command == "rerun":
+        bench_rerun(args.rows, args.repeat)
+    elif args.command == "parallel":
+        bench_parallel(sorted(args.rows), args.repeat)
+    elif args.command == "pipeline":
+        bench_pipeline(args.rows, args.output, args.baseline, args.seed, not args.no_excel)
+
+
+if __name__ == "__main__":
+    main()
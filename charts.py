@@ -0,0 +1,93 @@
+"""Preparación de datos para los gráficos de los dashboards.
+
+Con cientos de miles de trades no tiene sentido mandar cada punto al
+navegador: la curva de capital se reduce con LTTB (Largest-Triangle-Three-
+Buckets), que conserva la forma, y los histogramas se agrupan en el servidor
+con NumPy para enviar sólo los conteos por bin.
+"""
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+# Puntos por traza a partir de los que se reduce la serie y se usa WebGL
+DEFAULT_MAX_POINTS = 2000
+
+
+def lttb(x, y, threshold):
+    """Índices de los `threshold` puntos que LTTB elige de la serie (x, y).
+
+    `x` debe estar ordenado. Se conservan siempre el primer y el último punto.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold) * every).astype('int64') + 1
+    edges[-1] = n - 1
+
+    indices = np.empty(threshold, dtype='int64')
+    indices[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Promedio del bucket siguiente (el último punto para el último bucket)
+        next_end = edges[i + 2] if i + 2 < threshold - 1 else n
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        indices[i + 1] = a
+    indices[-1] = n - 1
+    return indices
+
+
+def downsample_equity(equity, max_points=DEFAULT_MAX_POINTS, window=None):
+    """Reduce la curva de capital de `analytics` a como mucho ~`max_points` puntos.
+
+    `window` es un par (inicio, fin) de fechas para volver a muestrear sólo el
+    tramo ampliado con toda la resolución disponible. Además de los puntos de
+    LTTB se conservan el máximo, el mínimo y el valle del drawdown máximo con
+    el pico que lo precede. Los trades sin fecha de cierre (NaT) no tienen
+    sitio en el eje de tiempo y se descartan. Devuelve `(equity_reducida, reducida)`.
+    """
+    if equity['Close Time'].isna().any():
+        equity = equity[equity['Close Time'].notna()]
+    if window is not None:
+        times = equity['Close Time'].to_numpy()
+        start = np.searchsorted(times, pd.Timestamp(window[0]).to_datetime64(), 'left')
+        end = np.searchsorted(times, pd.Timestamp(window[1]).to_datetime64(), 'right')
+        equity = equity.iloc[start:end]
+
+    if len(equity) <= max_points:
+        return equity, False
+
+    x = equity['Close Time'].to_numpy().astype('datetime64[us]').astype('int64')
+    cumulative = equity['Cumulative_Profit'].to_numpy()
+    drawdown = equity['Drawdown'].to_numpy()
+    trough = int(np.argmin(drawdown))
+    peak = int(np.argmax(cumulative[:trough + 1]))
+    keep = np.union1d(lttb(x, cumulative, max_points),
+                      [trough, peak, int(np.argmin(cumulative)), int(np.argmax(cumulative))])
+    return equity.iloc[keep], True
+
+
+def histogram_figure(groups, nbins=30, colors=None):
+    """Histograma ya agrupado: `groups` es {nombre: valores}; todos comparten los bins.
+
+    Se envían `nbins` barras por grupo en lugar de los valores crudos.
+    """
+    values = [np.asarray(v, dtype='float64') for v in groups.values()]
+    finite = np.concatenate([v[np.isfinite(v)] for v in values]) if values else np.empty(0)
+    edges = np.histogram_bin_edges(finite, bins=nbins) if len(finite) else np.linspace(0, 1, nbins + 1)
+    centers = (edges[:-1] + edges[1:]) / 2
+
+    fig = go.Figure()
+    for (name, group), color in zip(zip(groups, values), colors or [None] * len(values)):
+        counts, _ = np.histogram(group[np.isfinite(group)], bins=edges)
+        fig.add_trace(go.Bar(x=centers, y=counts, width=np.diff(edges), name=name, marker_color=color,
+                             hovertemplate="%{x:,.2f}: %{y}<extra></extra>"))
+    fig.update_layout(barmode='stack', bargap=0, showlegend=len(values) > 1)
+    return fig
@@ -4,6 +4,9 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import time
+import ingest
+import analytics
+import charts
 
 # Configuración de la página
 st.set_page_config(
@@ -54,42 +57,23 @@ with tab1:
     
     if archivo:
         try:
-            df = pd.read_csv(archivo)
-            
-            # Verificación de columnas obligatorias
-            required_columns = ['Profit (USD)', 'Close Time', 'Open Time']
-            if not all(col in df.columns for col in required_columns):
-                missing = [col for col in required_columns if col not in df.columns]
-                st.error(f"❌ Faltan columnas obligatorias: {', '.join(missing)}")
+            # Verificación de columnas y procesamiento, memorizados por contenido
+            try:
+                _, df = ingest.ingest_csv(archivo)
+            except ValueError as e:
+                st.error(f"❌ {e}")
             else:
-                # Procesamiento de datos
-                df = df[df['Profit (USD)'] != 0]
-                df['Duration (hours)'] = (pd.to_datetime(df['Close Time']) - pd.to_datetime(df['Open Time'])).dt.total_seconds() / 3600
-                df['Result'] = df['Profit (USD)'].apply(lambda x: 'Win' if x > 0 else 'Loss')
-                
-                if 'Order ID' in df.columns:
-                    df = df.drop(columns=['Order ID'])
-                
                 st.session_state.trades_df = df
                 st.success("✅ Datos cargados correctamente!")
                 
                 # Análisis mes a mes
                 st.subheader("📅 Análisis Mes a Mes")
                 
-                # Preparar datos para análisis mensual
-                df['Close Time'] = pd.to_datetime(df['Close Time'])
-                df['Month'] = df['Close Time'].dt.to_period('M')
-                
-                # Agrupar por mes
-                monthly_analysis = df.groupby('Month').agg({
-                    'Profit (USD)': ['sum', 'count'],
-                    'Result': lambda x: (x == 'Win').sum()
-                }).round(2)
-                
-                # Aplanar columnas
-                monthly_analysis.columns = ['Total_Profit', 'Total_Trades', 'Winning_Trades']
+                # Agrupar por mes con el motor de analytics
+                monthly_analysis = analytics.compute_metrics(df).by_month.set_index('Mes')
+                monthly_analysis['Total_Profit'] = monthly_analysis['Total_Profit'].round(2)
                 monthly_analysis['Losing_Trades'] = monthly_analysis['Total_Trades'] - monthly_analysis['Winning_Trades']
-                monthly_analysis['Win_Rate'] = (monthly_analysis['Winning_Trades'] / monthly_analysis['Total_Trades'] * 100).round(1)
+                monthly_analysis['Win_Rate'] = (monthly_analysis['Win_Rate'] * 100).round(1)
                 
                 # Mostrar tabla con colores
                 for month in monthly_analysis.index:
@@ -135,15 +119,17 @@ with tab2:
         submitted = st.form_submit_button("➕ Agregar Trade")
         
         if submitted:
+            # Fecha ya como datetime para no mezclar texto con la columna parseada
+            trade_datetime = pd.Timestamp(datetime.combine(trade_date, trade_time))
             new_trade = {
                 'Market': market,
                 'Symbol': symbol.upper(),
                 'Side': action,
-                'Open Time': f"{trade_date} {trade_time}",
+                'Open Time': trade_datetime,
                 'Size': size,
                 'Open Price': price,
                 'Profit (USD)': profit,
-                'Close Time': f"{trade_date} {trade_time}",
+                'Close Time': trade_datetime,
                 'Result': 'Win' if profit > 0 else 'Loss'
             }
             
@@ -155,46 +141,38 @@ with tab2:
 
 # Análisis y gráficos
 if not st.session_state.trades_df.empty:
-    df = st.session_state.trades_df.copy()
+    # Copy-on-write: se lee el DataFrame de la sesión sin copiarlo en cada rerun
+    df = st.session_state.trades_df
     
     # Debug: Mostrar información de los datos
     st.sidebar.write("ℹ️ Datos cargados:", len(df), "trades")
     
-    # Preparar datos
-    df['Close Time'] = pd.to_datetime(df['Close Time'])
-    df['Open Time'] = pd.to_datetime(df['Open Time'])
-    df['Duration (hours)'] = (df['Close Time'] - df['Open Time']).dt.total_seconds() / 3600
-    df['Result'] = df['Profit (USD)'].apply(lambda x: 'Win' if x > 0 else 'Loss')
-    df_sorted = df.sort_values('Close Time')
-    df_sorted['Cumulative_Profit'] = df_sorted['Profit (USD)'].cumsum()
-    df_sorted['Trade_Number'] = range(1, len(df_sorted) + 1)
+    # Preparar datos: el motor de analytics calcula todas las métricas
+    metrics = analytics.compute_metrics(df)
     
     # Métricas clave
     st.markdown("---")
     st.subheader("📈 Métricas Principales")
     
-    total_trades = len(df)
-    winning_trades = len(df[df['Result'] == 'Win'])
-    losing_trades = len(df[df['Result'] == 'Loss'])
-    win_rate = (winning_trades / total_trades) * 100 if total_trades > 0 else 0
-    total_profit = df['Profit (USD)'].sum()
-    
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("💰 Profit Total", f"${total_profit:,.2f}")
-    col2.metric("🎯 Win Rate", f"{win_rate:.1f}%")
-    col3.metric("📊 Total Trades", f"{total_trades:,}")
-    col4.metric("✅ Trades Ganadores", f"{winning_trades:,}")
+    col1.metric("💰 Profit Total", f"${metrics.total_profit:,.2f}")
+    col2.metric("🎯 Win Rate", f"{metrics.win_rate:.1f}%")
+    col3.metric("📊 Total Trades", f"{metrics.total_trades:,}")
+    col4.metric("✅ Trades Ganadores", f"{metrics.winning_trades:,}")
     
     # Gráfico de evolución del capital
     st.markdown("---")
     st.subheader("📈 Evolución del Capital")
     
+    # Curva reducida con LTTB (y dibujada con WebGL) cuando hay muchos trades
+    equity, reduced = charts.downsample_equity(metrics.equity)
     fig_capital = px.line(
-        df_sorted,
+        equity,
         x='Close Time',
         y='Cumulative_Profit',
         title="Capital Acumulado",
-        labels={'Cumulative_Profit': 'Profit Acumulado ($)', 'Close Time': 'Fecha'}
+        labels={'Cumulative_Profit': 'Profit Acumulado ($)', 'Close Time': 'Fecha'},
+        render_mode='webgl' if reduced else 'svg'
     )
     st.plotly_chart(fig_capital, use_container_width=True)
     
@@ -203,22 +181,22 @@ if not st.session_state.trades_df.empty:
     col1, col2 = st.columns(2)
     
     with col1:
-        fig_dist = px.histogram(
-            df,
-            x='Profit (USD)',
+        # Bins calculados en el servidor: se envían conteos, no cada profit
+        profit = df['Profit (USD)'].to_numpy(dtype='float64')
+        fig_dist = charts.histogram_figure(
+            {'Win': profit[profit > 0], 'Loss': profit[profit <= 0]},
             nbins=20,
-            title="Distribución de Ganancias/Pérdidas",
-            color='Result',
-            color_discrete_map={'Win': '#10b981', 'Loss': '#ef4444'}
+            colors=['#10b981', '#ef4444']
         )
+        fig_dist.update_layout(title="Distribución de Ganancias/Pérdidas", xaxis_title="Profit (USD)")
         st.plotly_chart(fig_dist, use_container_width=True)
     
     with col2:
         fig_pie = px.pie(
-            df,
-            names='Result',
+            values=metrics.result_counts.values,
+            names=metrics.result_counts.index,
             title="Win/Loss Ratio",
-            color='Result',
+            color=metrics.result_counts.index,
             color_discrete_map={'Win': '#10b981', 'Loss': '#ef4444'}
         )
         st.plotly_chart(fig_pie, use_container_width=True)
@@ -226,7 +204,7 @@ if not st.session_state.trades_df.empty:
     # Gráfico por símbolo
     if 'Symbol' in df.columns:
         st.subheader("📈 Rendimiento por Símbolo")
-        symbol_profit = df.groupby('Symbol')['Profit (USD)'].sum().sort_values()
+        symbol_profit = metrics.by_symbol.set_index('Symbol')['Total_Profit'].iloc[::-1]
         fig_symbol = px.bar(
             symbol_profit,
             x=symbol_profit.values,
@@ -1,16 +1,154 @@
 import sqlite3
+import threading
+import weakref
+import gzip
+import itertools
+from contextlib import ExitStack, contextmanager
 import pandas as pd
-import streamlit as st
 from datetime import datetime
 import os
+import timeparse
 
 DB_NAME = "trading_journal.db"
 
+# Backend de almacenamiento de los trades: "sqlite" o "parquet" (ver `set_storage_backend`)
+STORAGE_BACKEND = "sqlite"
+PARQUET_ROOT = "trades_parquet"
+
+# Pragmas aplicados a cada conexión nueva (ver `configure_connections`)
+CONNECTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'busy_timeout': 5000,
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024
+}
+# Conexiones ociosas que se conservan por base de datos
+MAX_IDLE_CONNECTIONS = 8
+
+_local = threading.local()
+_pool_lock = threading.Lock()
+_idle_connections = {}
+_pool_generation = 0
+_connection_stats = {'opened': 0, 'reused': 0, 'released': 0}
+
+def _open_connection(path):
+    """Abre una conexión nueva y le aplica `CONNECTION_PRAGMAS`"""
+    conn = sqlite3.connect(path, timeout=CONNECTION_PRAGMAS['busy_timeout'] / 1000, check_same_thread=False)
+    for pragma, value in CONNECTION_PRAGMAS.items():
+        conn.execute(f"PRAGMA {pragma} = {value}")
+    return conn
+
+def _release_connection(path, conn, generation):
+    """Devuelve al pool la conexión de un hilo que terminó"""
+    with _pool_lock:
+        _connection_stats['released'] += 1
+        idle = _idle_connections.setdefault(path, [])
+        if generation == _pool_generation and len(idle) < MAX_IDLE_CONNECTIONS:
+            idle.append(conn)
+            return
+    conn.close()
+
+def get_connection():
+    """Devuelve la conexión del hilo actual a `DB_NAME`, reutilizándola entre llamadas.
+
+    Cada hilo conserva su conexión; cuando el hilo termina, la conexión vuelve
+    a un pool de ociosas para el siguiente hilo en lugar de cerrarse.
+    """
+    path = DB_NAME
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    entry = connections.get(path)
+    if entry is not None and entry[1] == _pool_generation:
+        with _pool_lock:
+            _connection_stats['reused'] += 1
+        return entry[0]
+
+    with _pool_lock:
+        generation = _pool_generation
+        idle = _idle_connections.get(path)
+        conn = idle.pop() if idle else None
+        _connection_stats['reused' if conn is not None else 'opened'] += 1
+    if conn is None:
+        conn = _open_connection(path)
+
+    connections[path] = (conn, generation)
+    weakref.finalize(threading.current_thread(), _release_connection, path, conn, generation)
+    return conn
+
+@contextmanager
+def _transaction(immediate=False):
+    """Ejecuta el bloque en una transacción sobre la conexión del hilo"""
+    conn = get_connection()
+    with conn:
+        if immediate:
+            conn.execute("BEGIN IMMEDIATE")
+        yield conn
+
+def configure_connections(**pragmas):
+    """Actualiza los pragmas de conexión (`synchronous`, `cache_size`, `mmap_size`, ...).
+
+    Las conexiones existentes se descartan para que todas usen la nueva
+    configuración.
+    """
+    unknown = set(pragmas) - set(CONNECTION_PRAGMAS)
+    if unknown:
+        raise ValueError(f"Pragmas no soportados: {', '.join(sorted(unknown))}")
+    CONNECTION_PRAGMAS.update(pragmas)
+    close_connections()
+
+def close_connections():
+    """Cierra las conexiones ociosas y las del hilo actual; las demás se renuevan al usarse"""
+    global _pool_generation
+    with _pool_lock:
+        _pool_generation += 1
+        idle = [conn for conns in _idle_connections.values() for conn in conns]
+        _idle_connections.clear()
+    for conn in idle:
+        conn.close()
+
+    for conn, _ in getattr(_local, 'connections', {}).values():
+        conn.close()
+    _local.connections = {}
+
+def get_connection_stats():
+    """Devuelve los contadores de conexiones abiertas, reutilizadas y liberadas"""
+    with _pool_lock:
+        stats = dict(_connection_stats)
+        stats['idle'] = sum(len(conns) for conns in _idle_connections.values())
+    return stats
+
+def set_storage_backend(backend, parquet_root=None):
+    """Selecciona dónde guardan y leen los trades las funciones de este módulo.
+
+    Con "parquet" los trades se guardan en ficheros Parquet particionados por
+    mes bajo `parquet_root` (ver `parquet_store`); `query_trades`,
+    `export_trades` y las tablas resumen siguen siendo exclusivas de SQLite.
+    """
+    global STORAGE_BACKEND, PARQUET_ROOT
+    if backend not in ("sqlite", "parquet"):
+        raise ValueError(f"Backend de almacenamiento desconocido: {backend}")
+    STORAGE_BACKEND = backend
+    if parquet_root is not None:
+        PARQUET_ROOT = parquet_root
+
+def _parquet_store():
+    """Devuelve el módulo `parquet_store` si el backend activo es Parquet"""
+    if STORAGE_BACKEND != "parquet":
+        return None
+    import parquet_store
+    return parquet_store
+
 def init_database():
-    """Inicializa la base de datos y crea las tablas necesarias"""
-    conn = sqlite3.connect(DB_NAME)
+    """Inicializa la base de datos y la lleva a la última versión del esquema"""
+    migrate_database()
+
+def _migration_base_schema(conn):
+    """v1: esquema original con fechas en texto"""
     cursor = conn.cursor()
-    
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS trades (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -34,98 +172,957 @@ def init_database():
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
+
+def _migration_epoch_schema(conn):
+    """v2: fechas como enteros en microsegundos desde epoch, apertura y cierre por
+    separado, y símbolos/estrategias en tablas de lookup.
+
+    Convierte los trades existentes en una sola pasada de SQL.
+    """
+    invalid = conn.execute("SELECT COUNT(*) FROM trades WHERE strftime('%s', date) IS NULL").fetchone()[0]
+    if invalid:
+        raise ValueError(f"{invalid} trades tienen una fecha que no se puede convertir; corrígelas antes de migrar")
+
+    statements = [
+        "CREATE TABLE symbols (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+        "CREATE TABLE strategies (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+        "INSERT INTO symbols (name) SELECT DISTINCT symbol FROM trades ORDER BY symbol",
+        "INSERT INTO strategies (name) SELECT DISTINCT strategy FROM trades WHERE strategy IS NOT NULL ORDER BY strategy",
+        '''
+        CREATE TABLE trades_v2 (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            open_time INTEGER,
+            close_time INTEGER NOT NULL,
+            symbol_id INTEGER NOT NULL REFERENCES symbols(id),
+            side TEXT NOT NULL,
+            quantity REAL NOT NULL,
+            price REAL NOT NULL,
+            commission REAL DEFAULT 0,
+            pnl REAL DEFAULT 0,
+            strategy_id INTEGER REFERENCES strategies(id),
+            notes TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        # Texto "YYYY-MM-DD HH:MM:SS[.fff]" -> microsegundos (precisión de milisegundos)
+        '''
+        INSERT INTO trades_v2 (id, open_time, close_time, symbol_id, side, quantity, price,
+                               commission, pnl, strategy_id, notes, created_at)
+        SELECT t.id, NULL,
+               CAST(strftime('%s', t.date) AS INTEGER) * 1000000
+                   + CAST(substr(strftime('%f', t.date), 4) AS INTEGER) * 1000,
+               s.id, t.side, t.quantity, t.price, t.commission, t.pnl, g.id, t.notes, t.created_at
+        FROM trades t
+        JOIN symbols s ON s.name = t.symbol
+        LEFT JOIN strategies g ON g.name = t.strategy
+        ''',
+        "DROP TABLE trades",
+        "ALTER TABLE trades_v2 RENAME TO trades",
+        "CREATE INDEX idx_trades_date ON trades(close_time)",
+        "CREATE INDEX idx_trades_symbol ON trades(symbol_id)",
+        "CREATE INDEX idx_trades_strategy ON trades(strategy_id)",
+        "CREATE INDEX idx_trades_symbol_date ON trades(symbol_id, close_time)"
+    ]
+    for statement in statements:
+        conn.execute(statement)
+
+def _migration_broker_columns(conn):
+    """v3: columnas del export del broker que no tenían sitio (mercado, fees, TP y SL)"""
+    for statement in [
+        "ALTER TABLE trades ADD COLUMN market TEXT",
+        "ALTER TABLE trades ADD COLUMN fees REAL DEFAULT 0",
+        "ALTER TABLE trades ADD COLUMN take_profit REAL",
+        "ALTER TABLE trades ADD COLUMN stop_loss REAL"
+    ]:
+        conn.execute(statement)
+
+# Migraciones en orden; el índice + 1 es la versión que dejan (PRAGMA user_version)
+MIGRATIONS = [_migration_base_schema, _migration_epoch_schema, _migration_broker_columns]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version():
+    """Devuelve la versión del esquema de la base de datos actual"""
+    return get_connection().execute("PRAGMA user_version").fetchone()[0]
+
+def migrate_database():
+    """Aplica en orden las migraciones pendientes, cada una en su propia transacción.
+
+    Las tablas resumen (`trade_stats` y agregados) se reconstruyen al final
+    porque sus triggers dependen de las columnas de `trades`.
+    """
+    conn = get_connection()
+    version = get_schema_version()
+    if version >= SCHEMA_VERSION:
+        return version
+
+    for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+        with _transaction(immediate=True):
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'trade_stats' in tables:
+        enable_stats_table()
+    if any(name.startswith('trade_rollup_') for name in tables):
+        enable_rollup_tables()
+
+    return SCHEMA_VERSION
+
+# Columnas lógicas de un trade y su columna en la tabla `trades`
+STORAGE_COLUMNS = {
+    'id': 'id',
+    'date': 'close_time',
+    'open_time': 'open_time',
+    'symbol': 'symbol_id',
+    'side': 'side',
+    'quantity': 'quantity',
+    'price': 'price',
+    'commission': 'commission',
+    'pnl': 'pnl',
+    'strategy': 'strategy_id',
+    'notes': 'notes',
+    'market': 'market',
+    'fees': 'fees',
+    'take_profit': 'take_profit',
+    'stop_loss': 'stop_loss',
+    'created_at': 'created_at'
+}
+# Columnas de lookup: columna lógica -> tabla con los nombres
+LOOKUP_TABLES = {'symbol': 'symbols', 'strategy': 'strategies'}
+TIMESTAMP_COLUMNS = ['date', 'open_time']
+# Columnas que se escriben al insertar (el id y created_at los asigna SQLite)
+INSERT_COLUMNS = ['date', 'open_time', 'symbol', 'side', 'quantity', 'price', 'commission', 'pnl', 'strategy', 'notes',
+                  'market', 'fees', 'take_profit', 'stop_loss']
+
+def _to_epoch_us(values):
+    """Convierte fechas (texto o datetime) a enteros en microsegundos desde epoch"""
+    try:
+        ts = pd.to_datetime(values)
+    except ValueError:
+        # Formatos mezclados (p.ej. con y sin milisegundos)
+        ts = pd.to_datetime(values, format='mixed')
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_convert('UTC').dt.tz_localize(None)
+    micros = ts.to_numpy(dtype='datetime64[us]').view('int64')
+    return pd.Series(micros, index=values.index, dtype='Int64').mask(ts.isna().to_numpy())
+
+def _timestamp_us(value):
+    """Versión escalar de `_to_epoch_us` para inserciones sueltas"""
+    if value is None or pd.isna(value):
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return ts.value // 1000
+
+def _lookup_id(conn, table, name):
+    """Devuelve el id de `name` en `table`, dándolo de alta si no existe"""
+    if name is None:
+        return None
+    conn.execute(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", (str(name),))
+    return conn.execute(f"SELECT id FROM {table} WHERE name = ?", (str(name),)).fetchone()[0]
+
+def _lookup_ids(conn, table, names):
+    """Devuelve {nombre: id} para `names`, dando de alta en `table` los que falten"""
+    names = pd.Series(names, dtype=object).dropna().unique()
+    conn.executemany(f"INSERT OR IGNORE INTO {table} (name) VALUES (?)", [(str(name),) for name in names])
+    return dict(conn.execute(f"SELECT name, id FROM {table}").fetchall())
+
+def _storage_rows(conn, df, with_id=False):
+    """Convierte un DataFrame con columnas lógicas en filas para `INSERT_COLUMNS`"""
+    columns = (['id'] if with_id else []) + INSERT_COLUMNS
+    out = pd.DataFrame(index=df.index)
+    for col in columns:
+        values = df[col] if col in df.columns else pd.Series(BULK_DEFAULTS.get(col), index=df.index)
+        if col in TIMESTAMP_COLUMNS:
+            values = _to_epoch_us(values)
+        elif col in LOOKUP_TABLES:
+            values = values.astype(object).map(_lookup_ids(conn, LOOKUP_TABLES[col], values))
+        out[col] = values
+    out = out.astype(object)
+    rows = list(out.where(out.notna(), None).itertuples(index=False, name=None))
+    return [STORAGE_COLUMNS[col] for col in columns], rows
+
+def _insert_trades(conn, df, with_id=False):
+    """Inserta las filas lógicas de `df` en `trades` con un único `executemany`"""
+    columns, rows = _storage_rows(conn, df, with_id=with_id)
+    conn.executemany(
+        f"INSERT INTO trades ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        rows
+    )
+    return len(rows)
+
+def _categorical_from_ids(conn, table, ids):
+    """Convierte ids de una tabla de lookup en un Categorical con sus nombres"""
+    lookup = pd.read_sql_query(f"SELECT id, name FROM {table} ORDER BY id", conn)
+    codes = pd.Index(lookup['id']).get_indexer(ids)
+    return pd.Categorical.from_codes(codes, categories=lookup['name']).remove_unused_categories()
+
+def _read_trades(conn, columns=None, where="", params=(), limit=None, chunksize=None):
+    """Lee trades y los devuelve con columnas lógicas ya tipadas.
+
+    Las fechas salen como datetime64 y símbolo/estrategia como categóricas,
+    sin parsear texto. Con `chunksize` devuelve un iterador de DataFrames.
+    """
+    columns = list(STORAGE_COLUMNS) if columns is None else list(columns)
+    selected = ", ".join(f"{STORAGE_COLUMNS[col]} AS {col}" if STORAGE_COLUMNS[col] != col else col
+                         for col in columns)
+    query = f"SELECT {selected} FROM trades {where} ORDER BY close_time DESC, id DESC"
+    if limit is not None:
+        query += f" LIMIT {int(limit)}"
+
+    def convert(raw):
+        for col in columns:
+            if col in TIMESTAMP_COLUMNS:
+                raw[col] = pd.to_datetime(raw[col], unit='us').astype('datetime64[us]')
+            elif col in LOOKUP_TABLES:
+                raw[col] = _categorical_from_ids(conn, LOOKUP_TABLES[col], raw[col])
+        return raw
+
+    if chunksize is not None:
+        return (convert(chunk) for chunk in pd.read_sql_query(query, conn, params=params, chunksize=chunksize))
+    return convert(pd.read_sql_query(query, conn, params=params))
+
+# Columnas que identifican un trade cuando el DataFrame no trae `id`
+TRADE_KEY_COLUMNS = ['date', 'symbol', 'side', 'quantity', 'price']
+# Columnas que se comparan para detectar trades modificados
+TRADE_VALUE_COLUMNS = ['open_time', 'commission', 'pnl', 'strategy', 'notes', 'market', 'fees', 'take_profit', 'stop_loss']
+
+def save_trades_to_db(df, mode="replace"):
+    """Guarda el DataFrame de trades en la base de datos.
+
+    `mode="replace"` borra la tabla y la reescribe completa;
+    `mode="incremental"` escribe sólo la diferencia (ver `save_trades_incremental`);
+    `mode="upsert"` añade y actualiza como el incremental pero nunca borra.
+    """
+    if mode == "incremental":
+        return save_trades_incremental(df)
+    if mode == "upsert":
+        return save_trades_incremental(df, delete_missing=False)
+    if mode != "replace":
+        raise ValueError(f"Modo de guardado desconocido: {mode}")
     
-    conn.commit()
-    conn.close()
+    store = _parquet_store()
+    if store:
+        store.replace_trades(df, PARQUET_ROOT)
+        return True
+    
+    with _transaction() as conn:
+        conn.execute("DELETE FROM trades")
+        _insert_trades(conn, df, with_id='id' in df.columns and df['id'].notna().all())
 
-def save_trades_to_db(df):
-    """Guarda el DataFrame de trades en la base de datos"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
+    return True
+
+def _with_occurrence(df):
+    """Añade un ordinal para distinguir trades con la misma clave natural"""
+    df = df.copy()
+    df['_occurrence'] = df.groupby(TRADE_KEY_COLUMNS, dropna=False).cumcount()
+    return df
+
+def _comparable(df):
+    """Normaliza tipos para poder comparar el estado guardado con un DataFrame nuevo"""
+    df = df.copy()
+    for col in TRADE_KEY_COLUMNS + TRADE_VALUE_COLUMNS:
+        if col not in df.columns:
+            # Los mismos valores que escribe `_storage_rows` para columnas ausentes
+            df[col] = BULK_DEFAULTS.get(col)
+        if col in TIMESTAMP_COLUMNS:
+            df[col] = pd.to_datetime(df[col]).astype('datetime64[us]')
+        elif isinstance(df[col].dtype, pd.CategoricalDtype) or pd.api.types.is_string_dtype(df[col]):
+            df[col] = df[col].astype(object)
+    return df
+
+def _diff_trades(existing, df):
+    """Compara el estado guardado con `df` y devuelve (nuevos, modificados, ids borrados).
+
+    La clave estable es `id` cuando el DataFrame la trae; las filas sin `id`
+    se emparejan con las filas guardadas restantes por `TRADE_KEY_COLUMNS`.
+    """
+    existing = _comparable(existing)
+    df = _comparable(df)
+    if 'id' not in df.columns:
+        df['id'] = pd.NA
     
-    cursor.execute("DELETE FROM trades")
-    df.to_sql('trades', conn, if_exists='append', index=False)
+    ids = pd.to_numeric(df['id'], errors='coerce')
+    with_id = df[ids.isin(existing['id'])].copy()
+    with_id['id'] = ids[with_id.index].astype('int64')
+    without_id = df[~ids.isin(existing['id'])].drop(columns=['id'])
     
-    conn.commit()
-    conn.close()
+    # Emparejar por clave natural contra las filas no reclamadas por id
+    unclaimed = existing[~existing['id'].isin(with_id['id'])]
+    matched = _with_occurrence(without_id).merge(
+        _with_occurrence(unclaimed)[TRADE_KEY_COLUMNS + ['_occurrence', 'id']],
+        on=TRADE_KEY_COLUMNS + ['_occurrence'],
+        how='left'
+    ).drop(columns=['_occurrence'])
     
-    return True
+    inserted = matched[matched['id'].isna()].drop(columns=['id'])
+    candidates = pd.concat([with_id, matched[matched['id'].notna()]], ignore_index=True)
+    candidates['id'] = candidates['id'].astype('int64')
+    
+    deleted_ids = existing.loc[~existing['id'].isin(candidates['id']), 'id']
+    
+    # Sólo se actualizan las filas cuyo contenido cambió
+    compare_cols = TRADE_KEY_COLUMNS + TRADE_VALUE_COLUMNS
+    before = existing.set_index('id').loc[candidates['id'], compare_cols]
+    after = candidates.set_index('id')[compare_cols]
+    same = (before == after) | (before.isna() & after.isna())
+    updated = candidates[~same.all(axis=1).to_numpy()]
+    
+    return inserted, updated, deleted_ids
+
+def save_trades_incremental(df, delete_missing=True):
+    """Sincroniza la tabla con `df` escribiendo sólo los trades nuevos, modificados o borrados.
+
+    Con `delete_missing=False` los trades guardados que no están en `df` se
+    conservan. Todo se aplica en una única transacción. Devuelve un
+    diccionario con el número de filas de cada categoría.
+    """
+    columns = TRADE_KEY_COLUMNS + TRADE_VALUE_COLUMNS
 
-def load_trades_from_db():
-    """Carga los trades desde la base de datos"""
+    store = _parquet_store()
+    if store:
+        existing = store.read_trades(PARQUET_ROOT, columns=['id'] + columns)
+        inserted, updated, deleted_ids = _diff_trades(existing, df)
+        if not delete_missing:
+            deleted_ids = deleted_ids.iloc[:0]
+        store.delete_trades(list(deleted_ids) + updated['id'].tolist(), PARQUET_ROOT)
+        store.append_trades(updated, PARQUET_ROOT, keep_ids=True)
+        store.append_trades(inserted, PARQUET_ROOT)
+        return {
+            'inserted': len(inserted),
+            'updated': len(updated),
+            'deleted': len(deleted_ids),
+            'unchanged': len(df) - len(inserted) - len(updated)
+        }
+
+    # IMMEDIATE bloquea la escritura antes de leer el estado a comparar
+    with _transaction(immediate=True) as conn:
+        existing = _read_trades(conn, columns=['id'] + columns)
+        inserted, updated, deleted_ids = _diff_trades(existing, df)
+        if not delete_missing:
+            deleted_ids = deleted_ids.iloc[:0]
+
+        conn.executemany(
+            "DELETE FROM trades WHERE id = ?",
+            [(int(trade_id),) for trade_id in deleted_ids]
+        )
+        storage_columns, rows = _storage_rows(conn, updated, with_id=True)
+        conn.executemany(
+            f"UPDATE trades SET {', '.join(f'{col} = ?' for col in storage_columns[1:])} WHERE id = ?",
+            [row[1:] + row[:1] for row in rows]
+        )
+        _insert_trades(conn, inserted)
+
+    return {
+        'inserted': len(inserted),
+        'updated': len(updated),
+        'deleted': len(deleted_ids),
+        'unchanged': len(df) - len(inserted) - len(updated)
+    }
+
+def load_trades_from_db(columns=None):
+    """Carga los trades desde la base de datos.
+
+    `columns` limita las columnas leídas; con el backend Parquet sólo se leen
+    esas columnas del disco.
+    """
+    store = _parquet_store()
+    if store:
+        read_columns = None if columns is None else list(dict.fromkeys([*columns, 'date', 'id']))
+        df = store.read_trades(PARQUET_ROOT, columns=read_columns)
+        df = df.sort_values(['date', 'id'], ascending=False, ignore_index=True)
+        for col in LOOKUP_TABLES:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        return df if columns is None else df[list(columns)]
+    
     if not os.path.exists(DB_NAME):
         return pd.DataFrame()
     
-    conn = sqlite3.connect(DB_NAME)
-    
     try:
-        df = pd.read_sql_query("SELECT * FROM trades ORDER BY date DESC", conn)
-        return df
+        return _read_trades(get_connection(), columns=columns)
     except pd.errors.DatabaseError:
         return pd.DataFrame()
-    finally:
-        conn.close()
 
-def add_single_trade(date, symbol, side, quantity, price, commission=0, pnl=0, strategy="", notes=""):
-    """Añade una operación individual a la base de datos"""
-    conn = sqlite3.connect(DB_NAME)
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        INSERT INTO trades (date, symbol, side, quantity, price, commission, pnl, strategy, notes)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    ''', (date, symbol, side, quantity, price, commission, pnl, strategy, notes))
-    
-    conn.commit()
-    conn.close()
+def get_data_version():
+    """Token que cambia con cada escritura en los trades, también desde otros procesos.
+
+    Se basa en la fecha de modificación y el tamaño de la base y de su WAL (o
+    de los directorios del backend Parquet), así que no hace falta consultar
+    la base para saber si una lectura cacheada sigue siendo válida.
+    """
+    if _parquet_store():
+        paths = [PARQUET_ROOT] + [entry.path for entry in os.scandir(PARQUET_ROOT)] if os.path.isdir(PARQUET_ROOT) else []
+    else:
+        paths = [DB_NAME, DB_NAME + "-wal"]
+    version = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+        version.append((path, stat.st_mtime_ns, stat.st_size))
+    return tuple(version)
+
+def _in_clause(template, values, conditions, params):
+    """Añade un filtro IN si se pasaron valores; `template` lleva `{}` en el lugar de la lista"""
+    if values is None:
+        return
+    if isinstance(values, str):
+        values = [values]
+    values = list(values)
+    conditions.append(template.format(', '.join('?' * len(values))) if values else "0")
+    params.extend(values)
+
+def query_trades(start_date=None, end_date=None, symbols=None, sides=None, strategies=None,
+                 columns=None, limit=500, cursor=None):
+    """Consulta trades filtrando en SQL y paginando por cursor (keyset).
+
+    Devuelve `(df, next_cursor)`, ordenado por fecha e id descendentes.
+    `start_date` es inclusivo y `end_date` exclusivo. Para la página siguiente
+    se pasa `next_cursor` (opaco), que es None cuando no quedan más filas.
+    """
+    if not os.path.exists(DB_NAME):
+        return pd.DataFrame(), None
+
+    conditions = []
+    params = []
+    if start_date is not None:
+        conditions.append("close_time >= ?")
+        params.append(int(_to_epoch_us(pd.Series([start_date])).iloc[0]))
+    if end_date is not None:
+        conditions.append("close_time < ?")
+        params.append(int(_to_epoch_us(pd.Series([end_date])).iloc[0]))
+    _in_clause("symbol_id IN (SELECT id FROM symbols WHERE name IN ({}))", symbols, conditions, params)
+    _in_clause("side IN ({})", sides, conditions, params)
+    _in_clause("strategy_id IN (SELECT id FROM strategies WHERE name IN ({}))", strategies, conditions, params)
+    if cursor is not None:
+        conditions.append("(close_time, id) < (?, ?)")
+        params.extend(cursor)
+
+    if columns is not None:
+        columns = list(dict.fromkeys(['id', 'date', *columns]))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    # Se pide una fila extra para saber si hay otra página
+    df = _read_trades(get_connection(), columns=columns, where=where, params=params, limit=limit + 1)
+    if len(df) <= limit:
+        return df, None
+
+    df = df.iloc[:limit]
+    last = df.iloc[-1]
+    return df, (int(_to_epoch_us(pd.Series([last['date']])).iloc[0]), int(last['id']))
+
+def add_single_trade(date, symbol, side, quantity, price, commission=0, pnl=0, strategy="", notes="",
+                     open_time=None, market=None, fees=0, take_profit=None, stop_loss=None):
+    """Añade una operación individual a la base de datos.
+
+    `date` es la fecha de cierre; `open_time` la de apertura, si se conoce.
+    """
+    store = _parquet_store()
+    if store:
+        store.append_trades(pd.DataFrame([{
+            'date': date, 'open_time': open_time, 'symbol': symbol, 'side': side, 'quantity': quantity,
+            'price': price, 'commission': commission, 'pnl': pnl, 'strategy': strategy, 'notes': notes,
+            'market': market, 'fees': fees, 'take_profit': take_profit, 'stop_loss': stop_loss
+        }]), PARQUET_ROOT)
+        return True
     
+    # Camino escalar: evita construir un DataFrame para una sola fila
+    with _transaction() as conn:
+        conn.execute('''
+            INSERT INTO trades (close_time, open_time, symbol_id, side, quantity, price,
+                                commission, pnl, strategy_id, notes, market, fees, take_profit, stop_loss)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (_timestamp_us(date), _timestamp_us(open_time), _lookup_id(conn, 'symbols', symbol), side,
+              quantity, price, commission, pnl, _lookup_id(conn, 'strategies', strategy), notes,
+              market, fees, take_profit, stop_loss))
+
     return True
 
+# Columnas que acepta `add_trades_bulk` y sus valores por defecto
+BULK_REQUIRED_COLUMNS = ['date', 'symbol', 'side', 'quantity', 'price']
+BULK_DEFAULTS = {'commission': 0, 'pnl': 0, 'fees': 0, 'strategy': "", 'notes': ""}
+BULK_OPTIONAL_COLUMNS = ['open_time', 'market', 'take_profit', 'stop_loss']
+
+def _validate_bulk_trades(trades):
+    """Valida y normaliza en bloque las filas a insertar; lanza ValueError si hay inválidas"""
+    df = trades.copy() if isinstance(trades, pd.DataFrame) else pd.DataFrame(list(trades))
+    if df.empty:
+        return df
+
+    missing = [col for col in BULK_REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+
+    for col, default in BULK_DEFAULTS.items():
+        df[col] = df[col].fillna(default) if col in df.columns else default
+    for col in BULK_OPTIONAL_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    for col in ['quantity', 'price', 'commission', 'pnl', 'fees', 'take_profit', 'stop_loss']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    # Formato detectado una vez por columna (los no reconocidos quedan NaT y se rechazan)
+    df['date'] = timeparse.to_datetime(df['date'])
+    df['open_time'] = timeparse.to_datetime(df['open_time'])
+
+    invalid = df[BULK_REQUIRED_COLUMNS + ['commission', 'pnl', 'fees']].isna().any(axis=1)
+    invalid |= df['quantity'] <= 0
+    if invalid.any():
+        rows = df.index[invalid.to_numpy()][:10].tolist()
+        raise ValueError(f"{int(invalid.sum())} trades inválidos (filas {rows})")
+
+    return df[BULK_REQUIRED_COLUMNS + BULK_OPTIONAL_COLUMNS + list(BULK_DEFAULTS)]
+
+def add_trades_bulk(trades, chunk_size=5000):
+    """Añade muchos trades de una vez con `executemany` en transacciones por bloques.
+
+    Acepta un DataFrame o un iterable de diccionarios con las columnas de
+    `add_single_trade`. Todo se valida antes de insertar nada; cada bloque de
+    `chunk_size` filas se confirma en su propia transacción. Devuelve la lista
+    de ids asignados, en el orden de entrada.
+    """
+    df = _validate_bulk_trades(trades)
+    store = _parquet_store()
+    if store:
+        return store.append_trades(df, PARQUET_ROOT)
+    
+    ids = []
+    for start in range(0, len(df), chunk_size):
+        chunk = df.iloc[start:start + chunk_size]
+        # Con el bloqueo de escritura tomado, AUTOINCREMENT asigna ids consecutivos
+        with _transaction(immediate=True) as conn:
+            _insert_trades(conn, chunk)
+            last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        ids.extend(range(last_id - len(chunk) + 1, last_id + 1))
+
+    return ids
+
 def delete_trade(trade_id):
     """Elimina una operación específica"""
-    conn = sqlite3.connect(DB_NAME)
+    store = _parquet_store()
+    if store:
+        store.delete_trades([trade_id], PARQUET_ROOT)
+        return True
+    
+    with _transaction() as conn:
+        conn.execute("DELETE FROM trades WHERE id = ?", (trade_id,))
+
+    return True
+
+# Una sola pasada sobre la tabla para todas las estadísticas
+STATISTICS_QUERY = '''
+    SELECT
+        COUNT(*) AS total_trades,
+        COALESCE(SUM(pnl), 0) AS total_pnl,
+        COALESCE(SUM(pnl > 0), 0) AS winners,
+        COALESCE(SUM(pnl < 0), 0) AS losers,
+        COALESCE(SUM(CASE WHEN pnl > 0 THEN pnl END), 0) AS gross_profit,
+        COALESCE(SUM(CASE WHEN pnl < 0 THEN pnl END), 0) AS gross_loss,
+        COALESCE(MAX(pnl), 0) AS best_trade,
+        COALESCE(MIN(pnl), 0) AS worst_trade
+    FROM trades
+'''
+
+def enable_stats_table():
+    """Crea la tabla resumen `trade_stats` y los triggers que la mantienen al día.
+
+    Tras activarla, `get_trade_statistics` lee una única fila en lugar de
+    recorrer `trades`. Es idempotente y recalcula el resumen al activarse.
+    """
+    conn = get_connection()
     cursor = conn.cursor()
     
-    cursor.execute("DELETE FROM trades WHERE id = ?", (trade_id,))
+    cursor.executescript('''
+        CREATE TABLE IF NOT EXISTS trade_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_trades INTEGER NOT NULL DEFAULT 0,
+            total_pnl REAL NOT NULL DEFAULT 0,
+            winners INTEGER NOT NULL DEFAULT 0,
+            losers INTEGER NOT NULL DEFAULT 0,
+            gross_profit REAL NOT NULL DEFAULT 0,
+            gross_loss REAL NOT NULL DEFAULT 0,
+            best_trade REAL NOT NULL DEFAULT 0,
+            worst_trade REAL NOT NULL DEFAULT 0
+        );
+        
+        -- MAX/MIN sólo se recalculan cuando sale el extremo actual
+        CREATE INDEX IF NOT EXISTS idx_trades_pnl ON trades(pnl);
+        
+        -- Se recrean siempre para que una base con triggers anteriores quede al día;
+        -- un pnl NULL cuenta como 0: ni ganador ni perdedor
+        DROP TRIGGER IF EXISTS trade_stats_insert;
+        DROP TRIGGER IF EXISTS trade_stats_delete;
+        DROP TRIGGER IF EXISTS trade_stats_update;
+        
+        CREATE TRIGGER trade_stats_insert AFTER INSERT ON trades
+        BEGIN
+            UPDATE trade_stats SET
+                total_trades = total_trades + 1,
+                total_pnl = total_pnl + COALESCE(NEW.pnl, 0),
+                winners = winners + (COALESCE(NEW.pnl, 0) > 0),
+                losers = losers + (COALESCE(NEW.pnl, 0) < 0),
+                gross_profit = gross_profit + MAX(COALESCE(NEW.pnl, 0), 0),
+                gross_loss = gross_loss + MIN(COALESCE(NEW.pnl, 0), 0),
+                -- Con `idx_trades_pnl` MAX/MIN son una búsqueda en el índice, y como en
+                -- STATISTICS_QUERY ignoran los pnl NULL
+                best_trade = CASE WHEN NEW.pnl IS NULL THEN best_trade
+                                  ELSE (SELECT MAX(pnl) FROM trades) END,
+                worst_trade = CASE WHEN NEW.pnl IS NULL THEN worst_trade
+                                   ELSE (SELECT MIN(pnl) FROM trades) END
+            WHERE id = 1;
+        END;
+        
+        CREATE TRIGGER trade_stats_delete AFTER DELETE ON trades
+        BEGIN
+            UPDATE trade_stats SET
+                total_trades = total_trades - 1,
+                total_pnl = total_pnl - COALESCE(OLD.pnl, 0),
+                winners = winners - (COALESCE(OLD.pnl, 0) > 0),
+                losers = losers - (COALESCE(OLD.pnl, 0) < 0),
+                gross_profit = gross_profit - MAX(COALESCE(OLD.pnl, 0), 0),
+                gross_loss = gross_loss - MIN(COALESCE(OLD.pnl, 0), 0),
+                best_trade = CASE WHEN OLD.pnl >= best_trade
+                                  THEN COALESCE((SELECT MAX(pnl) FROM trades), 0) ELSE best_trade END,
+                worst_trade = CASE WHEN OLD.pnl <= worst_trade
+                                   THEN COALESCE((SELECT MIN(pnl) FROM trades), 0) ELSE worst_trade END
+            WHERE id = 1;
+        END;
+        
+        CREATE TRIGGER trade_stats_update AFTER UPDATE OF pnl ON trades
+        BEGIN
+            UPDATE trade_stats SET
+                total_pnl = total_pnl - COALESCE(OLD.pnl, 0) + COALESCE(NEW.pnl, 0),
+                winners = winners - (COALESCE(OLD.pnl, 0) > 0) + (COALESCE(NEW.pnl, 0) > 0),
+                losers = losers - (COALESCE(OLD.pnl, 0) < 0) + (COALESCE(NEW.pnl, 0) < 0),
+                gross_profit = gross_profit - MAX(COALESCE(OLD.pnl, 0), 0) + MAX(COALESCE(NEW.pnl, 0), 0),
+                gross_loss = gross_loss - MIN(COALESCE(OLD.pnl, 0), 0) + MIN(COALESCE(NEW.pnl, 0), 0),
+                best_trade = COALESCE((SELECT MAX(pnl) FROM trades), 0),
+                worst_trade = COALESCE((SELECT MIN(pnl) FROM trades), 0)
+            WHERE id = 1;
+        END;
+    ''')
+    
+    # Recalcular desde cero para partir de un resumen consistente
+    row = cursor.execute(STATISTICS_QUERY).fetchone()
+    cursor.execute('''
+        INSERT OR REPLACE INTO trade_stats (id, total_trades, total_pnl, winners, losers,
+                                            gross_profit, gross_loss, best_trade, worst_trade)
+        VALUES (1, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', row)
     
     conn.commit()
-    conn.close()
     
     return True
 
-def get_trade_statistics():
-    """Obtiene estadísticas básicas de las operaciones"""
-    conn = sqlite3.connect(DB_NAME)
+def _build_statistics(row):
+    """Construye el diccionario de estadísticas a partir de los agregados"""
+    total_trades, total_pnl, winners, losers, gross_profit, gross_loss, best_trade, worst_trade = row
+    
+    avg_win = gross_profit / winners if winners > 0 else 0
+    avg_loss = gross_loss / losers if losers > 0 else 0
+    
+    return {
+        'total_trades': total_trades,
+        'total_pnl': total_pnl,
+        'winners': winners,
+        'losers': losers,
+        'win_rate': (winners / total_trades * 100) if total_trades > 0 else 0,
+        'best_trade': best_trade,
+        'worst_trade': worst_trade,
+        'gross_profit': gross_profit,
+        'gross_loss': gross_loss,
+        'avg_win': avg_win,
+        'avg_loss': avg_loss,
+        'profit_factor': abs(gross_profit / gross_loss) if gross_loss != 0 else 0,
+        'expectancy': total_pnl / total_trades if total_trades > 0 else 0
+    }
+
+def get_trade_statistics(use_summary=True):
+    """Obtiene estadísticas básicas de las operaciones.
+
+    Si existe la tabla `trade_stats` (ver `enable_stats_table`) y
+    `use_summary` es True se lee de ella; si no, se calcula con una única
+    consulta agregada. Con el backend Parquet se lee sólo la columna `pnl`.
+    """
+    store = _parquet_store()
+    if store:
+        # Tipos de Python y pnl vacíos ignorados, como en `STATISTICS_QUERY`
+        column = store.read_trades(PARQUET_ROOT, columns=['pnl'])['pnl']
+        pnl = column.dropna().to_numpy(dtype='float64')
+        return _build_statistics((
+            len(column), float(pnl.sum()), int((pnl > 0).sum()), int((pnl < 0).sum()),
+            float(pnl[pnl > 0].sum()), float(pnl[pnl < 0].sum()),
+            float(pnl.max()) if len(pnl) else 0, float(pnl.min()) if len(pnl) else 0
+        ))
+    
+    conn = get_connection()
     
     try:
-        total_trades = pd.read_sql_query("SELECT COUNT(*) as count FROM trades", conn).iloc[0]['count']
-        total_pnl = pd.read_sql_query("SELECT SUM(pnl) as total FROM trades", conn).iloc[0]['total'] or 0
-        winners = pd.read_sql_query("SELECT COUNT(*) as count FROM trades WHERE pnl > 0", conn).iloc[0]['count']
-        losers = pd.read_sql_query("SELECT COUNT(*) as count FROM trades WHERE pnl < 0", conn).iloc[0]['count']
-        best_trade = pd.read_sql_query("SELECT MAX(pnl) as best FROM trades", conn).iloc[0]['best'] or 0
-        worst_trade = pd.read_sql_query("SELECT MIN(pnl) as worst FROM trades", conn).iloc[0]['worst'] or 0
+        row = None
+        if use_summary:
+            try:
+                row = conn.execute('''
+                    SELECT total_trades, total_pnl, winners, losers,
+                           gross_profit, gross_loss, best_trade, worst_trade
+                    FROM trade_stats WHERE id = 1
+                ''').fetchone()
+            except sqlite3.OperationalError:
+                row = None
         
-        return {
-            'total_trades': total_trades,
-            'total_pnl': total_pnl,
-            'winners': winners,
-            'losers': losers,
-            'win_rate': (winners / total_trades * 100) if total_trades > 0 else 0,
-            'best_trade': best_trade,
-            'worst_trade': worst_trade
-        }
+        if row is None:
+            row = conn.execute(STATISTICS_QUERY).fetchone()
+        
+        return _build_statistics(row)
         
     except Exception as e:
+        # Streamlit sólo se importa aquí: los usos sin interfaz (CLI, benchmarks) no pagan su carga
+        import streamlit as st
         st.error(f"Error al obtener estadísticas: {e}")
         return None
-    finally:
-        conn.close()
+
+# Tablas de agregados por granularidad: nombre -> expresión SQL de la clave
+ROLLUP_KEYS = {
+    'day': "date({row}.close_time / 1000000, 'unixepoch')",
+    'month': "strftime('%Y-%m', {row}.close_time / 1000000, 'unixepoch')",
+    'symbol': "(SELECT name FROM symbols WHERE id = {row}.symbol_id)",
+    # 0 = lunes, como `Series.dt.dayofweek`
+    'weekday': "(CAST(strftime('%w', {row}.close_time / 1000000, 'unixepoch') AS INTEGER) + 6) % 7"
+}
+
+def _rollup_triggers(kind):
+    """SQL de la tabla `trade_rollup_<kind>` y de los triggers que la mantienen"""
+    table = f"trade_rollup_{kind}"
+    new_key = ROLLUP_KEYS[kind].format(row="NEW")
+    old_key = ROLLUP_KEYS[kind].format(row="OLD")
+    
+    add = f'''
+            INSERT INTO {table} (key, trades, total_pnl, winners, losers, gross_profit, gross_loss)
+            VALUES ({new_key}, 1, COALESCE(NEW.pnl, 0), COALESCE(NEW.pnl, 0) > 0, COALESCE(NEW.pnl, 0) < 0,
+                    MAX(COALESCE(NEW.pnl, 0), 0), MIN(COALESCE(NEW.pnl, 0), 0))
+            ON CONFLICT(key) DO UPDATE SET
+                trades = trades + 1,
+                total_pnl = total_pnl + excluded.total_pnl,
+                winners = winners + excluded.winners,
+                losers = losers + excluded.losers,
+                gross_profit = gross_profit + excluded.gross_profit,
+                gross_loss = gross_loss + excluded.gross_loss;'''
+    remove = f'''
+            UPDATE {table} SET
+                trades = trades - 1,
+                total_pnl = total_pnl - COALESCE(OLD.pnl, 0),
+                winners = winners - (COALESCE(OLD.pnl, 0) > 0),
+                losers = losers - (COALESCE(OLD.pnl, 0) < 0),
+                gross_profit = gross_profit - MAX(COALESCE(OLD.pnl, 0), 0),
+                gross_loss = gross_loss - MIN(COALESCE(OLD.pnl, 0), 0)
+            WHERE key = {old_key};
+            DELETE FROM {table} WHERE key = {old_key} AND trades <= 0;'''
+    
+    return f'''
+        CREATE TABLE IF NOT EXISTS {table} (
+            key NOT NULL PRIMARY KEY,
+            trades INTEGER NOT NULL,
+            total_pnl REAL NOT NULL,
+            winners INTEGER NOT NULL,
+            losers INTEGER NOT NULL,
+            gross_profit REAL NOT NULL,
+            gross_loss REAL NOT NULL
+        );
+        
+        -- Se recrean siempre para que una base con triggers anteriores quede al día;
+        -- un pnl NULL cuenta como 0: ni ganador ni perdedor
+        DROP TRIGGER IF EXISTS {table}_insert;
+        DROP TRIGGER IF EXISTS {table}_delete;
+        DROP TRIGGER IF EXISTS {table}_update;
+        
+        CREATE TRIGGER {table}_insert AFTER INSERT ON trades
+        BEGIN {add}
+        END;
+        
+        CREATE TRIGGER {table}_delete AFTER DELETE ON trades
+        BEGIN {remove}
+        END;
+        
+        CREATE TRIGGER {table}_update AFTER UPDATE OF close_time, symbol_id, pnl ON trades
+        BEGIN {remove} {add}
+        END;
+    '''
+
+def enable_rollup_tables(rebuild=True):
+    """Crea las tablas de agregados por día, mes, símbolo y día de la semana.
+
+    Los triggers las actualizan en cada alta, baja o modificación de trades,
+    así que `get_rollup` no necesita recorrer `trades`. Es idempotente y
+    reconstruye los agregados al activarse; con `rebuild=False` sólo recrea
+    los triggers de unas tablas que ya están al día.
+    """
+    conn = get_connection()
+    cursor = conn.cursor()
+    
+    for kind in ROLLUP_KEYS:
+        cursor.executescript(_rollup_triggers(kind))
+    if not rebuild:
+        return True
+    
+    with conn:
+        for kind, key in ROLLUP_KEYS.items():
+            table = f"trade_rollup_{kind}"
+            cursor.execute(f"DELETE FROM {table}")
+            cursor.execute(f'''
+                INSERT INTO {table} (key, trades, total_pnl, winners, losers, gross_profit, gross_loss)
+                SELECT {key.format(row="trades")}, COUNT(*), COALESCE(SUM(pnl), 0),
+                       SUM(COALESCE(pnl, 0) > 0), SUM(COALESCE(pnl, 0) < 0),
+                       COALESCE(SUM(CASE WHEN pnl > 0 THEN pnl END), 0),
+                       COALESCE(SUM(CASE WHEN pnl < 0 THEN pnl END), 0)
+                FROM trades GROUP BY 1
+            ''')
+    
+    return True
+
+def _rollup_from_store(store, kind):
+    """Calcula en pandas el agregado `kind` leyendo sólo las columnas necesarias del backend Parquet"""
+    df = store.read_trades(PARQUET_ROOT, columns=['date', 'symbol', 'pnl'])
+    keys = {
+        'day': df['date'].dt.strftime('%Y-%m-%d'),
+        'month': df['date'].dt.strftime('%Y-%m'),
+        'symbol': df['symbol'],
+        'weekday': df['date'].dt.dayofweek
+    }[kind]
+    pnl = df['pnl']
+    return pd.DataFrame({
+        'trades': 1,
+        'total_pnl': pnl,
+        'winners': (pnl > 0).astype(int),
+        'losers': (pnl < 0).astype(int),
+        'gross_profit': pnl.clip(lower=0),
+        'gross_loss': pnl.clip(upper=0)
+    }).groupby(keys.rename('key')).sum().reset_index()
+
+def get_rollup(kind, start=None, end=None):
+    """Devuelve el agregado por `kind` ('day', 'month', 'symbol' o 'weekday') ordenado por clave.
+
+    `start` (inclusivo) y `end` (exclusivo) filtran la clave, p.ej. meses
+    "2024-01" a "2024-07". Además de las sumas incluye `avg_pnl` y `win_rate`
+    (fracción de trades ganadores). Si la base aún no tiene las tablas de
+    agregados, se activan (ver `enable_rollup_tables`) en la primera lectura.
+    """
+    if kind not in ROLLUP_KEYS:
+        raise ValueError(f"Agregado desconocido: {kind}")
+    
+    store = _parquet_store()
+    if store:
+        df = _rollup_from_store(store, kind)
+        if start is not None:
+            df = df[df['key'] >= start]
+        if end is not None:
+            df = df[df['key'] < end]
+    else:
+        conditions = []
+        params = []
+        if start is not None:
+            conditions.append("key >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("key < ?")
+            params.append(end)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        conn = get_connection()
+        if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (f"trade_rollup_{kind}",)).fetchone() is None:
+            enable_rollup_tables()
+        df = pd.read_sql_query(f"SELECT * FROM trade_rollup_{kind} {where} ORDER BY key",
+                               conn, params=params)
+    
+    df = df.reset_index(drop=True)
+    df['avg_pnl'] = df['total_pnl'] / df['trades']
+    df['win_rate'] = df['winners'] / df['trades']
+    return df
+
+def get_monthly_summary():
+    """Resumen mensual con las columnas de "Resumen Mensual Detallado" en App.py"""
+    df = get_rollup('month')
+    return pd.DataFrame({
+        'Mes': df['key'],
+        'Total_Profit': df['total_pnl'],
+        'Avg_Profit': df['avg_pnl'],
+        'Total_Trades': df['trades'],
+        'Winning_Trades': df['winners'],
+        'Win_Rate': df['win_rate']
+    })
+
+def get_weekday_summary():
+    """Resumen por día de la semana con las columnas del análisis semanal de App.py"""
+    days = {0: 'Lunes', 1: 'Martes', 2: 'Miércoles', 3: 'Jueves', 4: 'Viernes', 5: 'Sábado', 6: 'Domingo'}
+    df = get_rollup('weekday')
+    return pd.DataFrame({
+        'Día': pd.Categorical(df['key'].map(days), categories=days.values(), ordered=True),
+        'Profit_Total': df['total_pnl'],
+        'Profit_Promedio': df['avg_pnl'],
+        'Cantidad_Trades': df['trades'],
+        'Trades_Ganadores': df['winners'],
+        'Win_Rate': df['win_rate']
+    })
+
+# Formatos soportados por `export_trades` y su extensión
+EXPORT_FORMATS = {'csv': '.csv', 'csv.gz': '.csv.gz', 'parquet': '.parquet'}
+
+def _iter_trade_chunks(chunk_size):
+    """Recorre la tabla `trades` en bloques de `chunk_size` filas con columnas lógicas"""
+    return _read_trades(get_connection(), chunksize=chunk_size)
+
+def _parquet_schema():
+    """Esquema Arrow de las columnas lógicas, para que todos los bloques coincidan"""
+    import pyarrow as pa
+    
+    types = {'id': pa.int64(), 'date': pa.timestamp('us'), 'open_time': pa.timestamp('us')}
+    types.update({col: pa.float64() for col in ['quantity', 'price', 'commission', 'pnl', 'fees', 'take_profit', 'stop_loss']})
+    return pa.schema([(col, types.get(col, pa.string())) for col in STORAGE_COLUMNS])
+
+def export_trades(path=None, fmt="csv", chunk_size=50000):
+    """Exporta la tabla `trades` por bloques a CSV, CSV comprimido con gzip o Parquet.
+
+    Sólo hay un bloque de `chunk_size` filas en memoria a la vez. `path`
+    puede ser una ruta (str o `os.PathLike`) o un fichero binario abierto; si
+    se omite se genera un nombre con la fecha. Devuelve el destino, o None si
+    no hay trades.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportación desconocido: {fmt}")
+    if not os.path.exists(DB_NAME):
+        return None
+    if path is None:
+        path = f"trades_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}{EXPORT_FORMATS[fmt]}"
+    
+    chunks = _iter_trade_chunks(chunk_size)
+    first = next(chunks, None)
+    if first is None or first.empty:
+        return None
+    
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("La exportación a Parquet requiere `pyarrow` (pip install pyarrow)")
+        
+        schema = _parquet_schema()
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in itertools.chain([first], chunks):
+                chunk = chunk.astype({col: object for col in LOOKUP_TABLES})
+                writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+        return path
+    
+    with ExitStack() as stack:
+        is_path = isinstance(path, (str, os.PathLike))
+        target = stack.enter_context(open(os.fspath(path), 'wb')) if is_path else path
+        if fmt == "csv.gz":
+            target = stack.enter_context(gzip.GzipFile(fileobj=target, mode='wb', mtime=0))
+        
+        for i, chunk in enumerate(itertools.chain([first], chunks)):
+            target.write(chunk.to_csv(index=False, header=(i == 0)).encode('utf-8'))
+    return path
 
 def export_to_csv():
     """Exporta todos los datos a CSV"""
-    df = load_trades_from_db()
-    if not df.empty:
-        csv_name = f"trades_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        df.to_csv(csv_name, index=False)
-        return csv_name
-    return None
+    return export_trades(fmt="csv")
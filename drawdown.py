@@ -0,0 +1,213 @@
+"""Análisis de drawdown: episodios completos y curvas underwater por grupo.
+
+Un episodio empieza en un máximo de la curva de capital, llega a un valle y
+termina al recuperar ese máximo (o sigue abierto al final de los datos). Los
+episodios salen de una sola pasada vectorizada sobre la curva: los tramos bajo
+el máximo acumulado se detectan con `np.diff` y el valle de cada uno con
+`np.minimum.reduceat`. Las curvas por símbolo y por estrategia salen de una
+única suma y un único máximo acumulado sobre los trades ordenados por grupo,
+sin bucles de Python sobre los grupos. Los informes se memorizan por el hash
+del dataset.
+"""
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import lrucache
+import timeparse
+
+# Informes que se conservan en memoria
+MAX_CACHED_REPORTS = 4
+# Columnas que identifican el dataset para la caché
+HASH_COLUMNS = ['Close Time', 'Profit (USD)', 'Symbol', 'Portfolio']
+EPISODE_COLUMNS = ['Inicio', 'Valle', 'Recuperación', 'Pico', 'Profundidad',
+                   'Duración', 'Hasta_Valle', 'Tiempo_Recuperación', 'Trades']
+
+_cache = lrucache.LRUCache(MAX_CACHED_REPORTS)
+
+
+@dataclass(frozen=True)
+class DrawdownReport:
+    """Resultado de `analyze`; los importes están en USD"""
+    # Un episodio por fila (ver `episodes`), en orden cronológico
+    episodes: pd.DataFrame
+    # Symbol / Portfolio, Max_Drawdown, Drawdown_Actual, Trades (del peor al mejor)
+    by_symbol: pd.DataFrame
+    by_strategy: pd.DataFrame
+    # Close Time, Symbol / Portfolio, Drawdown: curva underwater de cada grupo (orden cronológico)
+    symbol_underwater: pd.DataFrame
+    strategy_underwater: pd.DataFrame
+
+
+def episodes(close_time, cumulative):
+    """Episodios de drawdown de una curva de capital en orden cronológico.
+
+    Devuelve un DataFrame con `EPISODE_COLUMNS`: fechas del pico (Inicio),
+    del valle y de la recuperación (NaT si sigue abierto), capital en el pico,
+    profundidad (negativa), duraciones pico-recuperación, pico-valle y
+    valle-recuperación, y cantidad de trades bajo el pico.
+    """
+    close_time = np.asarray(close_time, dtype='datetime64[us]')
+    cumulative = np.asarray(cumulative, dtype='float64')
+    n = len(cumulative)
+    if n == 0:
+        return pd.DataFrame(columns=EPISODE_COLUMNS)
+
+    running_max = np.maximum.accumulate(cumulative)
+    drawdown = cumulative - running_max
+    underwater = drawdown < 0
+
+    # Inicio y fin (exclusivo) de cada tramo bajo el máximo; el primer punto nunca lo está
+    edges = np.diff(np.concatenate(([False], underwater, [False])).view('int8'))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return pd.DataFrame(columns=EPISODE_COLUMNS)
+
+    # Fuera de los tramos el drawdown es 0, así que no altera el mínimo de cada
+    # uno; el valle es la primera fila de cada tramo que alcanza ese mínimo
+    depth = np.minimum.reduceat(drawdown, starts)
+    floor = np.repeat(np.concatenate(([1.0], depth)), np.diff(np.concatenate(([0], starts, [n]))))
+    hits = np.flatnonzero(drawdown == floor)
+    segment = np.searchsorted(starts, hits, side='right') - 1
+    troughs = hits[np.concatenate(([True], np.diff(segment) != 0))]
+
+    peaks = starts - 1
+    recovered = ends < n
+    recovery = np.full(len(ends), np.datetime64('NaT'), dtype='datetime64[us]')
+    recovery[recovered] = close_time[ends[recovered]]
+    start_time, trough_time = close_time[peaks], close_time[troughs]
+
+    return pd.DataFrame({
+        'Inicio': start_time,
+        'Valle': trough_time,
+        'Recuperación': recovery,
+        'Pico': running_max[peaks],
+        'Profundidad': depth,
+        'Duración': recovery - start_time,
+        'Hasta_Valle': trough_time - start_time,
+        'Tiempo_Recuperación': recovery - trough_time,
+        'Trades': ends - starts
+    })
+
+
+def underwater_by(close_time, profit, codes, labels, name):
+    """Curva underwater de cada grupo sobre trades en orden cronológico.
+
+    `codes` son los códigos de grupo de cada trade (de `pd.factorize`, -1 sin
+    grupo) y `labels` sus nombres. Devuelve `(curvas, resumen)`: `curvas` tiene
+    Close Time, `name` y Drawdown (distancia al máximo del propio grupo) y
+    `resumen` el peor drawdown, el actual y la cantidad de trades de cada grupo.
+    """
+    known = codes >= 0
+    if not known.all():
+        close_time, profit, codes = close_time[known], profit[known], codes[known]
+    if len(codes) == 0:
+        return _empty_groups(name)
+
+    # Ordenados por grupo (y cronológicos dentro de cada uno); con códigos de
+    # 16 bits NumPy usa radix sort
+    order = np.argsort(codes.astype('int16' if len(labels) < 2 ** 15 else 'int64'), kind='stable')
+    count = np.bincount(codes, minlength=len(labels))
+    present = np.flatnonzero(count)
+    sizes = count[present]
+    bounds = np.concatenate(([0], np.cumsum(sizes)))
+    starts = bounds[:-1]
+
+    # Suma acumulada por tramos: la global menos lo acumulado antes del tramo
+    cumulative = np.cumsum(profit[order])
+    before = np.concatenate(([0.0], cumulative))[starts]
+    cumulative -= np.repeat(before, sizes)
+
+    # Máximo acumulado por tramos: cada grupo se desplaza por encima del
+    # anterior para que un único `maximum.accumulate` no cruce de grupo
+    low = np.minimum.reduceat(cumulative, starts)
+    high = np.maximum.reduceat(cumulative, starts)
+    shift = np.cumsum(np.concatenate(([0.0], (high - low + 1)[:-1]))) - low
+    cumulative += np.repeat(shift, sizes)
+    drawdown_sorted = np.minimum(cumulative - np.maximum.accumulate(cumulative), 0.0)
+
+    drawdown = np.empty_like(drawdown_sorted)
+    drawdown[order] = drawdown_sorted
+    curves = pd.DataFrame({
+        'Close Time': close_time,
+        name: pd.Categorical.from_codes(codes, labels),
+        'Drawdown': drawdown
+    })
+    summary = pd.DataFrame({
+        name: labels[present],
+        'Max_Drawdown': np.minimum.reduceat(drawdown_sorted, starts),
+        'Drawdown_Actual': drawdown_sorted[bounds[1:] - 1],
+        'Trades': sizes
+    }).sort_values('Max_Drawdown', kind='stable', ignore_index=True)
+    return curves, summary
+
+
+def dataset_hash(df):
+    """Hash del contenido de `df` en las columnas que usa el análisis"""
+    columns = [col for col in HASH_COLUMNS if col in df.columns]
+    hashed = pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    return hashlib.sha256(hashed.tobytes()).hexdigest()
+
+
+def _empty_groups(name):
+    return (pd.DataFrame(columns=['Close Time', name, 'Drawdown']),
+            pd.DataFrame(columns=[name, 'Max_Drawdown', 'Drawdown_Actual', 'Trades']))
+
+
+def _group_codes(values):
+    """Códigos enteros y nombres de un grupo; las columnas `category` ya los traen"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.codes.to_numpy(dtype='int64'), np.asarray(values.cat.categories, dtype=object)
+    codes, labels = pd.factorize(values)
+    return codes, np.asarray(labels, dtype=object)
+
+
+def _build(df):
+    profit = df['Profit (USD)'].to_numpy(dtype='float64')
+    close_time = timeparse.to_datetime(df['Close Time']).to_numpy(dtype='datetime64[us]')
+    # Los datos del journal y de la mayoría de los exports ya vienen ordenados
+    order = None
+    if np.any(close_time[1:] < close_time[:-1]) or np.isnat(close_time).any():
+        order = np.argsort(close_time, kind='stable')
+        close_time, profit = close_time[order], profit[order]
+
+    grouped = {}
+    for column in ('Symbol', 'Portfolio'):
+        if column in df.columns:
+            codes, labels = _group_codes(df[column])
+            grouped[column] = underwater_by(close_time, profit, codes if order is None else codes[order],
+                                            labels, column)
+        else:
+            grouped[column] = _empty_groups(column)
+
+    return DrawdownReport(
+        episodes=episodes(close_time, np.cumsum(profit)),
+        by_symbol=grouped['Symbol'][1],
+        by_strategy=grouped['Portfolio'][1],
+        symbol_underwater=grouped['Symbol'][0],
+        strategy_underwater=grouped['Portfolio'][0]
+    )
+
+
+def analyze(df, key=None):
+    """`DrawdownReport` de un DataFrame de trades con las columnas del CSV.
+
+    `key` identifica el dataset (p. ej. la clave de `ingest.ingest_csv`); si no
+    se da, se usa `dataset_hash(df)`. El informe se comparte entre llamadas
+    con la misma clave y no debe modificarse.
+    """
+    if key is None:
+        key = dataset_hash(df)
+    report = _cache.get(key)
+    if report is None:
+        report = _build(df)
+        _cache.put(key, report)
+    return report
+
+
+def clear_cache():
+    """Vacía la caché de informes"""
+    _cache.clear()
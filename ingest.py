@@ -0,0 +1,264 @@
+"""Ingesta de CSV de broker para los dashboards.
+
+Streamlit vuelve a ejecutar el script en cada interacción y el uploader sigue
+devolviendo el mismo archivo, así que el parseo y la preparación se memorizan
+por el hash del contenido en una caché LRU acotada.
+
+Los exports grandes se leen por bloques (`read_csv_chunked`) con un esquema de
+tipos declarado: cada bloque se filtra y se deriva antes de concatenarse, así
+que nunca está el CSV completo en memoria con los tipos inferidos.
+
+Todo DataFrame preparado pasa por `compact_trades`: texto repetido como
+`category` y columnas descriptivas en tipos más chicos. Los DataFrames se
+comparten entre reruns sin copiarse (copy-on-write).
+"""
+import hashlib
+import io
+import os
+from contextlib import ExitStack
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype, is_string_dtype, union_categoricals
+
+import lrucache
+import timeparse
+
+# Columnas sin las que no se puede preparar el CSV
+REQUIRED_COLUMNS = ['Profit (USD)', 'Close Time', 'Open Time']
+# Columnas de fecha: se parsean una sola vez, con el formato detectado en `timeparse`
+TIME_COLUMNS = ['Open Time', 'Close Time']
+# DataFrames preparados que se conservan en memoria
+MAX_CACHED_FRAMES = 4
+
+# Esquema del CSV del broker para la lectura por bloques; el resto de columnas
+# (p. ej. `Order ID`) no se llega a cargar
+CSV_SCHEMA = {
+    'Market': 'category',
+    'Portfolio': 'category',
+    'Symbol': 'category',
+    'Side': 'category',
+    'Open Time': 'datetime',
+    'Close Time': 'datetime',
+    'Size': 'float64',
+    'Open Price': 'float64',
+    'Commission': 'float64',
+    'Fees': 'float64',
+    'Profit (USD)': 'float64',
+    'Take Profit': 'float64',
+    'Stop Loss': 'float64'
+}
+# Texto repetido que siempre se guarda como `category`
+CATEGORY_COLUMNS = ['Market', 'Portfolio', 'Symbol', 'Side', 'Result']
+# Otras columnas de texto pasan a `category` con menos de esta proporción de valores distintos
+CATEGORY_MAX_RATIO = 0.5
+# Columnas descriptivas que se reducen cuando no se pierde ningún valor; los
+# importes que se suman (Profit, Commission, Fees) y las duraciones siguen en float64
+DOWNCAST_COLUMNS = ['Size', 'Open Price', 'Take Profit', 'Stop Loss']
+# Filas por bloque en la lectura por bloques
+DEFAULT_CHUNKSIZE = 200_000
+# A partir de este tamaño el uploader lee por bloques
+STREAMING_MIN_BYTES = 64 * 1024 * 1024
+
+# Con pandas 3 copy-on-write está siempre activo; en 2.x hay que pedirlo para
+# que los DataFrames compartidos entre reruns no se copien al derivar columnas
+if int(pd.__version__.split('.')[0]) < 3:
+    pd.set_option('mode.copy_on_write', True)
+
+_cache = lrucache.LRUCache(MAX_CACHED_FRAMES)
+_file_hashes = {}
+
+
+def prepare_trades(df):
+    """Quita los trades en break-even, parsea las fechas y deriva `Duration (hours)` y `Result`.
+
+    El formato y la tasa de error de cada fecha quedan en `df.attrs['parsed_datetimes']`.
+    """
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+
+    df = timeparse.parse_columns(df[df['Profit (USD)'] != 0], TIME_COLUMNS)
+    df['Duration (hours)'] = (df['Close Time'] - df['Open Time']).dt.total_seconds() / 3600
+    df['Result'] = np.where(df['Profit (USD)'] > 0, 'Win', 'Loss')
+
+    if 'Order ID' in df.columns:
+        df = df.drop(columns=['Order ID'])
+
+    return df
+
+
+def _downcast(values):
+    """Entero más chico si son enteros sin NaN y float32 si todos los valores son
+    exactos en float32; si no, sin cambios (guardar en el journal un float32
+    redondeado cambiaría el dato)"""
+    numbers = values.to_numpy(dtype='float64', na_value=np.nan)
+    finite = numbers[~np.isnan(numbers)]
+    if not len(finite):
+        return values
+    if len(finite) == len(numbers) and np.array_equal(finite, np.round(finite)) and np.abs(finite).max() < 2 ** 31:
+        return pd.to_numeric(values, downcast='integer')
+    if np.array_equal(finite.astype('float32').astype('float64'), finite):
+        return values.astype('float32')
+    return values
+
+
+def compact_trades(df):
+    """Reduce la memoria de un DataFrame de trades sin cambiar sus valores.
+
+    Las columnas de `CATEGORY_COLUMNS` (y el resto del texto con pocos valores
+    distintos) pasan a `category` y las de `DOWNCAST_COLUMNS` al tipo numérico
+    más chico que representa exactamente sus valores. Las columnas que no cambian no
+    se copian. `df.attrs['uncompacted_bytes']` guarda la memoria de partida.
+    """
+    before = int(df.memory_usage(deep=True).sum())
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype) or col in ('Open Time', 'Close Time'):
+            continue
+        if is_string_dtype(values.dtype) or values.dtype == object:
+            if col in CATEGORY_COLUMNS or values.nunique() < CATEGORY_MAX_RATIO * len(values):
+                columns[col] = values.astype('category')
+        elif col in DOWNCAST_COLUMNS and is_numeric_dtype(values.dtype):
+            columns[col] = _downcast(values)
+
+    df = df.assign(**columns)
+    df.attrs['uncompacted_bytes'] = before
+    return df
+
+
+def memory_usage(df):
+    """(bytes actuales, bytes antes de `compact_trades`) de un DataFrame de trades"""
+    current = int(df.memory_usage(deep=True).sum())
+    return current, df.attrs.get('uncompacted_bytes', current)
+
+
+def _prepare_chunk(chunk, formats):
+    """Versión de `prepare_trades` para un bloque ya tipado con `CSV_SCHEMA`; las
+    fechas se parsean con `formats` (los detectados en bloques anteriores)"""
+    chunk = timeparse.parse_columns(chunk[chunk['Profit (USD)'] != 0], TIME_COLUMNS, formats)
+    return chunk.assign(**{
+        'Duration (hours)': (chunk['Close Time'] - chunk['Open Time']).dt.total_seconds() / 3600,
+        'Result': pd.Categorical.from_codes((chunk['Profit (USD)'] > 0).astype('int8'), ['Loss', 'Win'])
+    })
+
+
+def _concat_chunks(chunks):
+    """Concatena bloques uniendo las categorías para no volver a `object`"""
+    categorical = [col for col, kind in CSV_SCHEMA.items() if kind == 'category' and col in chunks[0].columns]
+    df = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True)
+    for col in categorical:
+        values = [chunk[col] for chunk in chunks]
+        # Un bloque sin valores trae categorías `object` y union_categoricals exige el mismo tipo
+        dtype = next((v.cat.categories.dtype for v in values if len(v.cat.categories)), None)
+        if dtype is not None:
+            values = [v if len(v.cat.categories) else v.cat.set_categories(pd.Index([], dtype=dtype)) for v in values]
+        df[col] = union_categoricals(values, ignore_order=True)
+    return df[list(chunks[0].columns)]
+
+
+def read_csv_chunked(source, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    """Lee y prepara un CSV de broker por bloques de `chunksize` filas.
+
+    `source` es una ruta o un archivo binario. Sólo se cargan las columnas de
+    `CSV_SCHEMA`, con sus tipos: texto repetido como `category` y horas como
+    `datetime64`, con el formato detectado en el primer bloque para todo el
+    archivo. `progress(fraction)` se llama tras cada bloque.
+    """
+    with ExitStack() as stack:
+        if isinstance(source, (str, os.PathLike)):
+            source = stack.enter_context(open(source, 'rb'))
+        start = source.tell()
+        total = source.seek(0, io.SEEK_END) - start
+        source.seek(start)
+
+        dtypes = {col: ('str' if kind == 'datetime' else kind) for col, kind in CSV_SCHEMA.items()}
+        reader = pd.read_csv(source, usecols=lambda col: col in CSV_SCHEMA, dtype=dtypes, chunksize=chunksize)
+
+        chunks, infos, formats = [], [], {}
+        for chunk in reader:
+            if not chunks:
+                missing = [col for col in REQUIRED_COLUMNS if col not in chunk.columns]
+                if missing:
+                    raise ValueError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+            chunk = _prepare_chunk(chunk, formats)
+            info = chunk.attrs['parsed_datetimes']
+            # El formato queda fijado en cuanto un bloque trae fechas reconocibles
+            formats.update({col: item['format'] for col, item in info.items() if item['format'] and col not in formats})
+            chunks.append(chunk)
+            infos.append(info)
+            if progress is not None and total:
+                progress(min((source.tell() - start) / total, 1.0))
+
+    if not chunks:
+        raise ValueError("El archivo CSV está vacío")
+    df = _concat_chunks(chunks)
+    df.attrs['parsed_datetimes'] = timeparse.merge_infos(infos)
+    return df
+
+
+def content_hash(data):
+    """Hash SHA-256 del contenido de un archivo (bytes o buffer)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_key(uploaded):
+    """Hash del archivo subido; se recuerda por `file_id` para no recalcularlo en cada rerun"""
+    if isinstance(uploaded, (bytes, bytearray)):
+        return content_hash(uploaded)
+
+    file_id = getattr(uploaded, 'file_id', None)
+    if file_id is not None and file_id in _file_hashes:
+        return _file_hashes[file_id]
+
+    key = content_hash(uploaded.getbuffer())
+    if file_id is not None:
+        if len(_file_hashes) >= 256:
+            _file_hashes.clear()
+        _file_hashes[file_id] = key
+    return key
+
+
+def ingest_csv(uploaded, chunksize=None, progress=None):
+    """Lee y prepara un CSV subido, reutilizando el resultado si el contenido no cambió.
+
+    `uploaded` es el archivo del `st.file_uploader` (o cualquier `BytesIO`) o
+    su contenido en bytes. Con `chunksize` se lee por bloques con
+    `read_csv_chunked` (y `progress` informa del avance). Devuelve `(key, df)`. El DataFrame se comparte entre reruns y sesiones:
+    no debe modificarse en sitio.
+    """
+    key = _file_key(uploaded)
+    if chunksize:
+        key += ':chunked'
+    df = _cache.get(key)
+    if df is not None:
+        return key, df
+
+    if isinstance(uploaded, (bytes, bytearray)):
+        uploaded = io.BytesIO(uploaded)
+    uploaded.seek(0)
+    if chunksize:
+        df = read_csv_chunked(uploaded, chunksize, progress)
+    else:
+        df = prepare_trades(pd.read_csv(uploaded))
+    df = compact_trades(df)
+
+    _cache.put(key, df)
+    return key, df
+
+
+def evict(key):
+    """Quita de la caché el DataFrame de `key`; devuelve True si estaba"""
+    return _cache.pop(key)
+
+
+def clear_cache():
+    """Vacía la caché de ingesta"""
+    _cache.clear()
+    _file_hashes.clear()
+
+
+def cache_stats():
+    """Devuelve aciertos, fallos, desalojos y tamaño actual de la caché"""
+    return _cache.stats()
@@ -0,0 +1,101 @@
+"""Persistencia de los trades del dashboard en el journal de `database.py`.
+
+El dashboard trabaja con las columnas del CSV del broker (`Profit (USD)`,
+`Close Time`, ...) y la base con columnas lógicas (`pnl`, `date`, ...);
+`CSV_TO_JOURNAL` es la única tabla de traducción entre ambos esquemas.
+"""
+import pandas as pd
+
+import database
+import ingest
+
+# Columna del CSV del broker -> columna lógica de `database`
+CSV_TO_JOURNAL = {
+    'Market': 'market',
+    'Portfolio': 'strategy',
+    'Symbol': 'symbol',
+    'Side': 'side',
+    'Open Time': 'open_time',
+    'Close Time': 'date',
+    'Size': 'quantity',
+    'Open Price': 'price',
+    'Commission': 'commission',
+    'Fees': 'fees',
+    'Profit (USD)': 'pnl',
+    'Take Profit': 'take_profit',
+    'Stop Loss': 'stop_loss'
+}
+JOURNAL_TO_CSV = {journal: csv for csv, journal in CSV_TO_JOURNAL.items()}
+
+
+def init_journal():
+    """Crea o migra la base y activa la tabla de estadísticas y los agregados.
+
+    Los triggers se recrean siempre, así que una base creada con triggers
+    anteriores queda al día; los agregados sólo se recalculan desde `trades`
+    cuando sus tablas no existían. El resumen mensual del dashboard los lee
+    con `database.get_monthly_summary`.
+    """
+    database.init_database()
+    database.enable_stats_table()
+    tables = {row[0] for row in database.get_connection().execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    database.enable_rollup_tables(rebuild='trade_rollup_month' not in tables)
+
+
+def to_journal(df):
+    """Traduce un DataFrame con columnas del CSV a columnas lógicas de `database`"""
+    columns = [col for col in CSV_TO_JOURNAL if col in df.columns]
+    return df[columns].rename(columns=CSV_TO_JOURNAL)
+
+
+def from_journal(df):
+    """Traduce trades leídos de `database` al esquema del CSV, en orden cronológico,
+    con `Duration (hours)` y `Result` derivados como en `ingest.prepare_trades`"""
+    columns = [col for col in JOURNAL_TO_CSV if col in df.columns]
+    df = df.loc[::-1, columns].rename(columns=JOURNAL_TO_CSV).reset_index(drop=True)
+    if df.empty:
+        return df
+    # Columnas REAL sin ningún valor llegan como `object`
+    for col in ('Take Profit', 'Stop Loss'):
+        if col in df.columns:
+            df[col] = df[col].astype('float64')
+    df['Duration (hours)'] = (df['Close Time'] - df['Open Time']).dt.total_seconds() / 3600
+    df['Result'] = pd.Categorical.from_codes((df['Profit (USD)'] > 0).astype('int8'), ['Loss', 'Win'])
+    return ingest.compact_trades(df)
+
+
+def load_trades():
+    """Lee todo el journal con el esquema del CSV"""
+    return from_journal(database.load_trades_from_db(columns=list(JOURNAL_TO_CSV)))
+
+
+def _dated(df):
+    """Trades de `df` con fecha de cierre y cantidad de descartados: sin ella no se pueden guardar"""
+    dated = df['Close Time'].notna() if 'Close Time' in df.columns else pd.Series(False, index=df.index)
+    return df[dated], int((~dated).sum())
+
+
+def save_trades(df):
+    """Añade al journal los trades nuevos de `df` y actualiza los modificados.
+
+    Los trades guardados que no están en `df` (manuales o de otras cuentas) se
+    conservan. Devuelve los contadores de `database.save_trades_incremental`
+    más `skipped`, los trades sin fecha de cierre que no se guardaron.
+    """
+    dated, skipped = _dated(df)
+    result = database.save_trades_to_db(to_journal(dated), mode="upsert")
+    return dict(result, skipped=skipped)
+
+
+def replace_trades(df):
+    """Sustituye todo el journal por los trades de `df`; devuelve guardados y descartados"""
+    dated, skipped = _dated(df)
+    database.save_trades_to_db(to_journal(dated), mode="replace")
+    return {'inserted': len(dated), 'skipped': skipped}
+
+
+def add_trade(trade):
+    """Guarda un trade suelto (dict con columnas del CSV)"""
+    values = {CSV_TO_JOURNAL[col]: None if pd.isna(value) else value
+              for col, value in trade.items() if col in CSV_TO_JOURNAL}
+    return database.add_single_trade(**values)
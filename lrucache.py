@@ -0,0 +1,55 @@
+"""Caché LRU acotada y segura entre hilos para los resultados memorizados por hash.
+
+Streamlit atiende cada sesión en un hilo, así que `ingest`, `drawdown` y
+`montecarlo` comparten esta caché: un `OrderedDict` protegido por un lock que
+desaloja el elemento usado hace más tiempo al superar la capacidad.
+"""
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Hasta `capacity` valores por clave, con contadores de aciertos, fallos y desalojos"""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key):
+        """Valor de `key` (y lo marca como recién usado) o None si no está"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._items[key]
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key, value):
+        """Guarda `value` desalojando los más antiguos si se supera la capacidad"""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def pop(self, key):
+        """Quita `key`; devuelve True si estaba"""
+        with self._lock:
+            if self._items.pop(key, None) is None:
+                return False
+            self._stats['evictions'] += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._stats['evictions'] += len(self._items)
+            self._items.clear()
+
+    def stats(self):
+        """Aciertos, fallos, desalojos, tamaño actual y capacidad"""
+        with self._lock:
+            return dict(self._stats, size=len(self._items), capacity=self.capacity)
@@ -0,0 +1,188 @@
+"""Simulación Monte Carlo de la curva de capital.
+
+La secuencia de profits de los trades se remuestrea (`bootstrap`, con
+reemplazo) o se baraja (`shuffle`, sin reemplazo) para obtener miles de
+curvas de capital posibles. Las simulaciones se calculan por bloques de
+memoria acotada (`BLOCK_BYTES`) como matrices de NumPy: una fila por curva,
+`cumsum` y `maximum.accumulate` a lo largo de los trades. Cada bloque usa su
+propio generador (`seed`, índice de bloque), así que el resultado es el mismo
+en serie o repartido en el pool de procesos de `parallel`.
+
+De cada curva se guardan el drawdown máximo, el profit final, si tocó el nivel
+de ruina y su valor en `CHECKPOINTS` puntos para las bandas de percentiles.
+Los resultados se memorizan por dataset, semilla y parámetros.
+"""
+import hashlib
+import os
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+import parallel
+import lrucache
+
+METHODS = ['bootstrap', 'shuffle']
+DEFAULT_SIMULATIONS = 10_000
+# Memoria aproximada de las matrices de un bloque
+BLOCK_BYTES = 64 * 2**20
+# Puntos de la curva que se guardan de cada simulación para las bandas
+CHECKPOINTS = 200
+# Percentiles de las bandas y de los resúmenes
+PERCENTILES = [5, 25, 50, 75, 95]
+# Celdas (simulaciones x trades) a partir de las que se usa el pool
+PARALLEL_MIN_CELLS = 200_000_000
+# Resultados que se conservan en memoria
+MAX_CACHED_RESULTS = 8
+
+_cache = lrucache.LRUCache(MAX_CACHED_RESULTS)
+
+
+@dataclass(frozen=True)
+class SimulationResult:
+    """Resultado de `simulate`; los importes están en USD"""
+    simulations: int
+    method: str
+    seed: int
+    capital: float
+    ruin_level: float          # capital por debajo del cual la cuenta se da por arruinada
+    max_drawdown: np.ndarray   # drawdown máximo de cada simulación (negativo)
+    final_profit: np.ndarray   # profit acumulado al final de cada simulación
+    ruined: np.ndarray         # True si la simulación tocó `ruin_level`
+    # Trade_Number y una columna P5 ... P95 con el profit acumulado en cada punto
+    bands: pd.DataFrame
+
+    @property
+    def risk_of_ruin(self):
+        """Proporción de simulaciones que tocan el nivel de ruina"""
+        return float(self.ruined.mean()) if len(self.ruined) else 0.0
+
+    def summary(self):
+        """Percentiles del profit final y del drawdown máximo"""
+        return pd.DataFrame({
+            'Percentil': [f"P{p}" for p in PERCENTILES],
+            'Profit_Final': np.percentile(self.final_profit, PERCENTILES),
+            'Max_Drawdown': np.percentile(self.max_drawdown, PERCENTILES)
+        })
+
+
+def _checkpoints(n):
+    """Índices (0-based) de los trades donde se guardan las curvas"""
+    return np.unique(np.linspace(0, n - 1, min(n, CHECKPOINTS)).astype('int64'))
+
+
+def _block_rows(n):
+    # Índices, curva y máximo acumulado: unas 3 matrices de 8 bytes por celda
+    return max(1, BLOCK_BYTES // (24 * n))
+
+
+def _simulate_block(profits, rows, method, seed, block, ruin_profit, checkpoints):
+    """Simula `rows` curvas; devuelve (drawdown máximo, profit final, ruina, valores en los checkpoints)"""
+    rng = np.random.default_rng([seed, block])
+    n = len(profits)
+    if method == 'bootstrap':
+        paths = profits[rng.integers(0, n, size=(rows, n))]
+    else:
+        paths = rng.permuted(np.broadcast_to(profits, (rows, n)), axis=1)
+
+    np.cumsum(paths, axis=1, out=paths)
+    lowest = paths.min(axis=1)
+    final = paths[:, -1].copy()
+    sampled = paths[:, checkpoints]
+    # El capital inicial (profit 0) cuenta como primer máximo
+    running_max = np.maximum.accumulate(paths, axis=1)
+    np.maximum(running_max, 0, out=running_max)
+    np.subtract(paths, running_max, out=paths)
+    max_drawdown = paths.min(axis=1)
+    return max_drawdown, final, lowest <= ruin_profit, sampled
+
+
+def _simulate_shared(shm_name, n, rows, method, seed, block, ruin_profit, checkpoints):
+    """Tarea del pool: lee los profits de memoria compartida"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        profits = np.ndarray(n, dtype='float64', buffer=shm.buf)
+        return _simulate_block(profits, rows, method, seed, block, ruin_profit, checkpoints)
+    finally:
+        del profits
+        shm.close()
+
+
+def use_parallel(simulations, n):
+    """True si la simulación justifica el pool en esta máquina"""
+    return simulations * n >= PARALLEL_MIN_CELLS and (os.cpu_count() or 1) > 1
+
+
+def _run(profits, simulations, method, seed, ruin_profit, checkpoints, use_pool):
+    n = len(profits)
+    rows = _block_rows(n)
+    blocks = [(block, min(rows, simulations - start)) for block, start in enumerate(range(0, simulations, rows))]
+    if not use_pool:
+        return [_simulate_block(profits, size, method, seed, block, ruin_profit, checkpoints)
+                for block, size in blocks]
+
+    shm = shared_memory.SharedMemory(create=True, size=8 * n)
+    try:
+        np.ndarray(n, dtype='float64', buffer=shm.buf)[:] = profits
+        executor = parallel.get_executor()
+        futures = [executor.submit(_simulate_shared, shm.name, n, size, method, seed, block, ruin_profit, checkpoints)
+                   for block, size in blocks]
+        return [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def simulate(profits, simulations=DEFAULT_SIMULATIONS, method='bootstrap', seed=42, capital=10_000.0,
+             ruin_fraction=0.5, key=None, parallel_mode=None):
+    """Simula `simulations` curvas de capital a partir de `profits` (en orden cronológico).
+
+    `method` es 'bootstrap' (con reemplazo) o 'shuffle' (mismo conjunto de
+    trades en otro orden). La cuenta se da por arruinada si el capital
+    (`capital` + profit acumulado) cae a `capital * (1 - ruin_fraction)` o
+    menos. `key` identifica el dataset para la caché (p. ej. el hash de
+    `drawdown.dataset_hash`); si no se da, se usa el hash de `profits`. Con
+    `parallel_mode=None` el pool se usa según `use_parallel`.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Método desconocido: {method} (usar {', '.join(METHODS)})")
+    profits = np.ascontiguousarray(profits, dtype='float64')
+    n = len(profits)
+    if n == 0 or simulations <= 0:
+        raise ValueError("Se necesitan trades y al menos una simulación")
+
+    if key is None:
+        key = hashlib.sha256(profits.tobytes()).hexdigest()
+    cache_key = (key, simulations, method, seed, float(capital), float(ruin_fraction))
+    cached = _cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    ruin_level = capital * (1 - ruin_fraction)
+    checkpoints = _checkpoints(n)
+    use_pool = use_parallel(simulations, n) if parallel_mode is None else parallel_mode
+    parts = _run(profits, simulations, method, seed, ruin_level - capital, checkpoints, use_pool)
+
+    max_drawdown, final, ruined, sampled = (np.concatenate(values) for values in zip(*parts))
+    bands = pd.DataFrame(np.percentile(sampled, PERCENTILES, axis=0).T, columns=[f"P{p}" for p in PERCENTILES])
+    bands.insert(0, 'Trade_Number', checkpoints + 1)
+
+    result = SimulationResult(
+        simulations=simulations,
+        method=method,
+        seed=seed,
+        capital=float(capital),
+        ruin_level=ruin_level,
+        max_drawdown=max_drawdown,
+        final_profit=final,
+        ruined=ruined,
+        bands=bands
+    )
+    _cache.put(cache_key, result)
+    return result
+
+
+def clear_cache():
+    """Vacía la caché de simulaciones"""
+    _cache.clear()
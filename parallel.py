@@ -0,0 +1,158 @@
+"""Agregados por grupo (símbolo, día de la semana y mes) en paralelo.
+
+Por debajo de `PARALLEL_MIN_ROWS` filas todo se calcula en el proceso actual.
+Por encima, las columnas se copian una vez a memoria compartida y cada
+proceso del pool calcula sumas, cantidades y ganadores de un tramo de filas
+contiguo; los parciales se suman en el proceso principal. Como se combinan
+sumas y conteos (nunca medias), el resultado es el mismo que el serie salvo
+por el orden de las sumas en coma flotante.
+"""
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Filas a partir de las que se usa el pool (sólo si hay más de un núcleo)
+PARALLEL_MIN_ROWS = 2_000_000
+# Procesos del pool; None = un proceso por núcleo
+MAX_WORKERS = None
+
+_US_PER_DAY = 86_400_000_000
+_NAT = np.iinfo('int64').min
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _month_index(close_us):
+    """Meses desde 1970-01 de cada timestamp en microsegundos"""
+    return close_us.astype('datetime64[us]').astype('datetime64[M]').astype('int64')
+
+
+def _aggregate(close_us, profit, symbol_codes, n_symbols, first_month, n_months):
+    """Suma de profit, cantidad y ganadores por símbolo, día de la semana y mes.
+
+    Devuelve {grupo: (total, cantidad, ganadores)}; los códigos de símbolo < 0
+    y las fechas NaT quedan fuera de su agrupación.
+    """
+    wins = (profit > 0).astype('float64')
+    valid = close_us != _NAT
+    times = close_us[valid]
+    # 1970-01-01 fue jueves (3 con lunes = 0)
+    weekday = (np.floor_divide(times, _US_PER_DAY) + 3) % 7
+    month = _month_index(times) - first_month
+
+    def bincount(codes, size, mask=None):
+        p, w = (profit, wins) if mask is None else (profit[mask], wins[mask])
+        return (np.bincount(codes, weights=p, minlength=size),
+                np.bincount(codes, minlength=size),
+                np.bincount(codes, weights=w, minlength=size).astype('int64'))
+
+    known = symbol_codes >= 0
+    return {
+        'symbol': bincount(symbol_codes[known], n_symbols, known),
+        'weekday': bincount(weekday, 7, valid),
+        'month': bincount(month, n_months, valid)
+    }
+
+
+def _partial(shm_name, n, start, end, n_symbols, first_month, n_months):
+    """Tarea del pool: agrega las filas [start, end) leyendo de memoria compartida"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return _aggregate(*(view[start:end] for view in _views(shm.buf, n)), n_symbols, first_month, n_months)
+    finally:
+        shm.close()
+
+
+def _views(buffer, n):
+    """Vistas (fecha en µs, profit, código de símbolo) sobre un bloque de 3 * n * 8 bytes"""
+    close_us = np.ndarray(n, dtype='int64', buffer=buffer, offset=0)
+    profit = np.ndarray(n, dtype='float64', buffer=buffer, offset=8 * n)
+    symbol_codes = np.ndarray(n, dtype='int64', buffer=buffer, offset=16 * n)
+    return close_us, profit, symbol_codes
+
+
+def _fill(buffer, n, arrays):
+    # Las vistas se liberan al salir, antes de cerrar el bloque compartido
+    for view, values in zip(_views(buffer, n), arrays):
+        view[:] = values
+
+
+def get_executor():
+    """Pool de procesos compartido, creado la primera vez que se pide"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: el servidor de Streamlit tiene hilos y fork no es seguro con ellos
+            _executor = ProcessPoolExecutor(max_workers=MAX_WORKERS,
+                                            mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def shutdown():
+    """Cierra el pool de procesos si se llegó a crear"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+            _executor = None
+
+
+atexit.register(shutdown)
+
+
+def use_parallel(n):
+    """True si `n` filas justifican el pool en esta máquina"""
+    return n >= PARALLEL_MIN_ROWS and (os.cpu_count() or 1) > 1
+
+
+def group_aggregates(close_us, profit, symbol_codes, n_symbols, parallel=None):
+    """Agregados por símbolo, día de la semana y mes.
+
+    `close_us` son las fechas de cierre en microsegundos (NaT = mínimo int64),
+    `symbol_codes` los códigos de `pd.factorize`. Con `parallel=None` se usa
+    el pool según `use_parallel`. Devuelve `(grupos, primer_mes)`, donde
+    `grupos` es {grupo: (total, cantidad, ganadores)} y el mes `i` es
+    `primer_mes + i` meses desde 1970-01.
+    """
+    close_us = np.asarray(close_us, dtype='int64')
+    profit = np.asarray(profit, dtype='float64')
+    symbol_codes = np.asarray(symbol_codes, dtype='int64')
+    n = len(profit)
+
+    valid = close_us[close_us != _NAT]
+    if len(valid):
+        first_month = int(_month_index(valid.min()[None])[0])
+        n_months = int(_month_index(valid.max()[None])[0]) - first_month + 1
+    else:
+        first_month, n_months = 0, 0
+
+    if parallel is None:
+        parallel = use_parallel(n)
+    if not parallel or n == 0:
+        return _aggregate(close_us, profit, symbol_codes, n_symbols, first_month, n_months), first_month
+
+    shm = shared_memory.SharedMemory(create=True, size=24 * n)
+    try:
+        _fill(shm.buf, n, (close_us, profit, symbol_codes))
+
+        executor = get_executor()
+        workers = MAX_WORKERS or os.cpu_count() or 1
+        bounds = np.linspace(0, n, workers + 1).astype('int64')
+        futures = [executor.submit(_partial, shm.name, n, int(start), int(end), n_symbols, first_month, n_months)
+                   for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+        partials = [future.result() for future in futures]
+    finally:
+        shm.close()
+        shm.unlink()
+
+    merged = {
+        group: tuple(np.sum([partial[group][i] for partial in partials], axis=0) for i in range(3))
+        for group in partials[0]
+    }
+    return merged, first_month
@@ -0,0 +1,193 @@
+"""Almacenamiento columnar de trades en ficheros Parquet particionados por mes.
+
+Estructura en disco:
+    <root>/month=YYYY-MM/part-<uuid>.parquet
+    <root>/_meta.json          (siguiente id a asignar)
+
+Las escrituras sólo añaden ficheros nuevos a las particiones afectadas; las
+lecturas cargan únicamente las columnas y los meses pedidos.
+"""
+import json
+import os
+import shutil
+import threading
+import uuid
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - dependencia opcional
+    pa = None
+    pc = None
+    pq = None
+
+# Esquema fijo: todas las particiones comparten tipos
+SCHEMA_COLUMNS = {
+    'id': 'int64',
+    'date': 'timestamp',
+    'open_time': 'timestamp',
+    'symbol': 'string',
+    'side': 'string',
+    'quantity': 'float64',
+    'price': 'float64',
+    'commission': 'float64',
+    'pnl': 'float64',
+    'strategy': 'string',
+    'notes': 'string',
+    'market': 'string',
+    'fees': 'float64',
+    'take_profit': 'float64',
+    'stop_loss': 'float64'
+}
+
+_meta_lock = threading.Lock()
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise ImportError("El almacenamiento Parquet requiere `pyarrow` (pip install pyarrow)")
+
+
+def _schema():
+    types = {'int64': pa.int64(), 'float64': pa.float64(), 'string': pa.string(), 'timestamp': pa.timestamp('us')}
+    return pa.schema([(name, types[kind]) for name, kind in SCHEMA_COLUMNS.items()])
+
+
+def _partitions(root):
+    """Devuelve {mes: directorio} de las particiones existentes"""
+    if not os.path.isdir(root):
+        return {}
+    return {
+        entry.name.split('=', 1)[1]: entry.path
+        for entry in os.scandir(root)
+        if entry.is_dir() and entry.name.startswith('month=')
+    }
+
+
+def _partition_files(path):
+    return sorted(entry.path for entry in os.scandir(path) if entry.name.endswith('.parquet'))
+
+
+def _reserve_ids(root, count):
+    """Reserva `count` ids consecutivos y devuelve el primero"""
+    meta_path = os.path.join(root, '_meta.json')
+    with _meta_lock:
+        meta = {'next_id': 1}
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+        first = meta['next_id']
+        meta['next_id'] = first + count
+        os.makedirs(root, exist_ok=True)
+        with open(meta_path, 'w') as f:
+            json.dump(meta, f)
+    return first
+
+
+def _normalize(df):
+    """Ajusta un DataFrame al esquema fijo del almacén"""
+    df = df.copy()
+    for name, kind in SCHEMA_COLUMNS.items():
+        if name not in df.columns:
+            df[name] = 0.0 if name in ('commission', 'pnl', 'fees') else None
+        if kind == 'timestamp':
+            df[name] = pd.to_datetime(df[name])
+        elif kind == 'float64':
+            df[name] = pd.to_numeric(df[name]).astype('float64')
+    return df[list(SCHEMA_COLUMNS)]
+
+
+def append_trades(df, root, keep_ids=False):
+    """Añade trades creando un fichero nuevo por mes afectado. Devuelve los ids asignados.
+
+    Con `keep_ids=True` se conservan los ids de `df` (para reescribir trades
+    modificados); si no, se asignan ids nuevos.
+    """
+    _require_pyarrow()
+    if df.empty:
+        return []
+
+    df = _normalize(df)
+    # Sin fecha no hay partición: el groupby las descartaría devolviendo igualmente sus ids
+    missing = int(df['date'].isna().sum())
+    if missing:
+        raise ValueError(f"{missing} trades no tienen fecha de cierre; no se pueden guardar")
+    if not keep_ids:
+        first_id = _reserve_ids(root, len(df))
+        df = df.assign(id=range(first_id, first_id + len(df)))
+
+    schema = _schema()
+    months = df['date'].dt.strftime('%Y-%m')
+    for month, part in df.groupby(months, sort=False):
+        directory = os.path.join(root, f"month={month}")
+        os.makedirs(directory, exist_ok=True)
+        table = pa.Table.from_pandas(part, schema=schema, preserve_index=False)
+        pq.write_table(table, os.path.join(directory, f"part-{uuid.uuid4().hex}.parquet"))
+
+    return df['id'].tolist()
+
+
+def replace_trades(df, root):
+    """Sustituye todo el contenido del almacén por `df`"""
+    if os.path.isdir(root):
+        shutil.rmtree(root)
+    return append_trades(df, root)
+
+
+def read_trades(root, columns=None, start_date=None, end_date=None):
+    """Lee los trades cargando sólo `columns` y las particiones del rango de fechas.
+
+    `start_date` es inclusivo y `end_date` exclusivo, como en `database.query_trades`.
+    """
+    _require_pyarrow()
+    columns = list(SCHEMA_COLUMNS) if columns is None else list(columns)
+    start = pd.Timestamp(start_date) if start_date is not None else None
+    end = pd.Timestamp(end_date) if end_date is not None else None
+
+    files = []
+    for month, path in sorted(_partitions(root).items()):
+        month_start = pd.Timestamp(f"{month}-01")
+        if start is not None and month_start + pd.offsets.MonthBegin(1) <= start:
+            continue
+        if end is not None and month_start >= end:
+            continue
+        files.extend(_partition_files(path))
+
+    if not files:
+        return _schema().empty_table().select(columns).to_pandas()
+
+    # La fecha se lee aunque no se pida si hay que filtrar filas dentro del mes
+    needs_date = (start is not None or end is not None) and 'date' not in columns
+    # Con el esquema fijo, las columnas añadidas después se leen como nulas en ficheros antiguos
+    table = pq.ParquetDataset(files, schema=_schema()).read(columns=columns + ['date'] if needs_date else columns)
+    df = table.to_pandas()
+    if start is not None:
+        df = df[df['date'] >= start]
+    if end is not None:
+        df = df[df['date'] < end]
+    if needs_date:
+        df = df.drop(columns=['date'])
+    return df.reset_index(drop=True)
+
+
+def delete_trades(ids, root):
+    """Borra trades por id reescribiendo sólo los ficheros que los contienen"""
+    _require_pyarrow()
+    ids = pa.array(list(ids), type=pa.int64())
+    deleted = 0
+    for path in _partitions(root).values():
+        for file in _partition_files(path):
+            present = pc.is_in(pq.read_table(file, columns=['id'])['id'], value_set=ids)
+            hits = pc.sum(present).as_py() or 0
+            if not hits:
+                continue
+            remaining = pq.read_table(file).filter(pc.invert(present))
+            # El fichero nuevo se escribe antes de borrar el viejo: un fallo a medias no pierde trades
+            if remaining.num_rows:
+                pq.write_table(remaining, os.path.join(path, f"part-{uuid.uuid4().hex}.parquet"))
+            os.remove(file)
+            deleted += hits
+    return deleted
@@ -0,0 +1,120 @@
+"""Perfilado por sección de los reruns del dashboard.
+
+`App.py` es un script lineal, así que las secciones se marcan por vueltas:
+`section(nombre)` cierra la sección anterior y abre la siguiente, y
+`finish()` cierra la última y guarda el rerun. De cada sección se registra el
+tiempo de pared, el pico de memoria por encima de la memoria al entrar
+(con `tracemalloc`, que también ve las asignaciones de NumPy y pandas) y las
+filas procesadas. Desactivado, cada llamada sale en la primera línea y
+`tracemalloc` no está activo.
+"""
+import json
+import threading
+import time
+import tracemalloc
+from collections import deque
+
+# Reruns que se conservan para la traza JSON
+MAX_RUNS = 20
+
+# `tracemalloc` es global al proceso: se mantiene activo mientras algún perfilador lo use
+_tracing_users = 0
+_tracing_lock = threading.Lock()
+
+
+def _acquire_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+
+
+def _release_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users = max(_tracing_users - 1, 0)
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class Profiler:
+    """Registro de tiempos, memoria y filas por sección de cada rerun"""
+
+    def __init__(self, enabled=False):
+        self.enabled = False
+        self.runs = deque(maxlen=MAX_RUNS)
+        self._sections = None
+        self._current = None
+        self.set_enabled(enabled)
+
+    def set_enabled(self, enabled):
+        """Activa o desactiva el perfilado; al desactivarlo se descarta el rerun en curso"""
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        if enabled:
+            _acquire_tracing()
+        else:
+            self._sections = self._current = None
+            _release_tracing()
+
+    def start_run(self):
+        """Empieza un rerun nuevo"""
+        if not self.enabled:
+            return
+        self._sections = []
+        self._current = None
+        self._run_start = time.perf_counter()
+
+    def section(self, name, rows=None):
+        """Cierra la sección abierta (si hay) y abre `name`"""
+        if not self.enabled or self._sections is None:
+            return
+        self._close()
+        tracemalloc.reset_peak()
+        self._current = {'section': name, 'rows': rows, 'start': time.perf_counter(),
+                         'memory': tracemalloc.get_traced_memory()[0]}
+
+    def rows(self, rows):
+        """Filas procesadas por la sección abierta, si no se conocían al abrirla"""
+        if self.enabled and self._current is not None:
+            self._current['rows'] = rows
+
+    def _close(self):
+        current = self._current
+        if current is None:
+            return
+        elapsed = time.perf_counter() - current['start']
+        peak = tracemalloc.get_traced_memory()[1]
+        self._sections.append({
+            'section': current['section'],
+            'ms': elapsed * 1000,
+            'peak_mb': max(peak - current['memory'], 0) / 2**20,
+            'rows': current['rows']
+        })
+        self._current = None
+
+    def finish(self):
+        """Cierra la última sección y guarda el rerun"""
+        if not self.enabled or self._sections is None:
+            return
+        self._close()
+        self.runs.append({
+            'timestamp': time.time(),
+            'total_ms': (time.perf_counter() - self._run_start) * 1000,
+            'sections': self._sections
+        })
+        self._sections = None
+
+    def last_run(self):
+        """Último rerun completo o None"""
+        return self.runs[-1] if self.runs else None
+
+    def to_json(self):
+        """Traza JSON con los últimos `MAX_RUNS` reruns"""
+        return json.dumps({'runs': list(self.runs)}, indent=2)
+
+    def __del__(self):
+        if self.enabled:
+            _release_tracing()
@@ -0,0 +1,239 @@
+"""Informes del Trading Journal sin Streamlit.
+
+Calcula las métricas del dashboard para uno o varios CSV de broker o journals
+de `database.py` y las escribe en JSON, HTML o XLSX. Pensado para tareas
+nocturnas sobre muchas cuentas: al arrancar sólo se importa la librería
+estándar; pandas y las métricas se cargan al leer el primer archivo, plotly
+sólo para HTML y openpyxl sólo para XLSX. Con varias entradas, cada una se
+procesa en un proceso del pool.
+
+Uso:
+    python report_cli.py cuenta1.csv cuenta2.csv --format json html --output-dir informes
+    python report_cli.py --journal trading_journal.db --format xlsx
+    python report_cli.py --journal antiguo.db --migrate
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+FORMATS = {'json': '.json', 'html': '.html', 'xlsx': '.xlsx'}
+# Columnas de cada trade destacado (mejor y peor) que van al informe
+TRADE_FIELDS = ['Symbol', 'Side', 'Open Time', 'Close Time', 'Profit (USD)']
+SUMMARY_FIELDS = ['total_trades', 'winning_trades', 'losing_trades', 'win_rate', 'total_profit', 'avg_win',
+                  'avg_loss', 'profit_factor', 'max_drawdown', 'avg_duration', 'max_duration']
+SUMMARY_LABELS = {
+    'total_trades': "Total Trades",
+    'winning_trades': "Trades Ganadores",
+    'losing_trades': "Trades Perdedores",
+    'win_rate': "Win Rate (%)",
+    'total_profit': "Profit Total ($)",
+    'avg_win': "Ganancia Promedio ($)",
+    'avg_loss': "Pérdida Promedio ($)",
+    'profit_factor': "Profit Factor",
+    'max_drawdown': "Max Drawdown ($)",
+    'avg_duration': "Duración Promedio (horas)",
+    'max_duration': "Duración Máxima (horas)"
+}
+
+
+def load_trades(kind, path, migrate=False):
+    """Trades con el esquema del CSV: `kind` es 'csv' (export del broker) o 'journal' (base SQLite).
+
+    Un journal con un esquema anterior sólo se lee con `migrate=True`, que lo
+    actualiza en el sitio; si no, se rechaza con un error claro.
+    """
+    if kind == 'csv':
+        import ingest
+        with open(path, 'rb') as f:
+            return ingest.ingest_csv(f.read())[1]
+
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No existe el journal: {path}")
+    import database
+    import journal_store
+    database.DB_NAME = path
+    version = database.get_schema_version()
+    if version < database.SCHEMA_VERSION:
+        if not migrate:
+            raise ValueError(f"El journal necesita migración (esquema v{version}, actual v{database.SCHEMA_VERSION}); "
+                             "repetir con --migrate para actualizarlo")
+        database.migrate_database()
+    return journal_store.load_trades()
+
+
+def _scalar(value):
+    """Escalar de NumPy como tipo de Python, para JSON"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+def _trade(trade):
+    """Campos de `TRADE_FIELDS` de un trade destacado, listos para JSON"""
+    return {field: str(trade[field]) if 'Time' in field else _scalar(trade[field])
+            for field in TRADE_FIELDS if field in trade.index}
+
+
+def build_report(df, source):
+    """Métricas del dashboard de `df` como dict: resumen, trades destacados y tablas"""
+    import analytics
+    metrics = analytics.compute_metrics(df)
+    return {
+        'source': source,
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'summary': {field: _scalar(getattr(metrics, field)) for field in SUMMARY_FIELDS},
+        'best_trade': _trade(metrics.best_trade) if metrics.total_trades else None,
+        'worst_trade': _trade(metrics.worst_trade) if metrics.total_trades else None,
+        'by_symbol': metrics.by_symbol,
+        'by_weekday': metrics.by_weekday,
+        'by_month': metrics.by_month,
+        'equity': metrics.equity
+    }
+
+
+def _clean(value):
+    """NaN e infinitos no son JSON válido"""
+    return None if isinstance(value, float) and (value != value or value in (float('inf'), float('-inf'))) else value
+
+
+def write_json(report, path):
+    tables = {name: [{key: _clean(value) for key, value in row.items()} for row in report[name].to_dict('records')]
+              for name in ('by_symbol', 'by_weekday', 'by_month')}
+    payload = dict(report, summary={key: _clean(value) for key, value in report['summary'].items()}, **tables)
+    del payload['equity']
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False, default=str)
+
+
+def write_html(report, path):
+    import pandas as pd
+    import plotly.graph_objects as go
+    import charts
+
+    summary = pd.DataFrame({'Métrica': [SUMMARY_LABELS[field] for field in SUMMARY_FIELDS],
+                            'Valor': [report['summary'][field] for field in SUMMARY_FIELDS]})
+    sections = [f"<h1>📊 Informe de Trading: {report['source']}</h1>",
+                f"<p>Generado: {report['generated_at']}</p>",
+                "<h2>Métricas Principales</h2>", summary.to_html(index=False, float_format="{:,.2f}".format)]
+
+    if len(report['equity']):
+        equity, _ = charts.downsample_equity(report['equity'])
+        fig = go.Figure(go.Scatter(x=equity['Close Time'], y=equity['Cumulative_Profit'], mode='lines',
+                                   name='Capital Acumulado', line=dict(color='#3b82f6', width=2)))
+        fig.update_layout(title="Evolución del Capital", xaxis_title="Fecha", yaxis_title="Profit Acumulado ($)",
+                          template='plotly_white', height=450)
+        sections += ["<h2>Evolución del Capital</h2>", fig.to_html(full_html=False, include_plotlyjs='cdn')]
+
+    for title, name in (("Por Símbolo", 'by_symbol'), ("Por Día de la Semana", 'by_weekday'), ("Por Mes", 'by_month')):
+        sections += [f"<h2>{title}</h2>", report[name].to_html(index=False, float_format="{:,.2f}".format)]
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("<!DOCTYPE html>\n<html><head><meta charset='utf-8'>"
+                f"<title>Informe {report['source']}</title></head><body>\n" + "\n".join(sections) + "\n</body></html>\n")
+
+
+def write_xlsx(report, path):
+    import pandas as pd
+
+    summary = pd.DataFrame({'Métrica': [SUMMARY_LABELS[field] for field in SUMMARY_FIELDS],
+                            'Valor': [report['summary'][field] for field in SUMMARY_FIELDS]})
+    with pd.ExcelWriter(path, engine='openpyxl') as writer:
+        summary.to_excel(writer, sheet_name='Resumen', index=False)
+        report['by_symbol'].to_excel(writer, sheet_name='Por Símbolo', index=False)
+        report['by_weekday'].to_excel(writer, sheet_name='Por Día', index=False)
+        report['by_month'].to_excel(writer, sheet_name='Por Mes', index=False)
+
+
+WRITERS = {'json': write_json, 'html': write_html, 'xlsx': write_xlsx}
+
+
+def process(kind, path, formats, output, migrate=False):
+    """Lee una entrada y escribe sus informes; devuelve (trades, [rutas], segundos).
+
+    `output` es la ruta base de los informes sin extensión. Es la tarea de
+    cada proceso del pool: los DataFrames no vuelven al proceso principal.
+    """
+    start = time.perf_counter()
+    df = load_trades(kind, path, migrate)
+    report = build_report(df, os.path.basename(path))
+    written = []
+    for fmt in formats:
+        WRITERS[fmt](report, output + FORMATS[fmt])
+        written.append(output + FORMATS[fmt])
+    return len(df), written, time.perf_counter() - start
+
+
+def _outputs(inputs, output_dir):
+    """Ruta base del informe de cada entrada; los nombres repetidos llevan un sufijo"""
+    outputs, seen = [], {}
+    for _, path in inputs:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        seen[stem] = seen.get(stem, 0) + 1
+        name = f"{stem}_report" if seen[stem] == 1 else f"{stem}_{seen[stem]}_report"
+        outputs.append(os.path.join(output_dir, name))
+    return outputs
+
+
+def run(inputs, formats, output_dir, workers=None, migrate=False):
+    """Procesa `inputs` (pares (tipo, ruta)) y devuelve {ruta: resultado de `process` o la excepción}.
+
+    Con más de una entrada y más de un worker se reparten en un pool de
+    procesos (contexto spawn, como `parallel`); si no, se procesan en este.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = _outputs(inputs, output_dir)
+    workers = min(workers or os.cpu_count() or 1, len(inputs))
+
+    results = {}
+    if workers <= 1:
+        for (kind, path), output in zip(inputs, outputs):
+            try:
+                results[path] = process(kind, path, formats, output, migrate)
+            except Exception as e:
+                results[path] = e
+        return results
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = {path: executor.submit(process, kind, path, formats, output, migrate)
+                   for (kind, path), output in zip(inputs, outputs)}
+        for path, future in futures.items():
+            try:
+                results[path] = future.result()
+            except Exception as e:
+                results[path] = e
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Informes del Trading Journal sin Streamlit")
+    parser.add_argument("csv", nargs="*", help="CSV exportados del broker")
+    parser.add_argument("--journal", action="append", default=[], help="base SQLite del journal (repetible)")
+    parser.add_argument("--format", nargs="+", choices=list(FORMATS), default=['json'], dest="formats")
+    parser.add_argument("--output-dir", default="informes")
+    parser.add_argument("--workers", type=int, help="procesos en paralelo (por defecto, uno por CPU)")
+    parser.add_argument("--migrate", action="store_true", help="actualizar al esquema actual los journals antiguos")
+    args = parser.parse_args(argv)
+
+    inputs = [('csv', path) for path in args.csv] + [('journal', path) for path in args.journal]
+    if not inputs:
+        parser.error("indicar al menos un CSV o un --journal")
+
+    start = time.perf_counter()
+    results = run(inputs, args.formats, args.output_dir, args.workers, args.migrate)
+    failed = 0
+    for path, result in results.items():
+        if isinstance(result, Exception):
+            failed += 1
+            print(f"❌ {path}: {result}", file=sys.stderr)
+        else:
+            trades, written, seconds = result
+            print(f"✅ {path}: {trades:,} trades -> {', '.join(written)} ({seconds:.2f} s)")
+    print(f"{len(results) - failed}/{len(results)} informes en {time.perf_counter() - start:.2f} s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
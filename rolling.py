@@ -0,0 +1,105 @@
+"""Métricas móviles sobre los últimos N trades o los últimos T días.
+
+Las sumas de cada ventana salen de sumas acumuladas calculadas una sola vez:
+lo acumulado en el trade i menos lo acumulado antes del inicio de su ventana.
+Así cada ventana cuesta O(n) aunque se pidan varios tamaños a la vez. El
+inicio de las ventanas por días se busca con `searchsorted` sobre las fechas
+ordenadas. El máximo de la curva dentro de la ventana, para el drawdown, sale
+del `rolling().max()` de pandas, que recorre la serie con una cola monótona.
+"""
+import numpy as np
+import pandas as pd
+
+# Tipos de ventana: cantidad de trades o días de calendario
+WINDOW_KINDS = ['trades', 'days']
+METRIC_COLUMNS = ['Win_Rate', 'Profit_Factor', 'Expectancy', 'Avg_Win', 'Avg_Loss', 'Sharpe', 'Drawdown']
+
+
+def _window_starts(close_time, window, by):
+    """Índice del primer trade de la ventana que termina en cada trade"""
+    n = len(close_time)
+    if by == 'trades':
+        return np.maximum(np.arange(n) - (window - 1), 0)
+    return np.searchsorted(close_time, close_time - np.timedelta64(int(window), 'D'), side='right')
+
+
+def _window_max(cumulative, close_time, window, by):
+    """Máximo de la curva dentro de cada ventana (cola monótona de pandas)"""
+    if by == 'trades':
+        return pd.Series(cumulative).rolling(window, min_periods=1).max().to_numpy()
+    series = pd.Series(cumulative, index=pd.DatetimeIndex(close_time))
+    return series.rolling(f"{int(window)}D").max().to_numpy()
+
+
+def rolling_metrics(close_time, profit, windows, by='trades'):
+    """Métricas de cada ventana que termina en cada trade.
+
+    `close_time` y `profit` son los trades en orden cronológico (los que no lo
+    estén se ordenan). `windows` es un tamaño o una lista de tamaños, en trades
+    o en días según `by`. Devuelve {ventana: DataFrame} con Close Time,
+    Trades (en la ventana) y `METRIC_COLUMNS`: win rate (%), profit factor (0
+    sin pérdidas, como en `analytics`), expectancy, ganancia y pérdida
+    promedio, Sharpe por trade (media / desvío) y drawdown desde el máximo de
+    la ventana, contando el capital con el que se abrió.
+    """
+    if by not in WINDOW_KINDS:
+        raise ValueError(f"Tipo de ventana desconocido: {by} (usar {', '.join(WINDOW_KINDS)})")
+    windows = [windows] if np.isscalar(windows) else list(windows)
+    if any(window < 1 for window in windows):
+        raise ValueError("Las ventanas deben ser de al menos 1")
+
+    close_time = np.asarray(close_time, dtype='datetime64[us]')
+    profit = np.asarray(profit, dtype='float64')
+    missing = np.isnat(close_time)
+    if by == 'days' and missing.any():
+        # Sin fecha no hay ventana de días: esos trades van al final (como en
+        # `np.sort`) con las métricas en NaN
+        result = rolling_metrics(close_time[~missing], profit[~missing], windows, by)
+        times = np.concatenate([result[windows[0]]['Close Time'].to_numpy(), close_time[missing]])
+        return {window: df.reindex(range(len(close_time))).assign(**{'Close Time': times})
+                for window, df in result.items()}
+    if len(close_time) > 1 and np.any(close_time[1:] < close_time[:-1]):
+        order = np.argsort(close_time, kind='stable')
+        close_time, profit = close_time[order], profit[order]
+    n = len(profit)
+
+    # Sumas acumuladas con un 0 inicial: profit, profit centrado al cuadrado
+    # (centrar evita perder precisión en la varianza), ganadores, ganancia y pérdida
+    wins = profit > 0
+    mean = profit.mean() if n else 0.0
+    prefix = np.zeros((5, n + 1))
+    np.cumsum(np.stack([profit, (profit - mean) ** 2, wins, np.where(wins, profit, 0.0),
+                        np.where(wins, 0.0, profit)]), axis=1, out=prefix[:, 1:])
+    cumulative = prefix[0, 1:]
+    positions = np.arange(1, n + 1)
+
+    result = {}
+    for window in windows:
+        starts = _window_starts(close_time, window, by)
+        total, squares, won, gross_win, gross_loss = prefix[:, 1:] - prefix[:, starts]
+        count = positions - starts
+        lost = count - won
+        with np.errstate(divide='ignore', invalid='ignore'):
+            expectancy = total / count
+            centered = total - count * mean
+            variance = np.maximum(squares - centered ** 2 / count, 0.0) / (count - 1)
+            std = np.sqrt(variance)
+            sharpe = np.where((count > 1) & (std > 0), expectancy / std, np.nan)
+            avg_win = np.where(won > 0, gross_win / won, np.nan)
+            avg_loss = np.where(lost > 0, gross_loss / lost, np.nan)
+            profit_factor = np.where((lost > 0) & (gross_loss != 0), np.abs(gross_win / gross_loss), 0.0)
+
+        # El pico incluye el capital al abrir la ventana (lo acumulado antes del primer trade)
+        peak = np.maximum(_window_max(cumulative, close_time, window, by), prefix[0, starts])
+        result[window] = pd.DataFrame({
+            'Close Time': close_time,
+            'Trades': count,
+            'Win_Rate': won / count * 100,
+            'Profit_Factor': profit_factor,
+            'Expectancy': expectancy,
+            'Avg_Win': avg_win,
+            'Avg_Loss': avg_loss,
+            'Sharpe': sharpe,
+            'Drawdown': cumulative - peak
+        })
+    return result
@@ -0,0 +1,190 @@
+"""`analytics` frente a las fórmulas pandas que App.py calculaba en línea"""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import analytics
+import ingest
+import parallel
+
+DAYS = {0: 'Lunes', 1: 'Martes', 2: 'Miércoles', 3: 'Jueves', 4: 'Viernes', 5: 'Sábado', 6: 'Domingo'}
+SCALARS = ['total_trades', 'winning_trades', 'losing_trades', 'win_rate', 'total_profit', 'avg_win', 'avg_loss',
+           'profit_factor', 'max_drawdown', 'avg_duration', 'max_duration']
+# Columnas de un trade tal como las recibe `IncrementalMetrics.append`
+TRADE_COLUMNS = ['Market', 'Portfolio', 'Symbol', 'Side', 'Open Time', 'Size', 'Open Price', 'Commission', 'Fees',
+                 'Profit (USD)', 'Close Time', 'Take Profit', 'Stop Loss']
+
+
+def broker_csv(n, seed):
+    """CSV sintético con las columnas del export del broker"""
+    rng = np.random.default_rng(seed)
+    open_time = pd.Timestamp('2023-01-02') + pd.to_timedelta(np.sort(rng.integers(0, 400 * 86400, n)), unit='s')
+    close_time = open_time + pd.to_timedelta(rng.integers(60, 86400, n), unit='s')
+    return pd.DataFrame({
+        'Order ID': np.arange(n),
+        'Market': rng.choice(['STOCK', 'FOREX'], n),
+        'Portfolio': 'Main',
+        'Symbol': rng.choice(['AAPL', 'MSFT', 'EURUSD', 'TSLA'], n),
+        'Side': rng.choice(['BUY', 'SELL'], n),
+        'Open Time': open_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'Close Time': close_time.strftime('%Y-%m-%d %H:%M:%S'),
+        'Size': rng.integers(1, 10, n),
+        'Open Price': rng.uniform(1, 300, n).round(4),
+        'Commission': 0.5,
+        'Fees': 0.1,
+        # Algunos trades a cero: cuentan como pérdida, igual que en el cálculo original
+        'Profit (USD)': np.where(rng.random(n) < 0.03, 0, rng.normal(5, 50, n).round(2)),
+        'Take Profit': np.nan,
+        'Stop Loss': np.nan
+    }).to_csv(index=False).encode()
+
+
+def trades(n=2000, seed=0):
+    return ingest.prepare_trades(pd.read_csv(io.BytesIO(broker_csv(n, seed))))
+
+
+def legacy_metrics(df):
+    """Las fórmulas originales del dashboard, antes de `analytics`"""
+    df = df.copy()
+    df['Close Time'] = pd.to_datetime(df['Close Time'])
+    df_sorted = df.sort_values('Close Time', kind='stable')
+    df_sorted['Cumulative_Profit'] = df_sorted['Profit (USD)'].cumsum()
+
+    total_trades = len(df)
+    winning_trades = len(df[df['Result'] == 'Win'])
+    losing_trades = len(df[df['Result'] == 'Loss'])
+    avg_win = df[df['Result'] == 'Win']['Profit (USD)'].mean() if winning_trades > 0 else 0
+    avg_loss = df[df['Result'] == 'Loss']['Profit (USD)'].mean() if losing_trades > 0 else 0
+    running_max = df_sorted['Cumulative_Profit'].expanding().max()
+    drawdown = df_sorted['Cumulative_Profit'] - running_max
+    scalars = {
+        'total_trades': total_trades,
+        'winning_trades': winning_trades,
+        'losing_trades': losing_trades,
+        'win_rate': winning_trades / total_trades * 100,
+        'total_profit': df['Profit (USD)'].sum(),
+        'avg_win': avg_win,
+        'avg_loss': avg_loss,
+        'profit_factor': abs(avg_win * winning_trades / (avg_loss * losing_trades))
+        if losing_trades > 0 and avg_loss != 0 else 0,
+        'max_drawdown': drawdown.min(),
+        'avg_duration': df['Duration (hours)'].mean(),
+        'max_duration': df['Duration (hours)'].max()
+    }
+    equity = pd.DataFrame({'Cumulative_Profit': df_sorted['Cumulative_Profit'].to_numpy(),
+                           'Running_Max': running_max.to_numpy(), 'Drawdown': drawdown.to_numpy()})
+
+    def grouped(key, columns):
+        table = df.groupby(key).agg({
+            'Profit (USD)': ['sum', 'mean', 'count'],
+            'Result': [lambda x: (x == 'Win').sum(), lambda x: (x == 'Win').mean()]
+        }).reset_index()
+        table.columns = columns
+        return table
+
+    by_symbol = grouped('Symbol', ['Symbol', 'Total_Profit', 'Avg_Profit', 'Total_Trades', 'Winning_Trades', 'Win_Rate'])
+    by_symbol = by_symbol.sort_values('Total_Profit', ascending=False)
+
+    df['Day_Name'] = df['Close Time'].dt.dayofweek.map(DAYS)
+    by_weekday = grouped('Day_Name', ['Día', 'Profit_Total', 'Profit_Promedio', 'Cantidad_Trades', 'Trades_Ganadores',
+                                      'Win_Rate'])
+    by_weekday['Día'] = pd.Categorical(by_weekday['Día'], categories=DAYS.values(), ordered=True)
+    by_weekday = by_weekday.sort_values('Día')
+
+    df['Month-Year'] = df['Close Time'].dt.to_period('M').astype(str)
+    by_month = grouped('Month-Year', ['Mes', 'Total_Profit', 'Avg_Profit', 'Total_Trades', 'Winning_Trades', 'Win_Rate'])
+
+    tables = {'by_symbol': by_symbol, 'by_weekday': by_weekday, 'by_month': by_month}
+    return scalars, equity, {name: table.reset_index(drop=True) for name, table in tables.items()}
+
+
+def assert_frame_close(actual, expected):
+    assert list(actual.columns) == list(expected.columns)
+    for col in expected.columns:
+        if expected[col].dtype.kind in 'fiu':
+            np.testing.assert_allclose(actual[col].to_numpy(dtype='float64'), expected[col].to_numpy(dtype='float64'),
+                                       err_msg=col)
+        else:
+            assert actual[col].astype(str).tolist() == expected[col].astype(str).tolist(), col
+
+
+def assert_matches_legacy(metrics, df):
+    scalars, equity, tables = legacy_metrics(df)
+    for field in SCALARS:
+        assert getattr(metrics, field) == pytest.approx(scalars[field]), field
+    assert_frame_close(metrics.equity[list(equity.columns)], equity)
+    for name, table in tables.items():
+        assert_frame_close(getattr(metrics, name), table)
+    assert metrics.result_counts.to_dict() == df['Result'].value_counts().to_dict()
+    assert metrics.best_trade['Profit (USD)'] == df['Profit (USD)'].max()
+    assert metrics.worst_trade['Profit (USD)'] == df['Profit (USD)'].min()
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_compute_metrics_matches_legacy(seed):
+    df = trades(seed=seed)
+    assert_matches_legacy(analytics.compute_metrics(df), df)
+
+
+def test_compute_metrics_chunked_read_matches_legacy():
+    df = ingest.read_csv_chunked(io.BytesIO(broker_csv(2000, 3)), 500)
+    assert_matches_legacy(analytics.compute_metrics(df), df)
+
+
+def test_incremental_matches_legacy():
+    df = trades(seed=4).sort_values('Close Time', kind='stable').reset_index(drop=True)
+    acc = analytics.IncrementalMetrics(df.iloc[:1000].reset_index(drop=True))
+    for trade in df.iloc[1000:][TRADE_COLUMNS].to_dict('records'):
+        assert acc.append(trade)
+    assert_matches_legacy(acc.metrics(), acc.frame())
+    assert len(acc.frame()) == len(df)
+
+
+def test_incremental_from_empty_matches_legacy():
+    df = trades(300, seed=5).sort_values('Close Time', kind='stable').reset_index(drop=True)
+    acc = analytics.IncrementalMetrics(pd.DataFrame())
+    for trade in df[TRADE_COLUMNS].to_dict('records'):
+        assert acc.append(trade)
+    assert_matches_legacy(acc.metrics(), acc.frame())
+
+
+def test_incremental_back_dated_append_rebuilds():
+    df = trades(seed=6).sort_values('Close Time', kind='stable').reset_index(drop=True)
+    acc = analytics.IncrementalMetrics(df)
+    trade = df.iloc[5][TRADE_COLUMNS].to_dict()
+    trade['Profit (USD)'] = 999.0
+
+    # Anterior al último trade: no se puede acumular y reconstruye
+    assert not acc.append(trade)
+    metrics = acc.metrics()
+    assert metrics.total_trades == len(df) + 1
+    assert metrics.best_trade['Profit (USD)'] == 999.0
+    assert_matches_legacy(metrics, acc.frame())
+
+
+@pytest.fixture
+def forced_parallel(monkeypatch):
+    """Fuerza el pool de `parallel` con dos procesos aunque haya un solo núcleo"""
+    parallel.shutdown()
+    monkeypatch.setattr(parallel, 'MAX_WORKERS', 2)
+    monkeypatch.setattr(parallel, 'use_parallel', lambda n: True)
+    yield
+    parallel.shutdown()
+
+
+def test_parallel_path_matches_legacy(forced_parallel):
+    df = trades(seed=7)
+    metrics = analytics.compute_metrics(df)
+    assert_matches_legacy(metrics, df)
+    assert_matches_legacy(analytics.IncrementalMetrics(df).metrics(), df)
+
+
+@pytest.mark.filterwarnings('error')
+def test_metrics_without_durations():
+    df = trades(50, seed=8).sort_values('Close Time', kind='stable').reset_index(drop=True)
+    df['Duration (hours)'] = np.nan
+    for metrics in (analytics.compute_metrics(df), analytics.IncrementalMetrics(df).metrics()):
+        assert metrics.avg_duration is None
+        assert metrics.max_duration is None
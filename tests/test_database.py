@@ -0,0 +1,124 @@
+"""Journal SQLite de `database`: tablas resumen mantenidas por triggers"""
+import io
+
+import pandas as pd
+import pytest
+
+import analytics
+import database
+import ingest
+import journal_store
+from test_analytics import trades
+
+
+@pytest.fixture
+def journal(tmp_path, monkeypatch):
+    """Journal vacío en un directorio temporal"""
+    database.close_connections()
+    monkeypatch.setattr(database, 'DB_NAME', str(tmp_path / "journal.db"))
+    journal_store.init_journal()
+    yield
+    database.close_connections()
+
+
+def assert_stats_consistent():
+    """El resumen de `trade_stats` coincide con la consulta agregada sobre `trades`"""
+    assert database.get_trade_statistics(use_summary=True) == database.get_trade_statistics(use_summary=False)
+
+
+def test_stats_triggers_accept_null_pnl(journal):
+    database.add_single_trade("2024-01-02 10:00:00", "AAPL", "BUY", 1, 100, pnl=None)
+    database.add_single_trade("2024-01-03 10:00:00", "AAPL", "SELL", 1, 100, pnl=25.0)
+    stats = database.get_trade_statistics()
+    assert (stats['total_trades'], stats['winners'], stats['losers']) == (2, 1, 0)
+    assert_stats_consistent()
+
+    with database._transaction() as conn:
+        conn.execute("UPDATE trades SET pnl = NULL WHERE pnl = 25.0")
+        conn.execute("UPDATE trades SET pnl = -10.0 WHERE id = (SELECT MIN(id) FROM trades)")
+    assert_stats_consistent()
+
+    with database._transaction() as conn:
+        conn.execute("DELETE FROM trades WHERE pnl IS NULL")
+    assert database.get_trade_statistics()['total_trades'] == 1
+    assert_stats_consistent()
+
+
+def test_save_csv_with_blank_profit(journal):
+    csv = ("Market,Portfolio,Symbol,Side,Open Time,Close Time,Size,Open Price,Commission,Fees,Profit (USD)\n"
+           "STOCK,Main,AAPL,BUY,2024-01-02 09:00:00,2024-01-02 10:00:00,1,100,0.5,0.1,12.5\n"
+           "STOCK,Main,MSFT,SELL,2024-01-03 09:00:00,2024-01-03 10:00:00,2,200,0.5,0.1,\n")
+    df = ingest.prepare_trades(pd.read_csv(io.StringIO(csv)))
+
+    result = journal_store.save_trades(df)
+    assert result['inserted'] == 2
+    assert database.get_trade_statistics()['total_trades'] == 2
+    assert_stats_consistent()
+
+
+def test_init_journal_replaces_outdated_stats_triggers(journal):
+    # Trigger de una versión anterior que no tolera pnl NULL
+    with database._transaction() as conn:
+        conn.execute("DROP TRIGGER trade_stats_insert")
+        conn.execute('''
+            CREATE TRIGGER trade_stats_insert AFTER INSERT ON trades
+            BEGIN
+                UPDATE trade_stats SET total_trades = total_trades + 1, winners = winners + (NEW.pnl > 0)
+                WHERE id = 1;
+            END
+        ''')
+
+    journal_store.init_journal()
+    database.add_single_trade("2024-01-02 10:00:00", "AAPL", "BUY", 1, 100, pnl=None)
+    assert_stats_consistent()
+
+
+
+def test_monthly_summary_matches_analytics(journal):
+    df = trades(500, seed=8)
+    journal_store.save_trades(df)
+
+    summary = database.get_monthly_summary()
+    expected = analytics.compute_metrics(df).by_month
+    pd.testing.assert_frame_equal(summary, expected, check_dtype=False)
+
+
+def test_rollups_accept_null_pnl_and_are_enabled_on_first_read(journal):
+    # Journal de antes de los agregados: ni tablas ni triggers
+    with database._transaction() as conn:
+        for kind in database.ROLLUP_KEYS:
+            for event in ('insert', 'delete', 'update'):
+                conn.execute(f"DROP TRIGGER trade_rollup_{kind}_{event}")
+            conn.execute(f"DROP TABLE trade_rollup_{kind}")
+    database.add_single_trade("2024-01-02 10:00:00", "AAPL", "BUY", 1, 100, pnl=5.0)
+
+    # Sin tablas, la primera lectura las crea y las calcula desde `trades`
+    assert database.get_rollup('month')[['key', 'trades', 'winners']].values.tolist() == [['2024-01', 1, 1]]
+
+    # Un pnl NULL cuenta como trade sin ganancia ni pérdida
+    database.add_single_trade("2024-01-03 10:00:00", "AAPL", "SELL", 1, 100, pnl=None)
+    rollup = database.get_rollup('month')
+    assert rollup[['key', 'trades', 'winners', 'losers']].values.tolist() == [['2024-01', 2, 1, 0]]
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'csv.gz'])
+def test_export_to_path_like(journal, tmp_path, fmt):
+    database.add_single_trade("2024-01-02 10:00:00", "AAPL", "BUY", 1, 100, pnl=12.5)
+    target = tmp_path / f"export.{fmt}"
+    assert database.export_trades(target, fmt=fmt) == target
+    assert len(pd.read_csv(target)) == 1
+
+
+def test_parquet_statistics_match_sqlite(journal, tmp_path, monkeypatch):
+    rows = [("2024-01-02 10:00:00", 25.0), ("2024-01-03 10:00:00", -10.0), ("2024-02-01 10:00:00", None)]
+    for date, pnl in rows:
+        database.add_single_trade(date, "AAPL", "BUY", 1, 100, pnl=pnl)
+    expected = database.get_trade_statistics(use_summary=False)
+
+    monkeypatch.setattr(database, 'STORAGE_BACKEND', 'parquet')
+    monkeypatch.setattr(database, 'PARQUET_ROOT', str(tmp_path / "parquet"))
+    for date, pnl in rows:
+        database.add_single_trade(date, "AAPL", "BUY", 1, 100, pnl=pnl)
+    stats = database.get_trade_statistics()
+    assert stats == expected
+    assert {key: type(value) for key, value in stats.items()} == {key: type(value) for key, value in expected.items()}
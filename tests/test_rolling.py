@@ -0,0 +1,20 @@
+"""Métricas móviles de `rolling`"""
+import numpy as np
+import pandas as pd
+
+import rolling
+
+
+def test_days_window_skips_missing_close_times():
+    close_time = pd.to_datetime(['2024-01-01', '2024-01-02', None, '2024-01-05', '2024-01-03']).to_numpy()
+    profit = np.array([1.0, -2.0, 3.0, 4.0, 5.0])
+    dated = ~np.isnat(close_time)
+
+    result = rolling.rolling_metrics(close_time, profit, [2, 3], by='days')
+    for window, df in result.items():
+        expected = rolling.rolling_metrics(close_time[dated], profit[dated], window, by='days')[window]
+        assert len(df) == len(close_time)
+        # Los trades con fecha, en orden, y al final el trade sin fecha con métricas NaN
+        pd.testing.assert_frame_equal(df.iloc[:4], expected, check_dtype=False)
+        assert pd.isna(df['Close Time'].iloc[4])
+        assert df.iloc[4][['Trades'] + rolling.METRIC_COLUMNS].isna().all()
@@ -0,0 +1,125 @@
+"""Parseo de fechas de los CSV del broker con formato fijo.
+
+`pd.to_datetime` sin formato infiere uno en cada llamada, y con fechas
+día/mes ambiguas (01/02/2024) puede elegir distinto que el script de Excel,
+que parsea con `dayfirst=True`. Aquí el formato se detecta una vez sobre una
+muestra, probando `FORMATS` en orden (ISO, luego día primero, luego mes
+primero), y la columna completa se parsea con ese formato explícito.
+
+Los formatos ISO tienen un camino rápido en pandas; para los demás cada texto
+distinto se parsea una sola vez (`pd.factorize`) y se reparte a sus filas.
+Cada columna parseada queda anotada en `df.attrs['parsed_datetimes']` con el
+formato y la proporción de filas que no se pudieron leer.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_datetime64_any_dtype
+
+# Formatos candidatos, en orden de preferencia ante empates
+FORMATS = [
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%d %H:%M',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+    '%d.%m.%Y %H:%M:%S',
+    '%d-%m-%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y',
+    '%Y/%m/%d %H:%M:%S',
+    'ISO8601'
+]
+# Textos distintos que se usan para detectar el formato
+SAMPLE_SIZE = 1000
+
+
+def _is_iso(fmt):
+    return fmt == 'ISO8601' or fmt.startswith('%Y-%m-%d')
+
+
+def detect_format(values, sample_size=SAMPLE_SIZE):
+    """Formato de `FORMATS` que lee más valores de una muestra de `values` (None si ninguno)"""
+    sample = pd.Series(values).dropna()
+    if not len(sample):
+        return None
+    sample = pd.Series(pd.unique(sample.astype(str).to_numpy())[:sample_size])
+
+    best, best_parsed = None, 0
+    for fmt in FORMATS:
+        parsed = pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum()
+        if parsed > best_parsed:
+            best, best_parsed = fmt, parsed
+            if parsed == len(sample):
+                break
+    return best
+
+
+def parse_datetimes(values, fmt=None):
+    """Parsea `values` con `fmt` (o el detectado) y devuelve `(serie, info)`.
+
+    `info` tiene el formato usado, las filas no vacías, las que no se
+    pudieron leer y su proporción. Sin formato reconocible se cae a
+    la inferencia de pandas y el formato queda como None.
+    """
+    values = pd.Series(values)
+    if fmt is None:
+        fmt = detect_format(values)
+
+    if fmt is None:
+        parsed = pd.to_datetime(values, errors='coerce', format='mixed')
+    elif _is_iso(fmt):
+        parsed = pd.to_datetime(values, format=fmt, errors='coerce')
+    else:
+        # Cada texto distinto se parsea una vez; el código -1 (vacío) cae en el NaT del final
+        codes, uniques = pd.factorize(values)
+        unique_times = pd.to_datetime(pd.Series(uniques, dtype=object), format=fmt, errors='coerce').to_numpy()
+        times = np.append(unique_times, np.datetime64('NaT')).take(codes)
+        parsed = pd.Series(times, index=values.index, name=values.name)
+
+    rows = int(values.notna().sum())
+    errors = int(rows - parsed.notna().sum())
+    return parsed, {'format': fmt, 'rows': rows, 'errors': errors, 'error_rate': errors / rows if rows else 0.0}
+
+
+def to_datetime(values, fmt=None):
+    """Serie datetime64; una columna que ya lo es se devuelve sin tocar"""
+    if is_datetime64_any_dtype(values):
+        return values
+    return parse_datetimes(values, fmt)[0]
+
+
+def parse_columns(df, columns, formats=None):
+    """Parsea las columnas de fecha de `df` una sola vez.
+
+    `formats` fija el formato por columna (p. ej. el detectado en el primer
+    bloque de un CSV). Las columnas ya parseadas se dejan igual. Devuelve el
+    DataFrame con las columnas convertidas y `attrs['parsed_datetimes']`
+    = {columna: info de `parse_datetimes`}.
+    """
+    formats = formats or {}
+    parsed, infos = {}, dict(df.attrs.get('parsed_datetimes', {}))
+    for col in columns:
+        if col not in df.columns or is_datetime64_any_dtype(df[col]):
+            continue
+        parsed[col], infos[col] = parse_datetimes(df[col], formats.get(col))
+    if parsed:
+        df = df.assign(**parsed)
+    df.attrs['parsed_datetimes'] = infos
+    return df
+
+
+def merge_infos(infos):
+    """Combina los `info` por columna de varios bloques de un mismo CSV"""
+    merged = {}
+    for info in infos:
+        for col, item in info.items():
+            total = merged.setdefault(col, {'format': item['format'], 'rows': 0, 'errors': 0})
+            total['rows'] += item['rows']
+            total['errors'] += item['errors']
+    for item in merged.values():
+        item['error_rate'] = item['errors'] / item['rows'] if item['rows'] else 0.0
+    return merged